@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+haKCAssets API Cache - Conditional requests for GitHub API listings
+
+Responses are stored on disk keyed by endpoint along with their ETag /
+Last-Modified. Later calls send If-None-Match / If-Modified-Since, so an
+unchanged listing comes back as 304 (free against the rate limit) and is
+served from the cache. Blob endpoints (and blob text fetched via GraphQL,
+keyed `blob-text/{sha}`) are content-addressed and never revalidated.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from persist import write_json
+
+
+def parse_include_output(output: str) -> tuple:
+    """Split `gh api -i` output into (status, headers, body)."""
+    head, sep, body = output.replace("\r\n", "\n").partition("\n\n")
+    if not sep or not head.startswith("HTTP/"):
+        return 0, {}, output
+
+    lines = head.split("\n")
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        status = 0
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, body.strip()
+
+
+def is_immutable(endpoint: str) -> bool:
+    """Blob lookups (and blob text keyed by sha) can never change."""
+    return "/git/blobs/" in endpoint or endpoint.startswith("blob-text/")
+
+
+class ResponseCache:
+    """On-disk API response cache with hit/miss counters."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.stats_file = cache_dir / "stats.json"
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, endpoint: str) -> Path:
+        digest = hashlib.sha1(endpoint.encode()).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.json"
+
+    def get(self, endpoint: str) -> Optional[dict]:
+        """Cached entry: {endpoint, etag, last_modified, body}."""
+        path = self._path(endpoint)
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def put(self, endpoint: str, headers: dict, body: str):
+        """Store a fresh response if it carries a validator (or is immutable)."""
+        etag = headers.get("etag", "")
+        last_modified = headers.get("last-modified", "")
+        if not (etag or last_modified or is_immutable(endpoint)):
+            return
+
+        write_json(self._path(endpoint), {
+            "endpoint": endpoint,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+        }, indent=None, keep_previous=False, durable=False)
+
+    def conditional_headers(self, entry: dict) -> list:
+        """Request headers that let the server answer 304."""
+        headers = []
+        if entry.get("etag"):
+            headers.append(f"If-None-Match: {entry['etag']}")
+        if entry.get("last_modified"):
+            headers.append(f"If-Modified-Since: {entry['last_modified']}")
+        return headers
+
+    def record(self, hit: bool):
+        """Count a cache hit (served from disk) or miss (full response)."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset_counters(self):
+        """Start counting a new run."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def save_stats(self):
+        """Persist this run's counters and running totals for `status`."""
+        stats = self.load_stats()
+        totals = stats.get("totals", {"hits": 0, "misses": 0})
+        totals["hits"] += self.hits
+        totals["misses"] += self.misses
+        stats = {
+            "last_run": {"at": datetime.now().isoformat(), "hits": self.hits, "misses": self.misses},
+            "totals": totals,
+        }
+        write_json(self.stats_file, stats, keep_previous=False)
+
+    def load_stats(self) -> dict:
+        """Last persisted counters."""
+        try:
+            return json.loads(self.stats_file.read_text())
+        except (OSError, ValueError):
+            return {}
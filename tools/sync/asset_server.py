@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Asset Server - Read-only HTTP access to manifests and synced files
+
+Serves the repos/ tree as it is on disk:
+  /repos/manifest.json                  master manifest ("/" redirects here)
+  /repos/{type}/manifest.json           per-type manifest
+  /repos/{type}/{repo}/{filename}       asset bytes
+
+- ETags lead with the asset's git blob sha from the manifest store (the
+  same id the manifests publish) plus the file's mtime, so an in-place edit
+  of the same size still changes the tag; other files get a size/mtime
+  tag. If-None-Match (weak or strong, comma-separated) answers 304, and
+  gzipped responses carry their own tag.
+- Single byte ranges (Range / If-Range) answer 206, so large media can be
+  resumed or sampled.
+- Banners and manifests are gzipped for clients that accept it.
+- Small files are kept in an in-memory LRU bounded by total bytes,
+  revalidated against a stat on every hit; manifests and banners are
+  prefetched into it at startup. Larger files are streamed from disk.
+
+Only GET and HEAD are handled, and nothing outside repos/ or dot-prefixed
+(temp files, .prev generations) is ever served.
+"""
+
+import gzip
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+from manifest_store import ManifestStore
+
+CHUNK_SIZE = 64 * 1024
+MAX_CACHED_FILE = 1024 * 1024  # larger files are streamed, never cached
+GZIP_TYPES = {"banners"}  # asset types served gzipped (manifests always are)
+MIN_GZIP_SIZE = 256
+TEXT_SUFFIXES = {".txt", ".ans", ".asc", ".nfo", ".diz", ""}
+
+
+@dataclass
+class CachedFile:
+    """A file's bytes (and gzipped bytes) as of one stat."""
+    mtime_ns: int
+    size: int
+    etag: str
+    data: bytes
+    gzipped: Optional[bytes] = None
+
+
+class FileCache:
+    """LRU of CachedFile bounded by the bytes it holds."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self._files: OrderedDict[Path, CachedFile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cost(entry: CachedFile) -> int:
+        return len(entry.data) + len(entry.gzipped or b"")
+
+    def get(self, path: Path, st: os.stat_result) -> Optional[CachedFile]:
+        """Cached entry if it still matches the file's stat."""
+        with self._lock:
+            entry = self._files.get(path)
+            if entry and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                self._files.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, path: Path, entry: CachedFile):
+        """Insert or replace an entry, evicting the least recently used."""
+        cost = self._cost(entry)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._files.pop(path, None)
+            if old:
+                self.bytes -= self._cost(old)
+            self._files[path] = entry
+            self.bytes += cost
+            while self.bytes > self.max_bytes:
+                _, evicted = self._files.popitem(last=False)
+                self.bytes -= self._cost(evicted)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison: weak, over a comma-separated list, or "*"."""
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in [t.removeprefix("W/") for t in tags]
+
+
+def parse_range(header: str, size: int) -> Optional[tuple]:
+    """(start, end inclusive) for a single "bytes=" range.
+
+    None means serve the whole file (no usable or multiple ranges);
+    (size, size) marks an unsatisfiable range.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return (size, size)
+            return (max(0, size - length), size - 1)
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return (size, size)
+    if start > end:
+        return None
+    return (start, min(end, size - 1))
+
+
+class AssetServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer over a repos/ directory and its manifest store."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple, repos_dir: Path, manifest_store: ManifestStore,
+                 cache_bytes: int = 64 * 1024 * 1024, verbose: bool = False):
+        self.repos_dir = repos_dir.resolve()
+        self.manifest_store = manifest_store
+        self.cache = FileCache(cache_bytes)
+        self.verbose = verbose
+        super().__init__(address, AssetRequestHandler)
+
+    def resolve(self, url_path: str) -> Optional[Path]:
+        """File under repos/ for a request path, or None if it isn't servable."""
+        parts = [p for p in unquote(url_path).split("/") if p]
+        if not parts or parts[0] != "repos" or len(parts) > 4:
+            return None
+        if any(p.startswith(".") or "\\" in p for p in parts[1:]):
+            return None
+        path = self.repos_dir.joinpath(*parts[1:])
+        try:
+            path = path.resolve()
+        except OSError:
+            return None
+        if self.repos_dir not in path.parents or not path.is_file():
+            return None
+        return path
+
+    def etag(self, path: Path, st: os.stat_result) -> str:
+        """Blob sha and mtime for a manifest entry whose file is intact, else size-mtime."""
+        entry = self.manifest_store.at_path(path.relative_to(self.repos_dir).as_posix())
+        if entry and entry.blob and entry.size == st.st_size:
+            return f'"{entry.blob}-{st.st_mtime_ns:x}"'
+        return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+    def compressible(self, path: Path) -> bool:
+        """Manifests and text banners are worth gzipping."""
+        parts = path.relative_to(self.repos_dir).parts
+        if path.suffix == ".json":
+            return True
+        return parts[0] in GZIP_TYPES and path.suffix.lower() in TEXT_SUFFIXES
+
+    def load(self, path: Path, st: os.stat_result) -> Optional[CachedFile]:
+        """CachedFile for a small file (from the LRU or disk); None for large ones."""
+        if st.st_size > MAX_CACHED_FILE:
+            return None
+        entry = self.cache.get(path, st)
+        if entry:
+            return entry
+        data = path.read_bytes()
+        if len(data) != st.st_size:
+            return None  # changed under us; stream this one
+        entry = CachedFile(st.st_mtime_ns, st.st_size, self.etag(path, st), data)
+        if self.compressible(path) and st.st_size >= MIN_GZIP_SIZE:
+            entry.gzipped = gzip.compress(data, mtime=0)
+        self.cache.put(path, entry)
+        return entry
+
+    def prefetch(self) -> int:
+        """Warm the LRU with manifests and banners; returns files loaded."""
+        candidates = [self.repos_dir / "manifest.json", *self.repos_dir.glob("*/manifest.json")]
+        for asset_type in GZIP_TYPES:
+            candidates.extend(sorted(self.repos_dir.glob(f"{asset_type}/*/*")))
+        loaded = 0
+        for path in candidates:
+            if path.name.startswith(".") or not path.is_file():
+                continue
+            if self.cache.bytes >= self.cache.max_bytes:
+                break
+            try:
+                if self.load(path, path.stat()):
+                    loaded += 1
+            except OSError:
+                continue
+        return loaded
+
+
+class AssetRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD for AssetServer."""
+
+    server: AssetServer
+    server_version = "haKCAssets"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _error(self, status: HTTPStatus, headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _serve(self, body: bool):
+        url_path = urlsplit(self.path).path
+        if url_path in ("", "/"):
+            self._error(HTTPStatus.FOUND, {"Location": "/repos/manifest.json"})
+            return
+
+        path = self.server.resolve(url_path)
+        if path is None:
+            self._error(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            st = path.stat()
+            cached = self.server.load(path, st)
+        except OSError:
+            self._error(HTTPStatus.NOT_FOUND)
+            return
+        etag = cached.etag if cached else self.server.etag(path, st)
+        size = st.st_size
+
+        ctype, _ = mimetypes.guess_type(path.name)
+        if ctype is None and self.server.compressible(path):
+            ctype = "text/plain"
+        ctype = ctype or "application/octet-stream"
+        if ctype.startswith("text/") or ctype == "application/json":
+            ctype += "; charset=utf-8"
+
+        # Byte ranges are of the identity encoding, so a Range request is never gzipped
+        byte_range = None
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range", etag) == etag:
+            byte_range = parse_range(range_header, size)
+        use_gzip = (byte_range is None and cached is not None and cached.gzipped is not None
+                    and "gzip" in self.headers.get("Accept-Encoding", ""))
+        if use_gzip:
+            etag = f'{etag[:-1]}-gzip"'
+
+        headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "no-cache"}
+        if cached and cached.gzipped is not None:
+            headers["Vary"] = "Accept-Encoding"
+
+        inm = self.headers.get("If-None-Match")
+        if inm and etag_matches(inm, etag):
+            self._error(HTTPStatus.NOT_MODIFIED, headers)
+            return
+
+        if byte_range == (size, size):
+            headers["Content-Range"] = f"bytes */{size}"
+            self._error(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers)
+            return
+
+        if byte_range:
+            start, end = byte_range
+            status = HTTPStatus.PARTIAL_CONTENT
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            start, end = 0, size - 1
+            status = HTTPStatus.OK
+        length = end - start + 1
+
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(cached.gzipped)))
+        else:
+            self.send_header("Content-Length", str(max(0, length)))
+        self.end_headers()
+        if not body:
+            return
+
+        try:
+            if use_gzip:
+                self.wfile.write(cached.gzipped)
+            elif cached:
+                self.wfile.write(cached.data[start:end + 1])
+            else:
+                self._stream(path, start, length)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _stream(self, path: Path, start: int, length: int):
+        """Copy length bytes of path from start to the client."""
+        with open(path, "rb") as f:
+            f.seek(start)
+            while length > 0:
+                chunk = f.read(min(CHUNK_SIZE, length))
+                if not chunk:
+                    # File shrank since the headers went out; the client sees a short body
+                    self.close_connection = True
+                    return
+                self.wfile.write(chunk)
+                length -= len(chunk)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Blob Store - Content-addressed storage for synced assets
+
+Objects are keyed by git blob sha (`sha1("blob <size>\\0" + content)`), the
+same id the GitHub API reports, so a favicon or demo GIF shipped by several
+repos is fetched and stored once. The `repos/` layout is materialised from
+the store as hardlinks (reflink or plain copy when linking isn't possible).
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+HASH_CHUNK = 1024 * 1024
+
+
+def git_blob_sha(data: bytes) -> str:
+    """Git blob id for in-memory content."""
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+def git_blob_sha_file(path: Path) -> str:
+    """Git blob id for a file, streamed."""
+    h = hashlib.sha1(b"blob %d\0" % os.path.getsize(path))
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _reflink(src: Path, dest: Path) -> bool:
+    """Copy-on-write clone (Linux FICLONE); False if unsupported."""
+    try:
+        import fcntl
+        FICLONE = 0x40049409
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except (ImportError, OSError):
+        Path(dest).unlink(missing_ok=True)
+        return False
+
+
+class BlobStore:
+    """objects/ab/cdef... keyed by git blob sha."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path_for(self, sha: str) -> Path:
+        """Object path for a blob sha."""
+        return self.root / sha[:2] / sha[2:]
+
+    def has(self, sha: str) -> bool:
+        """Whether the store holds this blob."""
+        return bool(sha) and self.path_for(sha).exists()
+
+    def add_bytes(self, data: bytes) -> str:
+        """Store content, returning its blob sha."""
+        sha = git_blob_sha(data)
+        obj = self.path_for(sha)
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=obj.parent, prefix=".", suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, obj)
+        return sha
+
+    def adopt(self, path: Path) -> str:
+        """Bring an existing file under the store, returning its blob sha.
+
+        A new blob is linked into the store as-is; a duplicate of a stored
+        blob is replaced by a link to the stored copy.
+        """
+        sha = git_blob_sha_file(path)
+        obj = self.path_for(sha)
+        if obj.exists():
+            if not obj.samefile(path):
+                self.materialize(sha, path)
+        else:
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(path, obj)
+            except OSError:
+                shutil.copyfile(path, obj)
+        return sha
+
+    def materialize(self, sha: str, dest: Path) -> str:
+        """Place blob sha at dest. Returns "linked", "reflinked", "copied" or "present"."""
+        obj = self.path_for(sha)
+        dest = Path(dest)
+        if dest.exists() and obj.samefile(dest):
+            return "present"
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.parent / f".{dest.name}.{os.getpid()}.link"
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(obj, tmp)
+            how = "linked"
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            how = "reflinked" if _reflink(obj, tmp) else "copied"
+            if how == "copied":
+                shutil.copyfile(obj, tmp)
+        os.replace(tmp, dest)
+        return how
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Directory Index - Cached per-directory file counts and sizes
+
+Each directory's entry holds its mtime_ns, the count and total bytes of the
+files directly in it, and its subdirectory names. A directory is only
+re-listed when its mtime changed (a file was added, removed or renamed in
+it), so totals for an unchanged tree cost one stat per directory.
+
+Files rewritten in place don't touch their directory's mtime; everything
+this repo writes (sync, dedupe, organize) lands via rename, which does.
+Dot-prefixed temp files and .partial downloads are never counted.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from persist import write_json
+
+
+class DirIndex:
+    """Persisted {relative dir: {mtime_ns, files, bytes, dirs}}."""
+
+    def __init__(self, index_file: Path, root: Path):
+        self.index_file = index_file
+        self.root = root
+        self.entries: dict[str, dict] = {}
+        self.visited: dict[str, dict] = {}
+        self.rescanned = 0
+        try:
+            self.entries = json.loads(index_file.read_text())
+        except (OSError, ValueError):
+            pass
+
+    def _refresh(self, path: Path, exclude: frozenset) -> dict:
+        key = str(path.relative_to(self.root))
+        mtime = os.stat(path).st_mtime_ns
+        entry = self.entries.get(key)
+        if not entry or entry["mtime_ns"] != mtime:
+            files = size = 0
+            dirs = []
+            with os.scandir(path) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        dirs.append(e.name)
+                    elif (e.is_file(follow_symlinks=False) and not e.name.startswith(".")
+                          and not e.name.endswith(".partial") and e.name not in exclude):
+                        files += 1
+                        size += e.stat(follow_symlinks=False).st_size
+            entry = {"mtime_ns": mtime, "files": files, "bytes": size, "dirs": sorted(dirs)}
+            self.rescanned += 1
+        self.visited[key] = entry
+        return entry
+
+    def totals(self, top: Path, exclude=frozenset()) -> tuple:
+        """(files, bytes) under top at any depth; (0, 0) if it doesn't exist.
+
+        exclude names files never to count (e.g. manifest.json); pass the
+        same set for a given directory every time.
+        """
+        if not top.is_dir():
+            return 0, 0
+        files = size = 0
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            try:
+                entry = self._refresh(path, exclude)
+            except OSError:
+                continue  # removed while walking
+            files += entry["files"]
+            size += entry["bytes"]
+            stack.extend(path / d for d in entry["dirs"])
+        return files, size
+
+    def subdirs(self, top: Path, exclude=frozenset()) -> list:
+        """Immediate subdirectory names of a directory."""
+        entry = self.visited.get(str(top.relative_to(self.root)))
+        if entry is None:
+            try:
+                entry = self._refresh(top, exclude)
+            except OSError:
+                return []
+        return entry["dirs"]
+
+    def save(self):
+        """Persist the entries visited this run (drops directories that vanished)."""
+        if self.visited != self.entries:
+            write_json(self.index_file, self.visited, indent=None, keep_previous=False)
+        self.entries = dict(self.visited)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Downloader - Pooled keep-alive HTTP downloads
+
+Replaces one `curl` process per file with reusable http.client connections:
+- Keep-alive connections pooled per (scheme, host, port)
+- Concurrent downloads capped by max_workers
+- Streamed writes to a `.partial` file, resumed with Range requests after
+  a dropped connection or timeout; partials live beside dest or in a
+  separate partial_dir (same filesystem), so a store directory only ever
+  holds finished files
+- Size + git blob sha verified before the atomic rename into place
+- Per-download byte/latency stats and pool-wide totals
+- An optional token, sent only to GitHub hosts (raw.githubusercontent.com
+  for private repos), never across a redirect to anywhere else
+
+Works against any http(s) URL, including a local stand-in server.
+"""
+
+import hashlib
+import http.client
+import os
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+from urllib.parse import urljoin, urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent))
+from blob_store import git_blob_sha_file
+
+CHUNK_SIZE = 64 * 1024
+PARTIAL_SUFFIX = ".partial"
+RETRY_DELAY = 1.0
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+USER_AGENT = "haKCAssets-sync"
+GITHUB_HOSTS = ("github.com", "githubusercontent.com")  # and their subdomains
+
+
+class PermanentError(Exception):
+    """A download failure that retrying won't fix (HTTP error, bad content)."""
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of a single download."""
+    url: str
+    dest: Path
+    ok: bool = False
+    status: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+    error: str = ""
+
+
+class ConnectionPool:
+    """Idle keep-alive connections keyed by (scheme, host, port)."""
+
+    def __init__(self, timeout: float = 60, max_idle_per_host: int = 8):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+        self.opened = 0
+        self.reused = 0
+
+    def acquire(self, scheme: str, host: str, port: Optional[int]) -> tuple:
+        """Get an idle connection for the origin, or open a new one."""
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                return key, idle.pop(), True
+            self.opened += 1
+
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        return key, conn, False
+
+    def release(self, key: tuple, conn, reusable: bool = True):
+        """Return a connection to the pool (or close it)."""
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_host:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+class Downloader:
+    """Concurrent file downloader over a shared connection pool."""
+
+    def __init__(self, max_workers: int = 4, timeout: float = 120,
+                 pool: ConnectionPool = None, max_redirects: int = 5, retries: int = 3,
+                 token: Callable[[], Optional[str]] = None, auth_hosts: tuple = GITHUB_HOSTS,
+                 partial_dir: Path = None):
+        self.max_workers = max(1, max_workers)
+        self.retries = retries
+        self.pool = pool or ConnectionPool(timeout=timeout)
+        self.max_redirects = max_redirects
+        # token() is only called once a request goes to one of auth_hosts
+        self.auth_hosts = auth_hosts
+        self._token_source = token
+        self._token: Optional[str] = None
+        self._token_lock = threading.Lock()
+        self.partial_dir = partial_dir
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero the download totals (connection counters are pool-wide)."""
+        self.files = 0
+        self.failed = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def _auth_headers(self, host: str) -> dict:
+        """Authorization for a GitHub host when a token is available, else nothing."""
+        if not self._token_source or not host:
+            return {}
+        if not any(host == h or host.endswith("." + h) for h in self.auth_hosts):
+            return {}
+        with self._token_lock:
+            if self._token is None:
+                self._token = self._token_source() or ""
+        return {"Authorization": f"token {self._token}"} if self._token else {}
+
+    def _request(self, url: str, headers: dict = None) -> tuple:
+        """Send a GET, following redirects. Returns (key, conn, response, final_url)."""
+        for _ in range(self.max_redirects + 1):
+            parts = urlsplit(url)
+            target = parts.path or "/"
+            if parts.query:
+                target += "?" + parts.query
+
+            for attempt in range(2):
+                key, conn, was_idle = self.pool.acquire(parts.scheme, parts.hostname, parts.port)
+                try:
+                    conn.request("GET", target, headers={
+                        "User-Agent": USER_AGENT,
+                        "Accept-Encoding": "identity",
+                        **self._auth_headers(parts.hostname),
+                        **(headers or {}),
+                    })
+                    resp = conn.getresponse()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # Server dropped an idle keep-alive connection; retry once on a fresh one
+                    conn.close()
+                    if not was_idle or attempt:
+                        raise
+
+            if resp.status in REDIRECT_CODES and resp.getheader("Location"):
+                resp.read()
+                self.pool.release(key, conn, not resp.will_close)
+                url = urljoin(url, resp.getheader("Location"))
+                continue
+            return key, conn, resp, url
+
+        raise http.client.HTTPException(f"too many redirects for {url}")
+
+    def partial_path(self, dest: Path) -> Path:
+        """Where dest's bytes accumulate until verified.
+
+        In partial_dir the name is keyed by the whole dest path, so two
+        dests with the same filename never share (or resume) a partial.
+        """
+        if self.partial_dir is None:
+            return dest.with_name(dest.name + PARTIAL_SUFFIX)
+        key = hashlib.sha1(str(dest.resolve()).encode()).hexdigest()[:16]
+        return self.partial_dir / f"{key}-{dest.name}{PARTIAL_SUFFIX}"
+
+    def _fetch_once(self, url: str, partial: Path, result: DownloadResult) -> bool:
+        """One request, appending to partial. True once the server has sent everything.
+
+        Resumes with a Range request when partial already holds bytes; a
+        server that ignores the range (200) restarts the file.
+        """
+        offset = partial.stat().st_size if partial.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        key, conn, resp, _ = self._request(url, headers)
+        result.status = resp.status
+
+        if resp.status == 416 and offset:
+            # Nothing left to send: partial is already complete (verified by caller)
+            resp.read()
+            self.pool.release(key, conn, not resp.will_close)
+            return True
+        if resp.status not in (200, 206):
+            resp.read()
+            self.pool.release(key, conn, not resp.will_close)
+            result.error = f"HTTP {resp.status}"
+            raise PermanentError(result.error)
+
+        mode = "ab" if resp.status == 206 else "wb"
+        length = resp.getheader("Content-Length")
+        received = 0
+        try:
+            with open(partial, mode) as f:
+                while True:
+                    chunk = resp.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    received += len(chunk)
+                    result.bytes += len(chunk)
+        except BaseException:
+            conn.close()
+            raise
+
+        # read(amt) returns b"" on a dropped connection instead of raising
+        if length and length.isdigit() and received < int(length):
+            conn.close()
+            raise http.client.IncompleteRead(b"", int(length) - received)
+        self.pool.release(key, conn, not resp.will_close)
+        return True
+
+    def fetch(self, url: str, dest: Path, expected_size: int = None, expected_sha: str = None) -> DownloadResult:
+        """Download url to dest, resumably.
+
+        Bytes stream into partial_path(dest). Dropped connections and
+        timeouts are retried with a Range request from where the partial
+        file left off. The file is only promoted to dest (atomic rename) once its size
+        and git blob sha match what was expected, so an interrupted download
+        never looks like a finished one.
+        """
+        dest = Path(dest)
+        partial = self.partial_path(dest)
+        result = DownloadResult(url=url, dest=dest)
+        start = time.monotonic()
+
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            partial.parent.mkdir(parents=True, exist_ok=True)
+            for attempt in range(self.retries + 1):
+                try:
+                    self._fetch_once(url, partial, result)
+                    break
+                except PermanentError:
+                    raise
+                except (OSError, http.client.HTTPException) as e:
+                    result.error = str(e) or type(e).__name__
+                    if attempt == self.retries:
+                        raise
+                    time.sleep(RETRY_DELAY * (attempt + 1))
+
+            size = partial.stat().st_size
+            if expected_size and size != expected_size:
+                partial.unlink(missing_ok=True)
+                raise PermanentError(f"size mismatch ({size} != {expected_size})")
+            if expected_sha and git_blob_sha_file(partial) != expected_sha:
+                partial.unlink(missing_ok=True)
+                raise PermanentError("sha mismatch")
+
+            os.replace(partial, dest)
+            result.ok = True
+            result.error = ""
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+
+        result.elapsed = time.monotonic() - start
+        with self._stats_lock:
+            self.files += 1
+            self.failed += 0 if result.ok else 1
+            self.bytes += result.bytes
+            self.seconds += result.elapsed
+        return result
+
+    def fetch_all(self, jobs: Iterable[tuple]) -> Iterator[DownloadResult]:
+        """Download jobs concurrently, yielding results in input order.
+
+        Each job is (url, dest) or (url, dest, expected_size, expected_sha).
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return iter(())
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs)))
+        results = pool.map(lambda job: self.fetch(*job), jobs)
+        pool.shutdown(wait=False)
+        return results
+
+    def summary(self) -> str:
+        """One-line totals for console output."""
+        mb = self.bytes / (1024 * 1024)
+        return (f"{self.files} download(s), {mb:.1f} MB in {self.seconds:.1f}s "
+                f"({self.failed} failed, {self.pool.opened} connection(s) opened, {self.pool.reused} reused)")
+
+    def close(self):
+        """Close pooled connections."""
+        self.pool.close()
+
+
+def format_result(result: DownloadResult) -> str:
+    """Short size/latency note for a finished download."""
+    if not result.ok:
+        return result.error
+    kb = result.bytes / 1024
+    return f"{kb:.1f} KB, {result.elapsed * 1000:.0f} ms"
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Feature Cache - Persisted per-file rule features
+
+Stores what FileFeatures probed about a file (image dimensions, content
+matches) in .hakc_cache/features.db, keyed by path and checked against
+(size, mtime_ns, inode), so re-checking an unchanged tree costs a stat per
+file. Features rather than destinations are cached: editing
+asset_rules.json never serves a stale placement.
+
+Shared by organize.py, hakc_assets.py organize/explain/status and the
+parallel strict check.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from rules import FileFeatures
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode    INTEGER NOT NULL,
+    data     TEXT NOT NULL
+)
+"""
+
+
+def _signature(st: os.stat_result) -> tuple:
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+class FeatureCache:
+    """SQLite-backed {path: (size, mtime_ns, inode, features)}.
+
+    Rows are loaded in one query on first use, so lookups after that are
+    dict hits; writes are batched until save().
+    """
+
+    def __init__(self, db_file: Path):
+        self.db_file = db_file
+        self._db: Optional[sqlite3.Connection] = None
+        self._rows: Optional[dict] = None
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            # watch organizes on the event loop while syncs run on a worker thread
+            self._db = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(SCHEMA)
+        return self._db
+
+    def _load(self) -> dict:
+        if self._rows is None:
+            rows = self._connect().execute("SELECT path, size, mtime_ns, inode, data FROM features")
+            self._rows = {path: ((size, mtime, inode), data) for path, size, mtime, inode, data in rows}
+        return self._rows
+
+    def lookup(self, path: str, st: os.stat_result) -> Optional[dict]:
+        """Cached features if size, mtime and inode still match."""
+        with self._lock:
+            row = self._load().get(path)
+        if row and row[0] == _signature(st):
+            return json.loads(row[1])
+        return None
+
+    def store(self, path: str, st: os.stat_result, features: dict):
+        """Remember freshly probed features."""
+        data = json.dumps(features, sort_keys=True)
+        sig = _signature(st)
+        with self._lock:
+            rows = self._load()
+            if rows.get(path) == (sig, data):
+                return
+            rows[path] = (sig, data)
+            self._connect().execute(
+                "INSERT OR REPLACE INTO features (path, size, mtime_ns, inode, data) VALUES (?, ?, ?, ?, ?)",
+                (path, *sig, data))
+            self.dirty = True
+
+    def features(self, path: Path) -> FileFeatures:
+        """FileFeatures for a file, seeded from the cache when it is unchanged."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return FileFeatures(path)
+        return FileFeatures(path, self.lookup(str(path), st), st)
+
+    def remember(self, features: FileFeatures):
+        """Write back whatever a FileFeatures from features() probed."""
+        if features.st is not None:
+            self.store(str(features.path), features.st, features.export())
+
+    def save(self):
+        """Commit batched writes."""
+        with self._lock:
+            if self.dirty and self._db is not None:
+                self._db.commit()
+                self.dirty = False
+
+    def entry_count(self) -> int:
+        """Number of files with cached features."""
+        if self._rows is None and not self.db_file.exists():
+            return 0
+        with self._lock:
+            return len(self._load())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Git Mirror - Local, blob-filtered mirrors of org repos
+
+Each repo is a bare `--filter=blob:none` clone: commits and trees are local,
+blobs arrive only when asked for. A scan costs one `git fetch` per repo,
+`git ls-tree -r` for the listing, and one bulk fetch of the asset blobs
+not mirrored yet. Sizes and contents then come from a single long-lived
+`git cat-file --batch-command` process per repo, so nothing after the
+fetch touches the network and everything still works offline against the
+last fetched state. Blobs known to be missing are never handed to
+cat-file, which in a partial clone would fetch each one lazily, and
+cat-file runs with GIT_NO_LAZY_FETCH so any other missing object fails
+instead of reaching for the network.
+
+Remotes can be any git URL or a local directory of repos (handy for tests;
+a local remote needs uploadpack.allowFilter / allowAnySHA1InWant set for
+the blob filter to apply, otherwise git clones everything).
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Optional
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _git(*args, cwd: Path = None, timeout: int = 300) -> Optional[str]:
+    """Run git; stdout on success, None on failure."""
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+class GitMirror:
+    """One bare, blob-filtered mirror and its cat-file process."""
+
+    def __init__(self, path: Path, url: str):
+        self.path = path
+        self.url = url
+        self._batch = None
+        self._lock = threading.Lock()
+        # Blobs missing() found absent and no prefetch has brought in since
+        self._missing: set = set()
+
+    def exists(self) -> bool:
+        return (self.path / "HEAD").exists()
+
+    def update(self) -> bool:
+        """Clone or fetch; False if the remote couldn't be reached."""
+        if self.exists():
+            ok = _git("fetch", "--quiet", "--prune", "origin", cwd=self.path) is not None
+            if ok:
+                self._follow_default_branch()
+            return ok
+
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+        if _git("clone", "--quiet", "--bare", "--filter=blob:none", self.url, str(tmp)) is None:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+        # A bare clone only tracks HEAD; keep every branch up to date instead
+        _git("config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*", cwd=tmp)
+        os.replace(tmp, self.path)
+        return True
+
+    def _follow_default_branch(self):
+        """Point the mirror's HEAD (what tree() and missing() read) at the remote's default branch."""
+        output = _git("ls-remote", "--symref", "origin", "HEAD", cwd=self.path) or ""
+        for line in output.splitlines():
+            ref, _, name = line.partition("\t")
+            if name == "HEAD" and ref.startswith("ref: refs/heads/"):
+                branch = ref[len("ref: "):]
+                if _git("rev-parse", "--verify", "--quiet", branch, cwd=self.path) is not None:
+                    _git("symbolic-ref", "HEAD", branch, cwd=self.path)
+                return
+
+    def head(self) -> str:
+        """Commit sha of the mirrored default branch ("" if empty)."""
+        return (_git("rev-parse", "--verify", "--quiet", "HEAD", cwd=self.path) or "").strip()
+
+    def tree(self) -> list:
+        """Every path at HEAD as trees-API entries (type, path, sha)."""
+        output = _git("ls-tree", "-r", "-z", "HEAD", cwd=self.path)
+        entries = []
+        for record in (output or "").split("\0"):
+            meta, sep, path = record.partition("\t")
+            if not sep:
+                continue
+            _mode, kind, sha = meta.split()
+            entries.append({"type": kind, "path": path, "sha": sha})
+        return entries
+
+    def missing(self) -> set:
+        """Blob shas at HEAD that haven't been fetched (no lazy fetching)."""
+        output = _git("rev-list", "--objects", "--missing=print", "HEAD", cwd=self.path)
+        self._missing = {line[1:] for line in (output or "").splitlines() if line.startswith("?")}
+        return set(self._missing)
+
+    def prefetch(self, shas: list) -> bool:
+        """Fetch the given blobs in one round trip."""
+        if not shas:
+            return True
+        ok = _git("-c", "fetch.negotiationAlgorithm=noop", "fetch", "--quiet", "--no-tags",
+                  "--no-write-fetch-head", "--filter=blob:none", "origin", *shas,
+                  cwd=self.path) is not None
+        if ok:
+            self._missing.difference_update(shas)
+        return ok
+
+    def _process(self):
+        if self._batch is None or self._batch.poll() is not None:
+            self._batch = subprocess.Popen(
+                ["git", "cat-file", "--batch-command"], cwd=self.path,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                env={**os.environ, "GIT_NO_LAZY_FETCH": "1"},
+            )
+        return self._batch
+
+    def _command(self, command: str, sha: str):
+        """Send one batch command; (process, size) or (None, None) if missing."""
+        if sha in self._missing:
+            return None, None
+        proc = self._process()
+        try:
+            proc.stdin.write(f"{command} {sha}\n".encode())
+            proc.stdin.flush()
+        except OSError:
+            self._batch = None
+            return None, None
+        header = proc.stdout.readline().split()
+        if len(header) != 3 or header[1] == b"missing":
+            return None, None
+        return proc, int(header[2])
+
+    def size(self, sha: str) -> Optional[int]:
+        """Blob size, None if the object isn't available."""
+        with self._lock:
+            _proc, size = self._command("info", sha)
+            return size
+
+    def read(self, sha: str) -> Optional[bytes]:
+        """Whole blob contents (for small text files)."""
+        with self._lock:
+            proc, size = self._command("contents", sha)
+            if proc is None:
+                return None
+            data = proc.stdout.read(size)
+            proc.stdout.read(1)  # trailing newline
+            return data
+
+    def copy_to(self, sha: str, dest: Path) -> bool:
+        """Stream a blob to dest via a temp file and rename."""
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        with self._lock:
+            proc, size = self._command("contents", sha)
+            if proc is None:
+                return False
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as out:
+                remaining = size
+                while remaining:
+                    chunk = proc.stdout.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    remaining -= len(chunk)
+            proc.stdout.read(1)
+            if remaining:
+                # Short read: the process is out of step, start a fresh one
+                proc.kill()
+                self._batch = None
+        if remaining:
+            tmp.unlink(missing_ok=True)
+            return False
+        os.replace(tmp, dest)
+        return True
+
+    def close(self):
+        """End the cat-file process."""
+        if self._batch is not None:
+            self._batch.stdin.close()
+            self._batch.wait()
+            self._batch = None
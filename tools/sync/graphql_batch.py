@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+haKCAssets GraphQL Batch - Fetch many small blobs per round trip
+
+Builds one GraphQL query with aliased `object(expression: "HEAD:path")`
+fields across several repos, so README text and candidate banner files
+for the whole org come back in a handful of requests instead of one
+contents call each.
+"""
+
+import json
+from typing import Optional
+
+# Blobs per query; well under GitHub's node limits for Blob.text lookups
+BATCH_SIZE = 50
+
+
+def build_query(org: str, batch: list) -> tuple:
+    """Build a query for [(repo, path), ...].
+
+    Returns (query, aliases) where aliases maps (repo_alias, file_alias)
+    back to the (repo, path) it was asked for.
+    """
+    by_repo: dict[str, list] = {}
+    for repo, path in batch:
+        by_repo.setdefault(repo, []).append(path)
+
+    aliases = {}
+    parts = []
+    for i, (repo, paths) in enumerate(by_repo.items()):
+        fields = []
+        for j, path in enumerate(paths):
+            aliases[(f"r{i}", f"f{j}")] = (repo, path)
+            fields.append(f"f{j}: object(expression: {json.dumps('HEAD:' + path)}) "
+                          f"{{ ... on Blob {{ text isBinary }} }}")
+        parts.append(f"r{i}: repository(owner: {json.dumps(org)}, name: {json.dumps(repo)}) "
+                     f"{{ {' '.join(fields)} }}")
+
+    return "query { " + " ".join(parts) + " }", aliases
+
+
+def parse_response(output: Optional[str], aliases: dict) -> Optional[dict]:
+    """Map a query response to {(repo, path): text}.
+
+    Returns None if the call failed outright, including a 200 that carries
+    only `errors` (rate limits and query timeouts come back that way).
+    Fields named in a partial response's errors are left out, so callers
+    can fetch them another way. Missing or binary blobs map to None.
+    """
+    if not output:
+        return None
+    try:
+        response = json.loads(output)
+        data = response.get("data")
+        errors = response.get("errors") or []
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    failed = set()
+    for error in errors:
+        path = error.get("path") if isinstance(error, dict) else None
+        if not path:
+            return None  # not tied to a field: nothing in data can be trusted
+        failed.add(tuple(path[:2]))
+
+    texts = {}
+    for (repo_alias, file_alias), key in aliases.items():
+        if (repo_alias,) in failed or (repo_alias, file_alias) in failed:
+            continue
+        blob = (data.get(repo_alias) or {}).get(file_alias) or {}
+        texts[key] = None if blob.get("isBinary") else blob.get("text")
+    return texts
+
+
+def batches(items: list, size: int = BATCH_SIZE):
+    """Split items into query-sized batches."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
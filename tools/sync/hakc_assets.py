@@ -10,32 +10,57 @@ Commands:
   hakc_assets.py list-repos            # List all org repos
   hakc_assets.py scan [repo]           # Scan repo(s) for assets
   hakc_assets.py manifest              # Show/rebuild manifests
+  hakc_assets.py query                 # Stream matching manifest entries (JSONL/TSV)
+  hakc_assets.py serve                 # Read-only HTTP server for manifests and assets
+  hakc_assets.py dedupe                # Move synced files into the blob store
+  hakc_assets.py verify                # Check synced files against manifest shas
 
 Options:
   --apply          Actually make changes (default is dry run)
-  --interval N     Watch interval in minutes (default: 30)
+  --interval N     Remote check interval in minutes for watch (default: 30)
+  --poll N         Local poll interval in seconds when inotify is unavailable (default: 2)
+  --jobs N         Repos to scan concurrently (default: 4, 1 = serial)
+  --full           Rescan repos even if unchanged since last sync
+  --source S       Read org repos via gh (default), rest or git
+  --host/--port    Address for serve (default: 127.0.0.1:8787)
   --verbose        Show detailed output
 """
 
 import json
 import os
 import sys
-import subprocess
-import shutil
-import base64
-import time
+import random
+import asyncio
 import argparse
+import re
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
-from dataclasses import dataclass, field, asdict
+
+sys.path.insert(0, str(Path(__file__).parent))
+from blob_store import git_blob_sha_file
+from api_cache import ResponseCache
+from asset_server import AssetServer
+from dir_index import DirIndex
+from feature_cache import FeatureCache
+from move_journal import MoveJournal, plan_moves
+from rules import ANSI_PATTERN, ASCII_ART_CHARS, RuleSet, format_explain
+from integrity import HashCache, hash_files, hash_path
+from manifest_store import AssetEntry, ManifestStore, local_relpath
+from persist import read_json, write_json
+from watcher import make_watcher
+from repo_tree import README_NAMES
+from request_scheduler import RequestFailed
+from sources import SOURCES, make_source
+from sync_core import Asset, SyncCore, TypeFirstLayout
 
 # ─────────────────────────────────────────────────────────────
 #  Configuration
 # ─────────────────────────────────────────────────────────────
 
-ASCII_ART_CHARS = set("█▓▒░╔╗╚╝║═│─┌┐└┘├┤┬┴┼╭╮╯╰▀▄▌▐■□▪▫●○◆◇★☆")
-ANSI_PATTERN = "\x1b["
+# watch: remote cadence jitter and first retry delay after a failed check
+REMOTE_JITTER = 0.1
+REMOTE_RETRY_SECONDS = 30
 
 # New structure: repos/{type}/{repo}/{file}
 ASSET_TYPE_DIRS = {
@@ -47,96 +72,150 @@ ASSET_TYPE_DIRS = {
 }
 
 
-@dataclass
-class AssetEntry:
-    """Entry in a manifest."""
-    filename: str
-    source_repo: str
-    source_path: str
-    sha: str
-    size: int
-    synced_at: str
-    download_url: str
-
-
-@dataclass
-class Asset:
-    """Represents a discovered asset."""
-    source: str
-    path: str
-    name: str
-    size: int = 0
-    sha: str = ""
-    download_url: str = ""
-    asset_type: str = "other"
-    local_path: Optional[Path] = None
-    extracted_content: Optional[str] = None  # For banners extracted from READMEs
-
-
-@dataclass
-class SyncState:
-    """Tracks sync state."""
-    last_sync: str = ""
-    last_organize: str = ""
-    assets: dict = field(default_factory=dict)  # "type/repo/file" -> sha
+# Columns of `query` output, in TSV order
+QUERY_FIELDS = ["type", "repo", "path", "filename", "local_path", "sha", "size", "synced_at", "blob", "download_url"]
+
+
+def parse_size(text: str) -> int:
+    """Byte count from "2048", "512K", "1.5M" or "1G"."""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper().rstrip("B")
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
 
 
 class Manifest:
-    """Manages manifest files for asset tracking."""
+    """One asset type's view of the manifest store; manifest.json is its export."""
 
-    def __init__(self, manifest_path: Path):
+    def __init__(self, store: ManifestStore, asset_type: str, manifest_path: Path):
+        self.store = store
+        self.asset_type = asset_type
         self.path = manifest_path
-        self.entries: dict[str, AssetEntry] = {}
-        self._load()
+        self.dirty = False
 
-    def _load(self):
-        """Load manifest from file."""
-        if self.path.exists():
-            try:
-                data = json.loads(self.path.read_text())
-                for filename, entry_data in data.get("assets", {}).items():
-                    self.entries[filename] = AssetEntry(**entry_data)
-            except:
-                pass
+    def entries(self) -> list:
+        """All entries of this type."""
+        return [entry for _, entry in self.store.entries(self.asset_type)]
 
     def save(self):
-        """Save manifest to file."""
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        data = {
-            "generated": datetime.now().isoformat(),
-            "count": len(self.entries),
-            "assets": {k: asdict(v) for k, v in self.entries.items()}
-        }
-        self.path.write_text(json.dumps(data, indent=2))
+        """Commit to the store and re-export manifest.json if this type changed."""
+        self.store.commit()
+        if self.dirty:
+            self.store.export(self.asset_type, self.path)
+            self.dirty = False
+
+    def add(self, entry: AssetEntry) -> Optional[AssetEntry]:
+        """Add or update an entry; returns the entry it replaced."""
+        self.dirty = True
+        return self.store.put(self.asset_type, entry)
+
+    def get(self, repo: str, path: str) -> Optional[AssetEntry]:
+        """Get entry by source repo and path."""
+        return self.store.get(self.asset_type, repo, path)
+
+    def remove(self, repo: str, path: str):
+        """Remove an entry."""
+        self.store.remove(self.asset_type, repo, path)
+        self.dirty = True
 
-    def add(self, entry: AssetEntry):
-        """Add or update an entry."""
-        self.entries[entry.filename] = entry
 
-    def get(self, filename: str) -> Optional[AssetEntry]:
-        """Get entry by filename."""
-        return self.entries.get(filename)
+class MasterManifest:
+    """repos/manifest.json: per-type and per-repo filename index, updated in place.
 
-    def remove(self, filename: str):
-        """Remove an entry."""
-        self.entries.pop(filename, None)
+    Only a new local file (a new entry, or one renamed) changes the index,
+    so re-syncing changed content leaves the file untouched. An index that
+    lists a filename twice predates unique local paths and is rebuilt.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.data: Optional[dict] = None
+        self.dirty = False
+        self.data = read_json(path, validate=self._valid)
+
+    @staticmethod
+    def _valid(data) -> bool:
+        if not isinstance(data, dict) or not {"types", "by_repo", "total_assets"} <= data.keys():
+            return False
+        lists = [files for t in data["types"].values() for files in t.get("repos", {}).values()]
+        return all(len(set(files)) == len(files) for files in lists)
+
+    def record(self, asset_type: str, previous: Optional[AssetEntry], entry: AssetEntry):
+        """Apply one manifest add (previous is the entry it replaced, if any)."""
+        if previous and previous.filename == entry.filename:
+            return
+        types = self.data["types"].setdefault(asset_type, {"count": 0, "repos": {}})
+        by_type = types["repos"].setdefault(entry.source_repo, [])
+        by_repo = self.data["by_repo"].setdefault(entry.source_repo, {}).setdefault(asset_type, [])
+        # A replaced entry under another local name (same source path, renamed) is gone
+        gone = [previous.filename] if previous and previous.filename in by_type else []
+        new = [entry.filename] if entry.filename not in by_type else []
+        for name in gone:
+            by_type.remove(name)
+            by_repo.remove(name)
+        by_type.extend(new)
+        by_repo.extend(new)
+        types["count"] += len(new) - len(gone)
+        self.data["total_assets"] += len(new) - len(gone)
+        self.dirty = True
+
+    def save(self):
+        """Write the index if anything changed."""
+        if not self.dirty:
+            return
+        self.data["generated"] = datetime.now().isoformat()
+        write_json(self.path, self.data)
+        self.dirty = False
 
 
 class HaKCAssets:
     """Main asset manager class."""
 
-    def __init__(self, repo_root: Path = None):
+    def __init__(self, repo_root: Path = None, jobs: int = 4, source: str = "gh"):
         self.repo_root = repo_root or Path(__file__).parent.parent
+        self.jobs = max(1, jobs)
         self.rules_file = self.repo_root / "asset_rules.json"
-        self.state_file = self.repo_root / ".sync_state.json"
         self.repos_dir = self.repo_root / "repos"
+        self.cache_dir = self.repo_root / ".hakc_cache"
 
         self.rules = self._load_rules()
-        self.state = self._load_state()
+        self.ruleset = RuleSet(self.rules.get("rules", []))
+        self.features = FeatureCache(self.cache_dir / "features.db")
+        self.journal = MoveJournal(self.cache_dir / "organize.journal", self.repo_root)
         self.org = self.rules.get("org", "haKC-ai")
 
-        # Manifests cache
+        # Manifests: one indexed store, exported per type as manifest.json
+        self.manifest_store = ManifestStore(self.cache_dir / "manifest.db", legacy_dir=self.repos_dir)
         self._manifests: dict[str, Manifest] = {}
+        self._master: Optional[MasterManifest] = None
+        # (type, replaced entry, new entry) for each manifest add since the last save
+        self._manifest_changes: list[tuple] = []
+
+        # Conditional-request cache for API calls
+        self.api_cache = ResponseCache(self.cache_dir / "api")
+
+        sync_rules = self.rules.get("sync", {})
+        self.core = SyncCore(
+            self.repo_root,
+            source=make_source(source, self.org, self.api_cache, self.jobs),
+            layout=TypeFirstLayout(),
+            classify=self._classify_repo,
+            text_candidates=self._text_candidates,
+            source_dirs=sync_rules.get("source_dirs", []),
+            exclude_repos=sync_rules.get("exclude_repos", []),
+            jobs=self.jobs,
+            on_synced=self._add_to_manifest,
+            on_batch=self._save_manifests,
+        )
+        self.source = self.core.source
+        self.state = self.core.state
+        self.store = self.core.store
+        self.downloader = self.core.downloader
+        self._state_lock = self.core.lock
 
     def _load_rules(self) -> dict:
         """Load rules from JSON."""
@@ -144,79 +223,25 @@ class HaKCAssets:
             return json.loads(self.rules_file.read_text())
         return {}
 
-    def _load_state(self) -> SyncState:
-        """Load sync state."""
-        if self.state_file.exists():
-            try:
-                data = json.loads(self.state_file.read_text())
-                return SyncState(**data)
-            except:
-                pass
-        return SyncState()
-
     def _save_state(self):
         """Save sync state."""
-        self.state_file.write_text(json.dumps({
-            "last_sync": self.state.last_sync,
-            "last_organize": self.state.last_organize,
-            "assets": self.state.assets
-        }, indent=2))
+        self.core.save_state()
+
+    def close(self):
+        """Release source processes and pooled connections."""
+        self.core.close()
 
     def _get_manifest(self, asset_type: str) -> Manifest:
         """Get or create manifest for asset type."""
         if asset_type not in self._manifests:
             manifest_path = self.repos_dir / asset_type / "manifest.json"
-            self._manifests[asset_type] = Manifest(manifest_path)
+            self._manifests[asset_type] = Manifest(self.manifest_store, asset_type, manifest_path)
         return self._manifests[asset_type]
 
     def _get_master_manifest_path(self) -> Path:
         """Get path to master manifest."""
         return self.repos_dir / "manifest.json"
 
-    def _run_gh(self, *args) -> Optional[str]:
-        """Run gh CLI command."""
-        try:
-            result = subprocess.run(
-                ["gh", *args],
-                capture_output=True, text=True, timeout=30
-            )
-            return result.stdout.strip() if result.returncode == 0 else None
-        except Exception:
-            return None
-
-    def _get_image_dimensions(self, filepath: Path) -> tuple:
-        """Get image dimensions using sips."""
-        try:
-            result = subprocess.run(
-                ["sips", "-g", "pixelWidth", "-g", "pixelHeight", str(filepath)],
-                capture_output=True, text=True
-            )
-            lines = result.stdout.strip().split('\n')
-            w = h = 0
-            for line in lines:
-                if "pixelWidth" in line:
-                    w = int(line.split()[-1])
-                elif "pixelHeight" in line:
-                    h = int(line.split()[-1])
-            return (w, h)
-        except:
-            return (0, 0)
-
-    def _is_square(self, filepath: Path) -> bool:
-        """Check if image is square."""
-        w, h = self._get_image_dimensions(filepath)
-        if w == 0 or h == 0:
-            return False
-        return 0.9 <= w/h <= 1.1
-
-    def _contains_ascii_art(self, filepath: Path) -> bool:
-        """Check for ASCII art."""
-        try:
-            content = filepath.read_text(encoding='utf-8', errors='ignore')
-            return ANSI_PATTERN in content or bool(ASCII_ART_CHARS & set(content))
-        except:
-            return False
-
     def _should_ignore(self, filepath: Path) -> bool:
         """Check if file should be ignored."""
         name = filepath.name
@@ -235,7 +260,6 @@ class HaKCAssets:
 
     def _extract_banners_from_readme(self, content: str, repo: str) -> list:
         """Extract ASCII banners from README code blocks."""
-        import re
         banners = []
 
         # Match code blocks: ```...``` or indented blocks with ASCII art
@@ -298,46 +322,24 @@ class HaKCAssets:
 
         return "other"
 
-    def _match_rule(self, filepath: Path, rule: dict) -> bool:
-        """Check if file matches a rule."""
-        match = rule.get("match", {})
-        ext = filepath.suffix.lower()
-
-        if "extensions" in match and ext not in match["extensions"]:
-            return False
-
-        if "aspect_ratio" in match:
-            if match["aspect_ratio"] == "square" and not self._is_square(filepath):
-                return False
-
-        if "max_dimension" in match:
-            w, h = self._get_image_dimensions(filepath)
-            if max(w, h) > match["max_dimension"]:
-                return False
-
-        if "name_contains" in match:
-            name = filepath.stem.lower()
-            if not any(p.lower() in name for p in match["name_contains"]):
-                return False
-
-        if "content_contains" in match:
-            if not self._contains_ascii_art(filepath):
-                return False
-
-        return True
-
     def get_destination(self, filepath: Path) -> Optional[str]:
         """Get destination directory for a file."""
         if self._should_ignore(filepath):
             return None
+        features = self.features.features(filepath)
+        destination = self.ruleset.destination(features)
+        self.features.remember(features)
+        return destination
 
-        rules = sorted(self.rules.get("rules", []), key=lambda r: r.get("priority", 99))
-
-        for rule in rules:
-            if self._match_rule(filepath, rule):
-                return rule.get("destination")
-
-        return None
+    def explain(self, filepath: Path) -> str:
+        """Show which rule fires for a file and why."""
+        if self._should_ignore(filepath):
+            return f"  {filepath}\n    ignored by asset_rules.json"
+        features = self.features.features(filepath)
+        trace = self.ruleset.explain(features)
+        self.features.remember(features)
+        self.features.save()
+        return format_explain(filepath, trace)
 
     # ─────────────────────────────────────────────────────────
     #  Local Organization
@@ -351,263 +353,297 @@ class HaKCAssets:
                 files.append(item)
         return files
 
-    def organize(self, dry_run: bool = True, interactive: bool = False) -> list:
-        """Organize files in repo root."""
-        moves = []
+    def _print_move(self, src: Path, dest: Path, how: str):
+        """on_move callback for journaled moves."""
+        print(f"  Moved: {src.name} → {dest.parent.relative_to(self.repo_root)}/")
+
+    def organize(self, dry_run: bool = True, interactive: bool = False, paths: list = None) -> list:
+        """Organize files in repo root.
+
+        paths limits the pass to specific root files (e.g. from watch events)
+        instead of re-walking the whole root. Moves are planned up front
+        (collisions skipped, never overwritten) and run through the move
+        journal.
+        """
+        if not dry_run and self.journal.pending():
+            print("  An interrupted organize was found. Run organize --resume or --rollback first.")
+            return []
+
+        if paths is None:
+            files = self.get_root_files()
+        else:
+            files = [p for p in paths
+                     if p.parent == self.repo_root and p.is_file() and not self._should_ignore(p)]
 
-        for filepath in self.get_root_files():
+        candidates = []
+        for filepath in files:
             dest_dir = self.get_destination(filepath)
             if dest_dir:
-                dest_path = self.repo_root / dest_dir / filepath.name
-
                 if interactive:
                     resp = input(f"Move {filepath.name} → {dest_dir}/? [y/N] ").strip().lower()
                     if resp != 'y':
                         continue
+                candidates.append((filepath, self.repo_root / dest_dir / filepath.name))
+        self.features.save()
 
-                if dry_run:
-                    print(f"  Would move: {filepath.name} → {dest_dir}/")
-                else:
-                    dest_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.move(str(filepath), str(dest_path))
-                    print(f"  Moved: {filepath.name} → {dest_dir}/")
-
-                moves.append((filepath, dest_path))
+        moves, collisions = plan_moves(candidates)
+        for src, dest in collisions:
+            print(f"  Collision: {dest.relative_to(self.repo_root)} already exists, skipping {src.name}")
 
-        if not dry_run:
+        if dry_run:
+            for src, dest in moves:
+                print(f"  Would move: {src.name} → {dest.parent.relative_to(self.repo_root)}/")
+        else:
+            self.journal.execute(moves, on_move=self._print_move)
             self.state.last_organize = datetime.now().isoformat()
             self._save_state()
 
         return moves
 
+    def recover_organize(self, rollback: bool = False) -> int:
+        """Resume (or roll back) an organize interrupted mid-batch."""
+        if not self.journal.pending():
+            return 0
+        if rollback:
+            return self.journal.rollback(on_move=self._print_move)
+        count = self.journal.resume(on_move=self._print_move)
+        self.state.last_organize = datetime.now().isoformat()
+        self._save_state()
+        return count
+
     # ─────────────────────────────────────────────────────────
     #  Remote Sync (New Structure: repos/{type}/{repo}/{file})
     # ─────────────────────────────────────────────────────────
 
     def list_repos(self) -> list:
         """List org repos."""
-        output = self._run_gh("repo", "list", self.org, "--json", "name,description,updatedAt", "--limit", "100")
-        return json.loads(output) if output else []
-
-    def scan_repo_contents(self, repo: str, path: str = "") -> list:
-        """Get repo contents."""
-        endpoint = f"repos/{self.org}/{repo}/contents/{path}".rstrip("/")
-        output = self._run_gh("api", endpoint)
-        if not output:
-            return []
-        try:
-            items = json.loads(output)
-            return [items] if isinstance(items, dict) else items
-        except:
-            return []
+        return self.source.list_repos()
 
-    def scan_repo(self, repo: str) -> list:
-        """Scan repo for assets."""
-        assets = []
-        sync_config = self.rules.get("sync", {})
-        source_dirs = sync_config.get("source_dirs", [])
-        exclude = sync_config.get("exclude_repos", [])
+    def list_repo_files(self, repo: str) -> list:
+        """Candidate asset files: root files plus anything under `sync.source_dirs`."""
+        return self.source.list_files(repo, self.core.source_dirs)
 
-        if repo in exclude:
-            return []
-
-        root_items = self.scan_repo_contents(repo)
-
-        # Find asset directories and README files
-        dirs_to_scan = []
+    def _text_candidates(self, files: list) -> list:
+        """Files whose text the scan needs: the root README and small text files in asset dirs."""
+        wanted = []
+        for item in files:
+            name = item.get("name", "")
+            is_root = "/" not in item.get("path", name)
+            if is_root and name.lower() in README_NAMES:
+                wanted.append(item)
+            elif not is_root and Path(name).suffix.lower() in [".txt", ""] and item.get("size", 0) < 50000:
+                wanted.append(item)
+        return wanted
+
+    def _classify_repo(self, repo: str, files: list, texts: dict) -> list:
+        """Turn a repo's file listing (plus fetched texts) into assets."""
+        root_assets = []
+        nested_assets = []
+        banner_assets = []
         readme_item = None
 
-        for item in root_items:
+        for item in files:
             name = item.get("name", "")
-            if item.get("type") == "dir" and name.lower() in source_dirs:
-                dirs_to_scan.append(name)
-            elif item.get("type") == "file":
-                # Check for README files to extract banners
-                if name.lower() in ["readme.md", "readme.txt", "readme"]:
-                    readme_item = item
-
-                asset_type = self._get_asset_type(Path(name))
-                if asset_type != "other":
-                    assets.append(Asset(
-                        source=repo, path=name, name=name,
-                        size=item.get("size", 0),
-                        sha=item.get("sha", ""),
-                        download_url=item.get("download_url", ""),
-                        asset_type=asset_type
-                    ))
+            path = item.get("path", name)
+            is_root = "/" not in path
+
+            # Check for README files to extract banners
+            if is_root and name.lower() in README_NAMES:
+                readme_item = item
+
+            # Content is only fetched for text files in asset directories
+            content = None if is_root else texts.get((repo, path))
+
+            asset_type = self._get_asset_type(Path(name), content)
+            if asset_type != "other":
+                (root_assets if is_root else nested_assets).append(Asset(
+                    source=repo, path=path, name=name,
+                    size=item.get("size", 0),
+                    sha=item.get("sha", ""),
+                    download_url=item.get("download_url", ""),
+                    asset_type=asset_type
+                ))
 
         # Extract banners from README
         if readme_item:
-            readme_path = readme_item.get("path", readme_item.get("name", ""))
-            content_data = self._run_gh("api", f"repos/{self.org}/{repo}/contents/{readme_path}")
-            if content_data:
-                try:
-                    data = json.loads(content_data)
-                    if data.get("encoding") == "base64":
-                        readme_content = base64.b64decode(data.get("content", "")).decode("utf-8", errors="ignore")
-                        banners = self._extract_banners_from_readme(readme_content, repo)
-                        for banner in banners:
-                            # Create a virtual asset for the extracted banner
-                            assets.append(Asset(
-                                source=repo,
-                                path=f"README.md#{banner['name']}",
-                                name=banner['name'],
-                                size=len(banner['content']),
-                                sha=readme_item.get("sha", "") + f"_{banner['name']}",
-                                download_url="",  # No direct URL, content is extracted
-                                asset_type="banners",
-                                extracted_content=banner['content']
-                            ))
-                except:
-                    pass
-
-        # Scan asset directories
-        for dir_name in dirs_to_scan:
-            for item in self.scan_repo_contents(repo, dir_name):
-                if item.get("type") == "file":
-                    name = item.get("name", "")
-                    path = item.get("path", "")
-
-                    # Check content for text files
-                    content = None
-                    if Path(name).suffix.lower() in [".txt", ""] and item.get("size", 0) < 50000:
-                        content_data = self._run_gh("api", f"repos/{self.org}/{repo}/contents/{path}")
-                        if content_data:
-                            try:
-                                data = json.loads(content_data)
-                                if data.get("encoding") == "base64":
-                                    content = base64.b64decode(data.get("content", "")).decode("utf-8", errors="ignore")
-                            except:
-                                pass
-
-                    asset_type = self._get_asset_type(Path(name), content)
-                    if asset_type != "other":
-                        assets.append(Asset(
-                            source=repo, path=path, name=name,
-                            size=item.get("size", 0),
-                            sha=item.get("sha", ""),
-                            download_url=item.get("download_url", ""),
-                            asset_type=asset_type
-                        ))
-
-        return assets
-
-    def scan_all_repos(self, specific_repo: str = None) -> list:
-        """Scan all repos."""
-        assets = []
-        repos = [{"name": specific_repo}] if specific_repo else self.list_repos()
-
-        print(f"Scanning {len(repos)} repo(s)...\n")
-
-        for repo_info in repos:
-            repo = repo_info["name"]
-            if repo == "haKCAssets":
-                continue
+            readme_content = texts.get((repo, readme_item.get("path", readme_item.get("name", ""))))
+            if readme_content:
+                for banner in self._extract_banners_from_readme(readme_content, repo):
+                    # Create a virtual asset for the extracted banner
+                    banner_assets.append(Asset(
+                        source=repo,
+                        path=f"README.md#{banner['name']}",
+                        name=banner['name'],
+                        size=len(banner['content']),
+                        sha=readme_item.get("sha", "") + f"_{banner['name']}",
+                        download_url="",  # No direct URL, content is extracted
+                        asset_type="banners",
+                        extracted_content=banner['content']
+                    ))
 
-            print(f"  {repo}...", end=" ", flush=True)
-            repo_assets = self.scan_repo(repo)
-            assets.extend(repo_assets)
-            print(f"{len(repo_assets)} asset(s)")
+        return root_assets + banner_assets + nested_assets
+
+    def scan_repo(self, repo: str) -> list:
+        """Scan repo for assets."""
+        return self.core.scan_repo(repo)
 
-        return assets
+    def scan_all_repos(self, specific_repo: str = None, full: bool = False) -> list:
+        """Scan all repos (skipping those unchanged since the last sync unless full)."""
+        return self.core.scan(specific_repo, full=full)
 
     def get_sync_path(self, asset: Asset) -> Path:
         """Get local path: repos/{type}/{repo}/{file}"""
-        return self.repos_dir / asset.asset_type / asset.source / asset.name
-
-    def get_asset_key(self, asset: Asset) -> str:
-        """Get unique key for state tracking."""
-        return f"{asset.asset_type}/{asset.source}/{asset.name}"
+        return self.core.path_for(asset)
 
     def needs_sync(self, asset: Asset) -> bool:
         """Check if asset needs syncing."""
-        local = self.get_sync_path(asset)
-        if not local.exists():
-            return True
-
-        key = self.get_asset_key(asset)
-        return self.state.assets.get(key) != asset.sha
+        return self.core.needs_sync(asset)
+
+    def _add_to_manifest(self, asset: Asset, blob: str):
+        """Record a synced asset in its type manifest."""
+        entry = AssetEntry(
+            filename=asset.name,
+            source_repo=asset.source,
+            source_path=asset.path,
+            sha=asset.sha,
+            size=asset.size,
+            synced_at=datetime.now().isoformat(),
+            download_url=asset.download_url or "(extracted from README)",
+            blob=blob
+        )
+        previous = self._get_manifest(asset.asset_type).add(entry)
+        self._manifest_changes.append((asset.asset_type, previous, entry))
+
+    def _save_manifests(self, synced: list):
+        """Export the type manifests that changed and update the master manifest.
+
+        The master is patched from this sync's new entries rather than
+        rebuilt; it is only rebuilt from the store when missing or unreadable.
+        """
+        master = self._master or MasterManifest(self._get_master_manifest_path())
+        if master.data is None:
+            # The store already holds this sync's entries
+            self._build_master_manifest()
+            master = MasterManifest(self._get_master_manifest_path())
+        else:
+            for asset_type, previous, entry in self._manifest_changes:
+                master.record(asset_type, previous, entry)
+        self._master = master
+        self._drop_renamed(self._manifest_changes)
+        self._manifest_changes = []
+
+        for manifest in self._manifests.values():
+            manifest.save()
+        master.save()
+
+    def _drop_renamed(self, changes: list):
+        """Remove files left under an entry's old local name.
+
+        A source path synced under a new name (nested files used to keep
+        their plain name) leaves its old file and state key behind; both go,
+        unless another entry holds that path now.
+        """
+        for asset_type, previous, entry in changes:
+            if not previous or previous.source_path != entry.source_path or previous.filename == entry.filename:
+                continue
+            old = local_relpath(asset_type, previous)
+            if self.manifest_store.at_path(old):
+                continue
+            (self.repos_dir / old).unlink(missing_ok=True)
+            with self._state_lock:
+                self.state.assets.pop(old, None)
 
     def download_asset(self, asset: Asset) -> bool:
         """Download asset and update manifest."""
-        local = self.get_sync_path(asset)
-        local.parent.mkdir(parents=True, exist_ok=True)
-
-        try:
-            # Handle extracted content (e.g., banners from READMEs)
-            if asset.extracted_content:
-                local.write_text(asset.extracted_content, encoding='utf-8')
-                success = True
-            else:
-                # Normal download via curl
-                result = subprocess.run(
-                    ["curl", "-sL", "-o", str(local), asset.download_url],
-                    capture_output=True, timeout=120
-                )
-                success = result.returncode == 0 and local.exists()
-
-            if success:
-                # Update state
-                key = self.get_asset_key(asset)
-                self.state.assets[key] = asset.sha
-
-                # Update type manifest
-                manifest = self._get_manifest(asset.asset_type)
-                manifest.add(AssetEntry(
-                    filename=asset.name,
-                    source_repo=asset.source,
-                    source_path=asset.path,
-                    sha=asset.sha,
-                    size=asset.size,
-                    synced_at=datetime.now().isoformat(),
-                    download_url=asset.download_url or "(extracted from README)"
-                ))
-
-                return True
-        except Exception as e:
-            print(f"    Error: {e}")
-        return False
+        return self.core.download_asset(asset)
 
     def sync(self, assets: list, dry_run: bool = True) -> list:
         """Sync assets."""
-        to_sync = [a for a in assets if self.needs_sync(a)]
+        return self.core.sync(assets, dry_run)
 
-        if not to_sync:
-            print("\nAll assets up to date.")
-            return []
+    def dedupe(self, dry_run: bool = True) -> tuple:
+        """Bring already-synced files under the blob store.
 
-        print(f"\n{len(to_sync)} asset(s) to sync:\n")
+        Every manifest entry's file is hashed into the store and duplicates
+        are replaced by hardlinks to a single object. Returns
+        (files, unique blobs, bytes reclaimable).
+        """
+        groups: dict[str, dict] = {}
+        files = 0
+
+        for asset_type in ASSET_TYPE_DIRS:
+            manifest = self._get_manifest(asset_type)
+            for entry in manifest.entries():
+                path = self.repos_dir / local_relpath(asset_type, entry)
+                if not path.is_file():
+                    continue
+                st = path.stat()
+                sha = git_blob_sha_file(path) if dry_run else self.store.adopt(path)
+                if not dry_run and entry.blob != sha:
+                    entry.blob = sha
+                    manifest.add(entry)
+                groups.setdefault(sha, {})[(st.st_dev, st.st_ino)] = st.st_size
+                files += 1
 
-        synced = []
-        for asset in to_sync:
-            local = self.get_sync_path(asset)
-            action = "new" if not local.exists() else "update"
+        # Bytes held by extra inodes of the same content
+        reclaim = sum(sum(inodes.values()) - max(inodes.values()) for inodes in groups.values())
 
-            if dry_run:
-                print(f"  [{action}] {asset.asset_type}/{asset.source}/{asset.name}")
-            else:
-                print(f"  Syncing {asset.source}/{asset.name}...", end=" ", flush=True)
-                if self.download_asset(asset):
-                    print("done")
-                    synced.append(asset)
-                else:
-                    print("FAILED")
-
-        if not dry_run and synced:
-            # Save all manifests
+        if not dry_run:
             for manifest in self._manifests.values():
                 manifest.save()
 
-            # Update master manifest
-            self._build_master_manifest()
+        return files, len(groups), reclaim
 
-            self.state.last_sync = datetime.now().isoformat()
+    def verify(self, requeue: bool = False) -> dict:
+        """Check synced files against the git blob shas in the manifests.
+
+        Hashing runs on a process pool and skips files whose size and mtime
+        match the last verification. With requeue=True, mismatched or missing
+        files are dropped from sync state (and their repo heads forgotten)
+        so the next sync fetches them again.
+        """
+        checks = []
+        for asset_type in ASSET_TYPE_DIRS:
+            for entry in self._get_manifest(asset_type).entries():
+                path = self.repos_dir / local_relpath(asset_type, entry)
+                # README banners carry a synthetic sha; only their blob key is real
+                expected = entry.blob or (entry.sha if re.fullmatch(r"[0-9a-f]{40}", entry.sha) else "")
+                checks.append((asset_type, entry, path, expected))
+
+        cache = HashCache(self.cache_dir / "verify.json")
+        shas, cached = hash_files([path for _, _, path, _ in checks], cache)
+        cache.save()
+
+        counts = {"ok": 0, "mismatch": 0, "missing": 0, "unverifiable": 0, "cached": cached}
+        bad = []
+        for asset_type, entry, path, expected in checks:
+            actual = shas.get(str(path))
+            if actual is None:
+                status = "missing"
+            elif not expected:
+                status = "unverifiable"
+            else:
+                status = "ok" if actual == expected else "mismatch"
+            counts[status] += 1
+
+            if status in ("missing", "mismatch"):
+                print(f"  [{status}] {local_relpath(asset_type, entry)}")
+                bad.append((asset_type, entry, expected))
+
+        if requeue and bad:
+            for asset_type, entry, expected in bad:
+                self.state.assets.pop(local_relpath(asset_type, entry), None)
+                self.core.forget_head(entry.source_repo)
+                # A hardlinked file edited in place corrupts its store object too
+                obj = self.store.path_for(expected) if expected else None
+                if obj and obj.exists() and hash_path(str(obj)) != expected:
+                    obj.unlink()
             self._save_state()
 
-        return synced
+        return counts
 
     def _build_master_manifest(self):
-        """Build master manifest from all type manifests."""
+        """Build master manifest from the manifest store."""
         master = {
             "generated": datetime.now().isoformat(),
             "organization": self.org,
@@ -616,138 +652,264 @@ class HaKCAssets:
             "total_assets": 0
         }
 
-        # Scan all type directories
-        if self.repos_dir.exists():
-            for type_dir in self.repos_dir.iterdir():
-                if type_dir.is_dir() and type_dir.name != ".git":
-                    manifest_path = type_dir / "manifest.json"
-                    if manifest_path.exists():
-                        try:
-                            data = json.loads(manifest_path.read_text())
-                            type_name = type_dir.name
-                            master["types"][type_name] = {
-                                "count": data.get("count", 0),
-                                "repos": {}
-                            }
-
-                            for filename, entry in data.get("assets", {}).items():
-                                repo = entry.get("source_repo", "unknown")
-                                if repo not in master["types"][type_name]["repos"]:
-                                    master["types"][type_name]["repos"][repo] = []
-                                master["types"][type_name]["repos"][repo].append(filename)
-
-                                # Also build by_repo index
-                                if repo not in master["by_repo"]:
-                                    master["by_repo"][repo] = {}
-                                if type_name not in master["by_repo"][repo]:
-                                    master["by_repo"][repo][type_name] = []
-                                master["by_repo"][repo][type_name].append(filename)
-
-                                master["total_assets"] += 1
-                        except:
-                            pass
-
-        self._get_master_manifest_path().write_text(json.dumps(master, indent=2))
+        for type_name, entry in self.manifest_store.entries():
+            repo = entry.source_repo
+            type_data = master["types"].setdefault(type_name, {"count": 0, "repos": {}})
+            type_data["count"] += 1
+            type_data["repos"].setdefault(repo, []).append(entry.filename)
+            master["by_repo"].setdefault(repo, {}).setdefault(type_name, []).append(entry.filename)
+            master["total_assets"] += 1
+
+        write_json(self._get_master_manifest_path(), master)
 
     # ─────────────────────────────────────────────────────────
     #  Watch Mode
     # ─────────────────────────────────────────────────────────
 
-    def watch(self, interval: int = 30):
-        """Watch for changes."""
-        print(f"Watching every {interval} minutes. Ctrl+C to stop.\n")
+    def watch(self, interval: int = 30, poll: float = 2.0):
+        """Watch for changes.
 
+        Local drops into the repo root are organized as soon as the watcher
+        reports them; remote scans run on their own cadence.
+        """
         try:
-            while True:
-                now = datetime.now().strftime('%H:%M:%S')
-                print(f"\n[{now}] Checking...")
+            asyncio.run(self._watch(interval, poll))
+        except KeyboardInterrupt:
+            print("\nStopped.")
+        finally:
+            self.close()
+
+    async def _watch(self, interval: int, poll: float):
+        watcher = make_watcher(self.repo_root, poll)
+        print(f"Watching {self.repo_root} ({watcher.kind}), remote every ~{interval} minutes. Ctrl+C to stop.\n")
+
+        # Finish a batch a previous run was killed in the middle of
+        if self.journal.pending():
+            print("Resuming interrupted organize...")
+            self.recover_organize()
 
-                # Check local files
-                root_files = self.get_root_files()
-                if root_files:
-                    print(f"  Found {len(root_files)} local file(s) to organize")
-                    self.organize(dry_run=False)
+        # Anything already waiting in the root
+        if self.get_root_files():
+            self.organize(dry_run=False)
 
-                # Check remote repos
-                assets = self.scan_all_repos()
-                synced = self.sync(assets, dry_run=False)
+        await asyncio.gather(self._watch_local(watcher), self._watch_remote(interval))
+
+    async def _watch_local(self, watcher):
+        """Organize just the paths the watcher reports."""
+        async for paths in watcher.changes():
+            files = [p for p in paths if p.is_file() and not self._should_ignore(p)]
+            if files:
+                now = datetime.now().strftime('%H:%M:%S')
+                print(f"\n[{now}] {len(files)} new local file(s)")
+                self.organize(dry_run=False, paths=files)
+
+    def _remote_tick(self) -> list:
+        """One remote scan + sync pass."""
+        try:
+            assets = self.scan_all_repos()
+            return self.sync(assets, dry_run=False)
+        finally:
+            # Nothing to keep open while waiting for the next check
+            self.core.close()
+
+    async def _watch_remote(self, interval: int):
+        """Remote checks every interval minutes (±10% jitter), backing off after failures."""
+        failures = 0
+        while True:
+            now = datetime.now().strftime('%H:%M:%S')
+            print(f"\n[{now}] Checking remote...")
+            try:
+                synced = await asyncio.to_thread(self._remote_tick)
+                failures = 0
                 if synced:
                     print(f"  Synced {len(synced)} asset(s)")
+            except Exception as e:
+                failures += 1
+                print(f"  Remote check failed ({e})")
 
-                print(f"  Next check in {interval} minutes...")
-                time.sleep(interval * 60)
-
-        except KeyboardInterrupt:
-            print("\nStopped.")
+            delay = interval * 60
+            if failures:
+                delay = min(delay, REMOTE_RETRY_SECONDS * 2 ** (failures - 1))
+            delay *= random.uniform(1 - REMOTE_JITTER, 1 + REMOTE_JITTER)
+            print(f"  Next remote check in {delay / 60:.1f} minutes...")
+            await asyncio.sleep(delay)
 
     # ─────────────────────────────────────────────────────────
     #  Status & Manifests
     # ─────────────────────────────────────────────────────────
 
-    def status(self):
+    def status_report(self) -> dict:
+        """Status figures, with directory totals from the cached directory index."""
+        index = DirIndex(self.cache_dir / "dirindex.json", self.repo_root)
+
+        local = {}
+        for dir_name in ["art", "avatars", "banners", "tools"]:
+            files, size = index.totals(self.repo_root / dir_name)
+            if files:
+                local[dir_name] = {"files": files, "bytes": size}
+
+        synced = {}
+        if self.repos_dir.exists():
+            for type_name in index.subdirs(self.repos_dir):
+                if type_name == ".git":
+                    continue
+                type_dir = self.repos_dir / type_name
+                files, size = index.totals(type_dir, exclude=frozenset({"manifest.json"}))
+                if files:
+                    synced[type_name] = {"files": files, "bytes": size,
+                                         "repos": len(index.subdirs(type_dir))}
+
+        objects, store_bytes = index.totals(self.store.root)
+        api_entries, _ = index.totals(self.api_cache.cache_dir, exclude=frozenset({"stats.json"}))
+        index.save()
+
+        pending = {}
+        root_files = self.get_root_files()
+        for filepath in root_files:
+            dest = self.get_destination(filepath) or "(no rule)"
+            pending[dest] = pending.get(dest, 0) + 1
+        self.features.save()
+
+        return {
+            "org": self.org,
+            "repo_root": str(self.repo_root),
+            "last_sync": self.state.last_sync,
+            "last_organize": self.state.last_organize,
+            "local": local,
+            "synced": synced,
+            "blob_store": {"objects": objects, "bytes": store_bytes},
+            "api_cache": dict(self.api_cache.load_stats(), entries=api_entries),
+            "feature_cache": {"files": self.features.entry_count()},
+            "pending": {"files": len(root_files), "by_destination": pending},
+            "index": {"directories": len(index.visited), "rescanned": index.rescanned},
+        }
+
+    def status(self, as_json: bool = False):
         """Show current status."""
+        report = self.status_report()
+        if as_json:
+            print(json.dumps(report, indent=2))
+            return
+
+        mb = 1024 * 1024
         print(f"\n{'─' * 50}")
         print("  haKCAssets Status")
         print(f"{'─' * 50}\n")
 
         print(f"  Organization: {self.org}")
         print(f"  Repo root: {self.repo_root}")
-        print(f"  Last sync: {self.state.last_sync or 'Never'}")
-        print(f"  Last organize: {self.state.last_organize or 'Never'}")
-
-        # Count local assets
-        counts = {}
-        for dir_name in ["art", "avatars", "banners", "tools"]:
-            dir_path = self.repo_root / dir_name
-            if dir_path.exists():
-                count = sum(1 for f in dir_path.rglob("*") if f.is_file())
-                if count:
-                    counts[dir_name] = count
+        print(f"  Last sync: {report['last_sync'] or 'Never'}")
+        print(f"  Last organize: {report['last_organize'] or 'Never'}")
 
-        if counts:
+        if report["local"]:
             print(f"\n  Local assets:")
-            for d, c in sorted(counts.items()):
-                print(f"    {d}/: {c} file(s)")
+            for d, info in sorted(report["local"].items()):
+                print(f"    {d}/: {info['files']} file(s), {info['bytes'] / mb:.1f} MB")
 
-        # Count synced assets by type
-        if self.repos_dir.exists():
+        if report["synced"]:
             print(f"\n  Synced assets (repos/):")
-            for type_dir in sorted(self.repos_dir.iterdir()):
-                if type_dir.is_dir() and type_dir.name not in [".git", "manifest.json"]:
-                    count = sum(1 for f in type_dir.rglob("*") if f.is_file() and f.name != "manifest.json")
-                    if count:
-                        repos = [d.name for d in type_dir.iterdir() if d.is_dir()]
-                        print(f"    {type_dir.name}/: {count} file(s) from {len(repos)} repo(s)")
-
-        # Check for files to organize
-        root_files = self.get_root_files()
-        if root_files:
-            print(f"\n  Pending: {len(root_files)} file(s) in root to organize")
-
-    def show_manifest(self, asset_type: str = None):
-        """Show manifest contents."""
-        if asset_type:
-            manifest_path = self.repos_dir / asset_type / "manifest.json"
-            if manifest_path.exists():
-                data = json.loads(manifest_path.read_text())
-                print(f"\n{asset_type}/ manifest ({data.get('count', 0)} assets):\n")
-                for filename, entry in data.get("assets", {}).items():
-                    print(f"  {entry['source_repo']}/{filename}")
+            for t, info in sorted(report["synced"].items()):
+                print(f"    {t}/: {info['files']} file(s) from {info['repos']} repo(s), {info['bytes'] / mb:.1f} MB")
+
+        store = report["blob_store"]
+        if store["objects"]:
+            print(f"\n  Blob store: {store['objects']} object(s), {store['bytes'] / mb:.1f} MB")
+
+        api = report["api_cache"]
+        if "last_run" in api:
+            last, totals = api.get("last_run", {}), api.get("totals", {})
+            print(f"\n  API cache ({api['entries']} cached response(s)):")
+            print(f"    Last scan ({last.get('at', '?')[:19]}): {last.get('hits', 0)} hit(s), {last.get('misses', 0)} miss(es)")
+            print(f"    All time: {totals.get('hits', 0)} hit(s), {totals.get('misses', 0)} miss(es)")
+
+        pending = report["pending"]
+        if pending["files"]:
+            print(f"\n  Pending: {pending['files']} file(s) in root to organize")
+            for dest, count in sorted(pending["by_destination"].items()):
+                print(f"    → {dest}: {count}")
+
+        if report["feature_cache"]["files"]:
+            print(f"\n  Feature cache: {report['feature_cache']['files']} file(s)")
+
+    def show_manifest(self, asset_type: str = None, repo: str = None, sha: str = None):
+        """Show manifest contents (by type, repo or blob sha, or the overview)."""
+        if asset_type or repo or sha:
+            if sha:
+                rows, title = self.manifest_store.by_sha(sha), f"sha {sha[:12]}"
+            elif repo:
+                rows, title = self.manifest_store.by_repo(repo), f"{repo}"
             else:
-                print(f"No manifest for {asset_type}/")
+                rows, title = self.manifest_store.entries(asset_type), f"{asset_type}/ manifest"
+            rows = [(t, e) for t, e in rows if not asset_type or t == asset_type]
+            if not rows:
+                print(f"No manifest entries for {title}")
+                return
+            print(f"\n{title} ({len(rows)} assets):\n")
+            for type_name, entry in rows:
+                prefix = "" if asset_type else f"{type_name}/"
+                print(f"  {prefix}{entry.source_repo}/{entry.filename}")
         else:
-            # Show master manifest
-            master_path = self._get_master_manifest_path()
-            if master_path.exists():
-                data = json.loads(master_path.read_text())
-                print(f"\nMaster Manifest ({data.get('total_assets', 0)} total assets):\n")
-
-                for type_name, type_data in data.get("types", {}).items():
-                    print(f"  {type_name}/: {type_data.get('count', 0)} assets")
-                    for repo, files in type_data.get("repos", {}).items():
-                        print(f"    └─ {repo}: {len(files)} file(s)")
+            counts = self.manifest_store.counts()
+            if not counts:
+                print("No manifest entries. Run sync first.")
+                return
+            total = sum(sum(repos.values()) for repos in counts.values())
+            print(f"\nMaster Manifest ({total} total assets):\n")
+            for type_name, repos in counts.items():
+                print(f"  {type_name}/: {sum(repos.values())} assets")
+                for repo_name, count in repos.items():
+                    print(f"    └─ {repo_name}: {count} file(s)")
+
+    def query(self, fmt: str = "jsonl", out=None, **filters) -> int:
+        """Stream manifest entries matching filters as JSON Lines or TSV; returns the count.
+
+        filters are ManifestStore.query's (asset_type, repo, glob, min_size,
+        max_size, since). Rows are written as they come off the index, so
+        output starts immediately and memory stays flat.
+        """
+        out = out or sys.stdout
+        if fmt == "tsv":
+            out.write("\t".join(QUERY_FIELDS) + "\n")
+        count = 0
+        for asset_type, entry in self.manifest_store.query(**filters):
+            row = {
+                "type": asset_type,
+                "repo": entry.source_repo,
+                "path": entry.source_path,
+                "filename": entry.filename,
+                "local_path": f"repos/{local_relpath(asset_type, entry)}",
+                "sha": entry.sha,
+                "size": entry.size,
+                "synced_at": entry.synced_at,
+                "blob": entry.blob,
+                "download_url": entry.download_url,
+            }
+            if fmt == "tsv":
+                out.write("\t".join(str(row[f]).replace("\t", " ").replace("\n", " ") for f in QUERY_FIELDS) + "\n")
             else:
-                print("No master manifest. Run sync first.")
+                out.write(json.dumps(row) + "\n")
+            count += 1
+        return count
+
+    # ─────────────────────────────────────────────────────────
+    #  Serve
+    # ─────────────────────────────────────────────────────────
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8787, cache_mb: int = 64, verbose: bool = False):
+        """Serve repos/ read-only over HTTP until interrupted."""
+        if not self._get_master_manifest_path().exists():
+            self._build_master_manifest()
+        server = AssetServer((host, port), self.repos_dir, self.manifest_store,
+                             cache_bytes=cache_mb * 1024 * 1024, verbose=verbose)
+        loaded = server.prefetch()
+        print(f"\nServing {self.repos_dir} on http://{host}:{server.server_port}/repos/ "
+              f"({loaded} file(s) prefetched, {server.cache.bytes / (1024 * 1024):.1f} MB). Ctrl+C to stop.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopped.")
+        finally:
+            server.server_close()
 
 
 def main():
@@ -763,15 +925,38 @@ Commands:
   list-repos    List all org repos
   scan          Scan repo(s) for assets
   manifest      Show manifest contents
+  query         Stream manifest entries as JSON Lines/TSV (--type/--repo/--glob/--min-size/--max-size/--since)
+  dedupe        Move synced files into the blob store (hardlink duplicates)
+  verify        Check synced files against manifest git blob shas
+  explain       Show which organize rule fires for PATH(s) and why
+  serve         Serve manifests and synced files over HTTP (ETag, Range, gzip)
         """
     )
     parser.add_argument("command", nargs="?", default="status",
-                        choices=["organize", "sync", "watch", "status", "list-repos", "scan", "manifest"])
+                        choices=["organize", "sync", "watch", "status", "list-repos", "scan", "manifest", "query",
+                                 "dedupe", "verify", "explain", "serve"])
+    parser.add_argument("paths", nargs="*", help="Files for the explain command")
     parser.add_argument("--apply", action="store_true", help="Actually make changes")
     parser.add_argument("--interactive", "-i", action="store_true", help="Ask before changes")
-    parser.add_argument("--interval", type=int, default=30, help="Watch interval (minutes)")
-    parser.add_argument("--repo", type=str, help="Specific repo to scan")
+    parser.add_argument("--resume", action="store_true", help="organize: finish an interrupted --apply")
+    parser.add_argument("--rollback", action="store_true", help="organize: undo an interrupted --apply")
+    parser.add_argument("--interval", type=int, default=30, help="Watch remote interval (minutes)")
+    parser.add_argument("--poll", type=float, default=2.0, help="Local poll interval (seconds) without inotify")
+    parser.add_argument("--jobs", "-j", type=int, default=4, help="Repos to scan concurrently (1 = serial)")
+    parser.add_argument("--source", choices=sorted(SOURCES), default="gh", help="Where to read org repos from")
+    parser.add_argument("--full", action="store_true", help="Rescan repos even if unchanged since last sync")
+    parser.add_argument("--repo", type=str, help="Specific repo to scan (manifest: assets from this repo)")
     parser.add_argument("--type", type=str, help="Asset type for manifest command")
+    parser.add_argument("--sha", type=str, help="manifest: assets with this git blob sha")
+    parser.add_argument("--glob", type=str, help="query: filename glob, or type/repo/name glob if it has a /")
+    parser.add_argument("--min-size", type=parse_size, help="query: smallest size (e.g. 512, 10K, 2M)")
+    parser.add_argument("--max-size", type=parse_size, help="query: largest size")
+    parser.add_argument("--since", type=str, help="query: synced at or after this ISO date/time")
+    parser.add_argument("--format", choices=["jsonl", "tsv"], default="jsonl", help="query: output format")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="serve: address to bind")
+    parser.add_argument("--port", type=int, default=8787, help="serve: port (0 = any free port)")
+    parser.add_argument("--cache-mb", type=int, default=64, help="serve: in-memory file cache size")
+    parser.add_argument("--json", action="store_true", help="status: machine-readable output")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
 
     args = parser.parse_args()
@@ -781,7 +966,20 @@ Commands:
     if not (repo_root / "asset_rules.json").exists():
         repo_root = Path.cwd()
 
-    manager = HaKCAssets(repo_root)
+    manager = HaKCAssets(repo_root, jobs=args.jobs, source=args.source)
+
+    if args.command == "status" and args.json:
+        manager.status(as_json=True)
+        return
+
+    if args.command == "query":
+        try:
+            manager.query(args.format, asset_type=args.type, repo=args.repo, glob=args.glob,
+                          min_size=args.min_size, max_size=args.max_size, since=args.since)
+        except BrokenPipeError:
+            # Reader went away (e.g. `| head`); don't let the interpreter complain on exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
 
     print(f"\n{'─' * 50}")
     print("  haKCAssets Manager")
@@ -790,6 +988,16 @@ Commands:
     if args.command == "status":
         manager.status()
 
+    elif args.command == "organize" and (args.resume or args.rollback):
+        if not manager.journal.pending():
+            print("\nNo interrupted organize to recover.")
+        elif args.rollback:
+            print("\nRolling back interrupted organize...\n")
+            print(f"\nUndid {manager.recover_organize(rollback=True)} move(s).")
+        else:
+            print("\nResuming interrupted organize...\n")
+            print(f"\nCompleted {manager.recover_organize()} remaining move(s).")
+
     elif args.command == "organize":
         print("\nOrganizing local files...\n")
         moves = manager.organize(dry_run=not args.apply, interactive=args.interactive)
@@ -798,23 +1006,33 @@ Commands:
 
     elif args.command == "sync":
         print(f"\nSyncing from {manager.org}...\n")
-        assets = manager.scan_all_repos(specific_repo=args.repo)
-        manager.sync(assets, dry_run=not args.apply)
+        try:
+            assets = manager.scan_all_repos(specific_repo=args.repo, full=args.full)
+            manager.sync(assets, dry_run=not args.apply)
+        finally:
+            manager.close()
         if not args.apply:
             print("\nRun with --apply to download assets.")
 
     elif args.command == "watch":
-        manager.watch(interval=args.interval)
+        manager.watch(interval=args.interval, poll=args.poll)
 
     elif args.command == "list-repos":
-        repos = manager.list_repos()
+        try:
+            repos = manager.list_repos()
+        except RequestFailed as e:
+            print(f"Could not list repos: {e}")
+            sys.exit(1)
         print(f"\n{len(repos)} repos in {manager.org}:\n")
         for r in repos:
             desc = (r.get("description") or "")[:40]
             print(f"  {r['name']:<35} {desc}")
 
     elif args.command == "scan":
-        assets = manager.scan_all_repos(specific_repo=args.repo)
+        try:
+            assets = manager.scan_all_repos(specific_repo=args.repo, full=True)
+        finally:
+            manager.close()
         print(f"\nFound {len(assets)} asset(s):\n")
 
         by_type = {}
@@ -831,7 +1049,34 @@ Commands:
                     print(f"    └─ {repo}: {len(repo_assets)}")
 
     elif args.command == "manifest":
-        manager.show_manifest(asset_type=args.type)
+        manager.show_manifest(asset_type=args.type, repo=args.repo, sha=args.sha)
+
+    elif args.command == "verify":
+        print("\nVerifying synced files...\n")
+        counts = manager.verify(requeue=args.apply)
+        print(f"\n  {counts['ok']} ok, {counts['mismatch']} mismatched, {counts['missing']} missing, "
+              f"{counts['unverifiable']} unverifiable ({counts['cached']} from stat cache)")
+        if counts["mismatch"] or counts["missing"]:
+            if args.apply:
+                print("\nRe-queued for the next sync.")
+            else:
+                print("\nRun with --apply to re-queue them for the next sync.")
+
+    elif args.command == "serve":
+        manager.serve(host=args.host, port=args.port, cache_mb=args.cache_mb, verbose=args.verbose)
+
+    elif args.command == "explain":
+        print()
+        for path in args.paths:
+            print(manager.explain(Path(path)))
+
+    elif args.command == "dedupe":
+        files, blobs, reclaim = manager.dedupe(dry_run=not args.apply)
+        verb = "Reclaimed" if args.apply else "Reclaimable"
+        print(f"\n{files} synced file(s), {blobs} unique blob(s)")
+        print(f"{verb}: {reclaim / (1024 * 1024):.1f} MB")
+        if not args.apply:
+            print("\nRun with --apply to link files into the blob store.")
 
 
 if __name__ == "__main__":
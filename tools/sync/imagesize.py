@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Image Size - Read image dimensions from header bytes only
+
+Replaces shelling out to macOS `sips` (a process per image, and (0, 0) on
+Linux). Supports PNG, GIF, JPEG, WebP, ICO and SVG; JPEG segments are
+skipped with seeks, so only a few hundred bytes are read per file.
+
+Usage:
+  python tools/sync/imagesize.py FILE...          # Print dimensions
+  python tools/sync/imagesize.py --bench FILE...  # Compare with sips
+"""
+
+import re
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SVG_HEAD_BYTES = 2048
+
+
+def _png(f, head: bytes) -> tuple:
+    if head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    return (0, 0)
+
+
+def _gif(f, head: bytes) -> tuple:
+    return struct.unpack("<HH", head[6:10])
+
+
+def _webp(f, head: bytes) -> tuple:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        w, h = struct.unpack("<HH", head[26:30])
+        return (w & 0x3FFF, h & 0x3FFF)
+    if chunk == b"VP8L" and head[20:21] == b"\x2f":
+        bits = int.from_bytes(head[21:25], "little")
+        return ((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b"VP8X":
+        return (int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1)
+    return (0, 0)
+
+
+def _ico(f, head: bytes) -> tuple:
+    count = struct.unpack("<H", head[4:6])[0]
+    f.seek(6)
+    entries = f.read(16 * min(count, 32))
+    best = (0, 0)
+    for i in range(0, len(entries) - 15, 16):
+        w = entries[i] or 256
+        h = entries[i + 1] or 256
+        if w * h > best[0] * best[1]:
+            best = (w, h)
+    return best
+
+
+def _jpeg(f, head: bytes) -> tuple:
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return (0, 0)
+        code = marker[1]
+        if code == 0xFF:
+            f.seek(-1, 1)  # fill byte
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue  # standalone markers
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return (0, 0)
+        length = struct.unpack(">H", length_bytes)[0]
+        # SOF0-SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            sof = f.read(5)
+            if len(sof) < 5:
+                return (0, 0)
+            h, w = struct.unpack(">HH", sof[1:5])
+            return (w, h)
+        if code == 0xDA:  # start of scan without a frame header
+            return (0, 0)
+        f.seek(length - 2, 1)
+
+
+def _svg_length(value: str) -> float:
+    match = re.match(r"\s*([0-9.]+)\s*(px)?\s*$", value or "")
+    return float(match.group(1)) if match else 0.0
+
+
+def _svg(f, head: bytes) -> tuple:
+    f.seek(0)
+    text = f.read(SVG_HEAD_BYTES).decode("utf-8", errors="ignore")
+    tag = re.search(r"<svg\b[^>]*>", text, re.IGNORECASE | re.DOTALL)
+    if not tag:
+        return (0, 0)
+    attrs = dict(re.findall(r'([\w:-]+)\s*=\s*["\']([^"\']*)["\']', tag.group(0)))
+    w, h = _svg_length(attrs.get("width")), _svg_length(attrs.get("height"))
+    if not (w and h) and "viewBox" in attrs:
+        parts = re.split(r"[\s,]+", attrs["viewBox"].strip())
+        if len(parts) == 4:
+            try:
+                w, h = float(parts[2]), float(parts[3])
+            except ValueError:
+                pass
+    return (int(round(w)), int(round(h)))
+
+
+def get_image_dimensions(filepath: Path) -> tuple:
+    """(width, height) from the file header, (0, 0) if unknown or unreadable."""
+    try:
+        with open(filepath, "rb") as f:
+            head = f.read(32)
+            if head.startswith(b"\x89PNG\r\n\x1a\n"):
+                return _png(f, head)
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return _gif(f, head)
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return _webp(f, head)
+            if head[:2] == b"\xff\xd8":
+                return _jpeg(f, head)
+            if head[:4] == b"\x00\x00\x01\x00":
+                return _ico(f, head)
+            if Path(filepath).suffix.lower() == ".svg" or b"<svg" in head or b"<?xml" in head:
+                return _svg(f, head)
+    except (OSError, struct.error):
+        pass
+    return (0, 0)
+
+
+def sips_dimensions(filepath: Path) -> tuple:
+    """The old subprocess path (macOS only), kept for benchmarking."""
+    result = subprocess.run(
+        ["sips", "-g", "pixelWidth", "-g", "pixelHeight", str(filepath)],
+        capture_output=True, text=True
+    )
+    w = h = 0
+    for line in result.stdout.strip().split('\n'):
+        if "pixelWidth" in line:
+            w = int(line.split()[-1])
+        elif "pixelHeight" in line:
+            h = int(line.split()[-1])
+    return (w, h)
+
+
+def main():
+    args = sys.argv[1:]
+    bench = "--bench" in args
+    files = [Path(a) for a in args if a != "--bench"]
+    if not files:
+        print(__doc__.strip())
+        return
+
+    start = time.perf_counter()
+    dims = [get_image_dimensions(p) for p in files]
+    elapsed = time.perf_counter() - start
+
+    for path, (w, h) in zip(files, dims):
+        print(f"  {w:>5} x {h:<5} {path}")
+
+    if bench:
+        print(f"\n  header parser: {len(files)} file(s) in {elapsed * 1000:.1f} ms")
+        try:
+            start = time.perf_counter()
+            sips = [sips_dimensions(p) for p in files]
+            elapsed = time.perf_counter() - start
+            mismatched = sum(1 for a, b in zip(dims, sips) if a != b)
+            print(f"  sips:          {len(files)} file(s) in {elapsed * 1000:.1f} ms ({mismatched} differ)")
+        except FileNotFoundError:
+            print("  sips:          not available on this platform")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Integrity - Fast git blob hashing of local files
+
+- Large files are hashed through mmap (no Python-level read loop)
+- Hashing fans out over a process pool, one worker per core
+- A stat cache (size + mtime_ns) skips files unchanged since the last run,
+  so repeat verifications only cost a stat per file
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from persist import write_json
+
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+
+def hash_path(path: str) -> Optional[str]:
+    """Git blob sha of a file (`blob <size>\\0` + content), None if unreadable."""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            h = hashlib.sha1(b"blob %d\0" % size)
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    h.update(m)
+            elif size:
+                h.update(f.read())
+            return h.hexdigest()
+    except OSError:
+        return None
+
+
+class HashCache:
+    """Persisted {path: [size, mtime_ns, sha]} so unchanged files aren't re-read."""
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self.entries: dict[str, list] = {}
+        self.dirty = False
+        try:
+            self.entries = json.loads(cache_file.read_text())
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, path: str, st: os.stat_result) -> Optional[str]:
+        """Cached sha if size and mtime still match."""
+        entry = self.entries.get(path)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def store(self, path: str, st: os.stat_result, sha: str):
+        """Remember a freshly computed sha."""
+        self.entries[path] = [st.st_size, st.st_mtime_ns, sha]
+        self.dirty = True
+
+    def save(self):
+        """Write the cache back if anything changed."""
+        if self.dirty:
+            write_json(self.cache_file, self.entries, indent=None, keep_previous=False)
+            self.dirty = False
+
+
+def hash_files(paths: list, cache: HashCache = None, workers: int = None) -> tuple:
+    """Git blob shas for paths, using the stat cache and a process pool.
+
+    Returns ({path: sha or None}, cached_count). Missing files map to None.
+    """
+    shas = {}
+    todo = []
+    for path in map(str, paths):
+        try:
+            st = os.stat(path)
+        except OSError:
+            shas[path] = None
+            continue
+        sha = cache.lookup(path, st) if cache else None
+        if sha:
+            shas[path] = sha
+        else:
+            todo.append((path, st))
+    cached = len(shas) - sum(1 for v in shas.values() if v is None)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(todo) < 2:
+        computed = [hash_path(p) for p, _ in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            computed = list(pool.map(hash_path, [p for p, _ in todo], chunksize=4))
+
+    for (path, st), sha in zip(todo, computed):
+        shas[path] = sha
+        if cache and sha:
+            cache.store(path, st, sha)
+
+    return shas, cached
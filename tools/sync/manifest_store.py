@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Manifest Store - Indexed SQLite record of synced assets
+
+One table in .hakc_cache/manifest.db keyed by (asset_type, source_repo,
+source_path), so two repos shipping the same filename into a type no longer
+overwrite each other. Each row's local file is repos/{type}/{repo}/{filename}
+(the sync layout's relpath), which is unique too: the scan gives same-named
+files in one repo distinct filenames, and a row taking over a local path
+replaces the one that held it. sha and repo lookups ("all assets from repo
+X", "which repos share blob Y") hit their own indexes; per-type lookups use
+the primary key's leading column.
+
+The repos/{type}/manifest.json files are exports of this table. On first
+use, entries from existing JSON manifests are imported.
+"""
+
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from persist import read_json, write_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    asset_type   TEXT NOT NULL,
+    source_repo  TEXT NOT NULL,
+    source_path  TEXT NOT NULL,
+    filename     TEXT NOT NULL,
+    sha          TEXT NOT NULL,
+    size         INTEGER NOT NULL,
+    synced_at    TEXT NOT NULL,
+    download_url TEXT NOT NULL,
+    blob         TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (asset_type, source_repo, source_path)
+);
+CREATE INDEX IF NOT EXISTS assets_sha ON assets (sha);
+CREATE INDEX IF NOT EXISTS assets_repo ON assets (source_repo);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class AssetEntry:
+    """Entry in a manifest."""
+    filename: str
+    source_repo: str
+    source_path: str
+    sha: str
+    size: int
+    synced_at: str
+    download_url: str
+    blob: str = ""  # git blob sha of the stored object (.hakc_cache/objects)
+
+
+ENTRY_COLUMNS = ", ".join(f.name for f in fields(AssetEntry))
+
+
+def type_first_relpath(asset_type: str, repo: str, name: str) -> str:
+    """Path under repos/ in the type-first layout (sync_core's TypeFirstLayout)."""
+    return f"{asset_type}/{repo}/{name}"
+
+
+def local_relpath(asset_type: str, entry: AssetEntry) -> str:
+    """Where an entry's file lives under repos/."""
+    return type_first_relpath(asset_type, entry.source_repo, entry.filename)
+
+
+def export_key(asset_type: str, entry: AssetEntry) -> str:
+    """An entry's key in a type's manifest.json: its path under the type dir."""
+    return local_relpath(asset_type, entry).split("/", 1)[1]
+
+
+class ManifestStore:
+    """SQLite table of AssetEntry rows per asset type.
+
+    Writes are batched until commit(). legacy_dir is the repos/ directory
+    whose JSON manifests seed an empty store.
+    """
+
+    def __init__(self, db_file: Path, legacy_dir: Path = None):
+        self.db_file = db_file
+        self.legacy_dir = legacy_dir
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self.dirty = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            # watch syncs on a worker thread
+            self._db = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            self._unique_local_paths()
+            if not self._db.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone():
+                self._import_legacy()
+        return self._db
+
+    def _unique_local_paths(self):
+        """Enforce one row per local path, dropping older rows that shared one.
+
+        Stores written before same-named files got distinct names can hold
+        several rows per repos/{type}/{repo}/{filename}; the most recently
+        synced one owns the file, and the others come back, renamed, on the
+        next scan.
+        """
+        if self._db.execute("SELECT 1 FROM sqlite_master WHERE name = 'assets_local'").fetchone():
+            return
+        self._db.execute("""
+            DELETE FROM assets WHERE EXISTS (
+                SELECT 1 FROM assets AS newer
+                WHERE newer.asset_type = assets.asset_type AND newer.source_repo = assets.source_repo
+                  AND newer.filename = assets.filename
+                  AND (newer.synced_at > assets.synced_at
+                       OR (newer.synced_at = assets.synced_at AND newer.rowid > assets.rowid)))""")
+        self._db.execute("CREATE UNIQUE INDEX assets_local ON assets (asset_type, source_repo, filename)")
+        self._db.commit()
+
+    def _import_legacy(self):
+        """Seed the table from repos/{type}/manifest.json (run once)."""
+        known = {f.name for f in fields(AssetEntry)}
+        if self.legacy_dir and self.legacy_dir.is_dir():
+            for path in sorted(self.legacy_dir.glob("*/manifest.json")):
+                manifest = read_json(path, {}, validate=lambda d: isinstance(d, dict))
+                for data in manifest.get("assets", {}).values():
+                    try:
+                        entry = AssetEntry(**{k: v for k, v in data.items() if k in known})
+                    except TypeError:
+                        continue
+                    self._put(path.parent.name, entry)
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('imported', ?)",
+                         (datetime.now().isoformat(),))
+        self._db.commit()
+
+    def _rows(self, where: str = "", params: tuple = ()) -> list:
+        """[(asset_type, AssetEntry)] matching a WHERE clause."""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT asset_type, {ENTRY_COLUMNS} FROM assets {where} "
+                "ORDER BY asset_type, source_repo, source_path", params).fetchall()
+        return [(row[0], AssetEntry(*row[1:])) for row in rows]
+
+    def _put(self, asset_type: str, entry: AssetEntry):
+        values = asdict(entry)
+        self._db.execute(
+            f"INSERT OR REPLACE INTO assets (asset_type, {ENTRY_COLUMNS}) "
+            f"VALUES (?, {', '.join('?' * len(values))})", (asset_type, *values.values()))
+
+    def get(self, asset_type: str, repo: str, path: str) -> Optional[AssetEntry]:
+        """Entry by its key."""
+        rows = self._rows("WHERE asset_type = ? AND source_repo = ? AND source_path = ?",
+                          (asset_type, repo, path))
+        return rows[0][1] if rows else None
+
+    def put(self, asset_type: str, entry: AssetEntry) -> Optional[AssetEntry]:
+        """Insert or replace an entry; returns the one it replaced.
+
+        That is the entry with the same key or, failing that, the one that
+        held the same local path (INSERT OR REPLACE drops both).
+        """
+        with self._lock:
+            previous = (self.get(asset_type, entry.source_repo, entry.source_path)
+                        or self.at_path(local_relpath(asset_type, entry)))
+            self._put(asset_type, entry)
+            self.dirty = True
+        return previous
+
+    def remove(self, asset_type: str, repo: str, path: str):
+        """Drop an entry."""
+        with self._lock:
+            self._connect().execute(
+                "DELETE FROM assets WHERE asset_type = ? AND source_repo = ? AND source_path = ?",
+                (asset_type, repo, path))
+            self.dirty = True
+
+    def entries(self, asset_type: str = None) -> list:
+        """[(asset_type, entry)] for one type, or everything."""
+        if asset_type is None:
+            return self._rows()
+        return self._rows("WHERE asset_type = ?", (asset_type,))
+
+    def at_path(self, relpath: str) -> Optional[AssetEntry]:
+        """Entry whose local file is relpath (under repos/), if any."""
+        parts = relpath.split("/")
+        if len(parts) != 3:
+            return None
+        rows = self._rows("WHERE asset_type = ? AND source_repo = ? AND filename = ?", tuple(parts))
+        return rows[0][1] if rows else None
+
+    def by_repo(self, repo: str) -> list:
+        """[(asset_type, entry)] synced from a repo."""
+        return self._rows("WHERE source_repo = ?", (repo,))
+
+    def by_sha(self, sha: str) -> list:
+        """[(asset_type, entry)] with a given git blob sha, across repos."""
+        return self._rows("WHERE sha = ?", (sha,))
+
+    def query(self, asset_type: str = None, repo: str = None, glob: str = None,
+              min_size: int = None, max_size: int = None, since: str = None,
+              batch: int = 500) -> Iterator[tuple]:
+        """Stream (asset_type, entry) rows matching every given filter.
+
+        glob matches the filename, or the path under repos/ ({type}/{repo}/
+        {filename}) when it contains a "/". since compares against synced_at
+        (ISO 8601, so a date prefix like "2026-10-01" works). Type and repo
+        filters go through the indexes; rows are fetched in batches.
+        """
+        clauses, params = [], []
+        for clause, value in (("asset_type = ?", asset_type), ("source_repo = ?", repo),
+                              ("size >= ?", min_size), ("size <= ?", max_size),
+                              ("synced_at >= ?", since)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if glob:
+            target = "asset_type || '/' || source_repo || '/' || filename" if "/" in glob else "filename"
+            clauses.append(f"{target} GLOB ?")
+            params.append(glob)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            cursor = self._connect().execute(
+                f"SELECT asset_type, {ENTRY_COLUMNS} FROM assets {where} "
+                "ORDER BY asset_type, source_repo, source_path", params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch)
+            if not rows:
+                return
+            for row in rows:
+                yield row[0], AssetEntry(*row[1:])
+
+    def counts(self) -> dict:
+        """{asset_type: {repo: entry count}}."""
+        counts = {}
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT asset_type, source_repo, COUNT(*) FROM assets "
+                "GROUP BY asset_type, source_repo ORDER BY asset_type, source_repo")
+            for asset_type, repo, count in rows:
+                counts.setdefault(asset_type, {})[repo] = count
+        return counts
+
+    def commit(self):
+        """Commit batched writes."""
+        with self._lock:
+            if self.dirty and self._db is not None:
+                self._db.commit()
+                self.dirty = False
+
+    def export(self, asset_type: str, path: Path):
+        """Write a type's entries as manifest.json."""
+        entries = [entry for _, entry in self.entries(asset_type)]
+        write_json(path, {
+            "generated": datetime.now().isoformat(),
+            "count": len(entries),
+            "assets": {export_key(asset_type, e): asdict(e) for e in entries},
+        })
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Move Journal - Crash-safe batch moves for organize --apply
+
+A batch is planned up front (collisions are rejected before anything
+moves), written to .hakc_cache/organize.journal and fsynced, then executed
+one move at a time with a "done" record appended after each. If the run
+dies part way, the journal is still there on restart and the batch can be
+resumed (finish the remaining moves) or rolled back (undo the done ones).
+
+Moves are os.rename where possible; across filesystems the file is copied
+to a temp name beside the destination, fsynced, renamed into place and
+only then unlinked from the source. A crash between those last two steps
+leaves identical files at both ends; resume and rollback recognise that
+and finish (or undo) the move by dropping the redundant copy.
+"""
+
+import errno
+import json
+import os
+import shutil
+from pathlib import Path
+
+from integrity import hash_path
+from persist import fsync_dir
+
+
+def move_file(src: Path, dest: Path) -> str:
+    """Durably move src to dest. Returns "renamed" or "copied"."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.rename(src, dest)
+        fsync_dir(dest.parent)
+        return "renamed"
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    tmp = dest.parent / f".{dest.name}.{os.getpid()}.moving"
+    with open(src, "rb") as s, open(tmp, "wb") as d:
+        shutil.copyfileobj(s, d, 1024 * 1024)
+        d.flush()
+        os.fsync(d.fileno())
+    shutil.copystat(src, tmp)
+    os.replace(tmp, dest)
+    fsync_dir(dest.parent)
+    os.unlink(src)
+    fsync_dir(src.parent)
+    return "copied"
+
+
+def _same_content(a: Path, b: Path) -> bool:
+    """Whether two existing files hold the same bytes."""
+    try:
+        if os.path.samefile(a, b):
+            return True
+        if a.stat().st_size != b.stat().st_size:
+            return False
+    except OSError:
+        return False
+    sha = hash_path(str(a))
+    return sha is not None and sha == hash_path(str(b))
+
+
+def _drop_copy(path: Path):
+    """Remove the redundant end of a move that landed but wasn't cleaned up."""
+    os.unlink(path)
+    fsync_dir(path.parent)
+
+
+def plan_moves(candidates: list) -> tuple:
+    """Split [(src, dest)] into (moves, collisions).
+
+    A move collides when its destination already exists or another move in
+    the same batch targets it; colliding moves are left out of the plan.
+    """
+    moves, collisions = [], []
+    claimed = set()
+    for src, dest in candidates:
+        if dest.exists() or dest in claimed:
+            collisions.append((src, dest))
+        else:
+            claimed.add(dest)
+            moves.append((src, dest))
+    return moves, collisions
+
+
+class MoveJournal:
+    """Append-only journal: one plan line, then one line per finished move."""
+
+    def __init__(self, path: Path, root: Path):
+        self.path = path
+        self.root = root
+
+    def pending(self) -> bool:
+        """Whether an interrupted batch is waiting to be resumed or rolled back."""
+        return self.path.exists()
+
+    def _rel(self, p: Path) -> str:
+        return str(Path(p).relative_to(self.root))
+
+    def _append(self, f, record: dict):
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _read(self) -> tuple:
+        """(moves, done indexes) from the journal."""
+        moves, done = [], set()
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn final line from a crash mid-append
+                if "plan" in record:
+                    moves = [(self.root / s, self.root / d) for s, d in record["plan"]]
+                elif "done" in record:
+                    done.add(record["done"])
+        return moves, done
+
+    def execute(self, moves: list, on_move=None):
+        """Journal and run a planned batch, calling on_move(src, dest, how) per move."""
+        if not moves:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            self._append(f, {"plan": [[self._rel(s), self._rel(d)] for s, d in moves]})
+            fsync_dir(self.path.parent)
+            for i, (src, dest) in enumerate(moves):
+                how = move_file(src, dest)
+                self._append(f, {"done": i})
+                if on_move:
+                    on_move(src, dest, how)
+        self.path.unlink()
+
+    def resume(self, on_move=None) -> int:
+        """Finish an interrupted batch. Returns the number of moves completed now."""
+        moves, done = self._read()
+        completed = 0
+        with open(self.path, "a") as f:
+            for i, (src, dest) in enumerate(moves):
+                if i in done:
+                    continue
+                # Crash between the rename and its "done" record
+                if dest.exists() and not src.exists():
+                    self._append(f, {"done": i})
+                    continue
+                # Cross-device copy landed but the source wasn't unlinked yet
+                if dest.exists() and src.exists() and _same_content(src, dest):
+                    _drop_copy(src)
+                    self._append(f, {"done": i})
+                    continue
+                if src.exists() and not dest.exists():
+                    how = move_file(src, dest)
+                    self._append(f, {"done": i})
+                    completed += 1
+                    if on_move:
+                        on_move(src, dest, how)
+        self.path.unlink()
+        return completed
+
+    def rollback(self, on_move=None) -> int:
+        """Undo the moves an interrupted batch made. Returns the number undone."""
+        moves, _ = self._read()
+        undone = 0
+        for src, dest in reversed(moves):
+            # Also undo a move that landed without its "done" record
+            if dest.exists() and not src.exists():
+                how = move_file(dest, src)
+                undone += 1
+                if on_move:
+                    on_move(dest, src, how)
+            # A cross-device copy (either way) stopped before unlinking its source
+            elif dest.exists() and src.exists() and _same_content(src, dest):
+                _drop_copy(dest)
+                undone += 1
+        self.path.unlink()
+        return undone
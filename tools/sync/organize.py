@@ -8,21 +8,23 @@ Usage:
   python tools/organize.py --check         # Check for misplaced files (extension-based)
   python tools/organize.py --check --strict # Check using full ruleset
   python tools/organize.py --interactive   # Ask before each move
+  python tools/organize.py --resume        # Finish an interrupted --apply
+  python tools/organize.py --rollback      # Undo an interrupted --apply
+  python tools/organize.py --explain FILE  # Show which rule fires and why
 """
 
 import json
 import os
 import sys
-import shutil
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 
-# ASCII art detection characters
-ASCII_ART_CHARS = set("█▓▒░╔╗╚╝║═│─┌┐└┘├┤┬┴┼╭╮╯╰▀▄▌▐■□▪▫●○◆◇★☆")
-
-# ANSI escape detection
-ANSI_PATTERN = "\x1b["
+sys.path.insert(0, str(Path(__file__).parent))
+from feature_cache import FeatureCache
+from move_journal import MoveJournal, plan_moves
+from rules import FileFeatures, RuleSet, classify, format_explain, init_worker
 
 
 class AssetOrganizer:
@@ -30,6 +32,9 @@ class AssetOrganizer:
         self.repo_root = repo_root
         self.rules_file = repo_root / "asset_rules.json"
         self.rules = self._load_rules()
+        self.ruleset = RuleSet(self.rules.get("rules", []))
+        self.features = FeatureCache(repo_root / ".hakc_cache" / "features.db")
+        self.journal = MoveJournal(repo_root / ".hakc_cache" / "organize.journal", repo_root)
 
     def _load_rules(self) -> dict:
         """Load rules from JSON file."""
@@ -39,55 +44,6 @@ class AssetOrganizer:
         with open(self.rules_file) as f:
             return json.load(f)
 
-    def _get_image_dimensions(self, filepath: Path) -> tuple[int, int]:
-        """Get image dimensions using sips (macOS) or file inspection."""
-        try:
-            import subprocess
-            result = subprocess.run(
-                ["sips", "-g", "pixelWidth", "-g", "pixelHeight", str(filepath)],
-                capture_output=True, text=True
-            )
-            lines = result.stdout.strip().split('\n')
-            width = height = 0
-            for line in lines:
-                if "pixelWidth" in line:
-                    width = int(line.split()[-1])
-                elif "pixelHeight" in line:
-                    height = int(line.split()[-1])
-            return (width, height)
-        except Exception:
-            return (0, 0)
-
-    def _is_square(self, filepath: Path) -> bool:
-        """Check if image is square (1:1 aspect ratio)."""
-        w, h = self._get_image_dimensions(filepath)
-        if w == 0 or h == 0:
-            return False
-        ratio = w / h
-        return 0.9 <= ratio <= 1.1  # Allow 10% tolerance
-
-    def _get_max_dimension(self, filepath: Path) -> int:
-        """Get the larger dimension of an image."""
-        w, h = self._get_image_dimensions(filepath)
-        return max(w, h)
-
-    def _contains_ascii_art(self, filepath: Path) -> bool:
-        """Check if text file contains ASCII/ANSI art characters."""
-        try:
-            content = filepath.read_text(encoding='utf-8', errors='ignore')
-            # Check for ANSI escapes
-            if ANSI_PATTERN in content:
-                return True
-            # Check for ASCII art characters
-            return bool(ASCII_ART_CHARS & set(content))
-        except Exception:
-            return False
-
-    def _name_contains(self, filepath: Path, patterns: list[str]) -> bool:
-        """Check if filename contains any of the patterns."""
-        name_lower = filepath.stem.lower()
-        return any(p.lower() in name_lower for p in patterns)
-
     def _should_ignore(self, filepath: Path) -> bool:
         """Check if file should be ignored."""
         name = filepath.name
@@ -99,51 +55,24 @@ class AssetOrganizer:
                 return True
         return False
 
-    def _match_rule(self, filepath: Path, rule: dict) -> bool:
-        """Check if a file matches a rule."""
-        match = rule.get("match", {})
-        ext = filepath.suffix.lower()
-
-        # Check extension
-        if "extensions" in match:
-            if ext not in match["extensions"]:
-                return False
-
-        # Check aspect ratio
-        if "aspect_ratio" in match:
-            if match["aspect_ratio"] == "square" and not self._is_square(filepath):
-                return False
-
-        # Check max dimension
-        if "max_dimension" in match:
-            if self._get_max_dimension(filepath) > match["max_dimension"]:
-                return False
-
-        # Check name contains
-        if "name_contains" in match:
-            if not self._name_contains(filepath, match["name_contains"]):
-                return False
-
-        # Check content contains (for text files)
-        if "content_contains" in match:
-            if not self._contains_ascii_art(filepath):
-                return False
-
-        return True
-
     def get_destination(self, filepath: Path) -> Optional[str]:
         """Determine destination directory for a file based on rules."""
         if self._should_ignore(filepath):
             return None
-
-        # Sort rules by priority
-        sorted_rules = sorted(self.rules.get("rules", []), key=lambda r: r.get("priority", 99))
-
-        for rule in sorted_rules:
-            if self._match_rule(filepath, rule):
-                return rule.get("destination")
-
-        return None
+        features = self.features.features(filepath)
+        destination = self.ruleset.destination(features)
+        self.features.remember(features)
+        return destination
+
+    def explain(self, filepath: Path) -> str:
+        """Show which rule fires for a file and why."""
+        if filepath.is_relative_to(self.repo_root) and self._should_ignore(filepath):
+            return f"  {filepath}\n    ignored by asset_rules.json"
+        features = self.features.features(filepath)
+        trace = self.ruleset.explain(features)
+        self.features.remember(features)
+        self.features.save()
+        return format_explain(filepath, trace)
 
     def get_root_files(self) -> list[Path]:
         """Get all files in repo root (not in subdirectories)."""
@@ -153,64 +82,129 @@ class AssetOrganizer:
                 files.append(item)
         return files
 
-    def check_misplaced(self, strict: bool = False) -> list[tuple[Path, str, str]]:
-        """Check for files that might be in the wrong directory.
-
-        In normal mode, only checks if file extension matches directory purpose.
-        In strict mode, re-runs all rules to suggest better placement.
-        """
-        misplaced = []
-
+    def _walk(self, dir_path: Path):
+        """Files under dir_path at any depth, skipping ignored entries."""
+        for root, dirs, files in os.walk(dir_path):
+            base = Path(root)
+            dirs[:] = sorted(d for d in dirs if not self._should_ignore(base / d))
+            for name in sorted(files):
+                filepath = base / name
+                if not self._should_ignore(filepath):
+                    yield filepath
+
+    def _check_candidates(self, strict: bool):
+        """(filepath, directory) pairs whose placement needs the rules."""
         for dir_name, dir_info in self.rules.get("directories", {}).items():
             dir_path = self.repo_root / dir_name
             if not dir_path.exists():
                 continue
 
             allowed_exts = dir_info.get("extensions", [])
+            if "*" in allowed_exts:
+                continue  # Laid out by sync (e.g. repos/), not by the rules
+
+            for filepath in self._walk(dir_path):
+                # Normal mode only asks the rules about unexpected extensions
+                if strict or (allowed_exts and filepath.suffix.lower() not in allowed_exts):
+                    yield filepath, dir_name
 
-            for filepath in dir_path.iterdir():
-                if filepath.is_file() and not self._should_ignore(filepath):
-                    ext = filepath.suffix.lower()
-
-                    if strict:
-                        # Re-run all rules to check placement
-                        suggested = self.get_destination(filepath)
-                        if suggested and suggested != dir_name:
-                            misplaced.append((filepath, dir_name, suggested))
-                    else:
-                        # Just check if extension is valid for this directory
-                        if allowed_exts and ext not in allowed_exts:
-                            # Find where it should go
-                            suggested = self.get_destination(filepath)
-                            if suggested:
-                                misplaced.append((filepath, dir_name, suggested))
-
-        return misplaced
+    def iter_misplaced(self, strict: bool = False, workers: int = None):
+        """Yield (filepath, current dir, suggested dir) as each result arrives.
+
+        Files unchanged since the feature cache saw them are decided
+        in-process from cached features; the rest are probed across a
+        process pool.
+        """
+        cache = self.features
+
+        def flagged(suggested: Optional[str], dir_name: str) -> bool:
+            return bool(suggested) and (not strict or suggested != dir_name)
+
+        pending = []
+        try:
+            for filepath, dir_name in self._check_candidates(strict):
+                try:
+                    st = filepath.stat()
+                except OSError:
+                    continue
+                cached = cache.lookup(str(filepath), st)
+                if cached is None:
+                    pending.append((filepath, dir_name, st))
+                    continue
+                features = FileFeatures(filepath, cached, st)
+                suggested = self.ruleset.destination(features)
+                cache.store(str(filepath), st, features.export())
+                if flagged(suggested, dir_name):
+                    yield filepath, dir_name, suggested
+
+            workers = workers or os.cpu_count() or 1
+            if workers == 1 or len(pending) < 2:
+                for filepath, dir_name, st in pending:
+                    features = FileFeatures(filepath, st=st)
+                    suggested = self.ruleset.destination(features)
+                    cache.store(str(filepath), st, features.export())
+                    if flagged(suggested, dir_name):
+                        yield filepath, dir_name, suggested
+                return
+
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=init_worker,
+                                     initargs=(self.rules.get("rules", []),)) as pool:
+                futures = {pool.submit(classify, str(fp)): (fp, dir_name, st) for fp, dir_name, st in pending}
+                for future in as_completed(futures):
+                    filepath, dir_name, st = futures[future]
+                    _, suggested, features = future.result()
+                    cache.store(str(filepath), st, features)
+                    if flagged(suggested, dir_name):
+                        yield filepath, dir_name, suggested
+        finally:
+            cache.save()
+
+    def check_misplaced(self, strict: bool = False, workers: int = None) -> list[tuple[Path, str, str]]:
+        """Check for files that might be in the wrong directory.
+
+        In normal mode, only checks if file extension matches directory purpose.
+        In strict mode, re-runs all rules to suggest better placement.
+        """
+        return list(self.iter_misplaced(strict, workers))
+
+    def _print_move(self, src: Path, dest: Path, how: str):
+        """on_move callback for journaled moves."""
+        print(f"  Moved: {src.name} → {dest.parent.relative_to(self.repo_root)}/")
 
     def organize(self, dry_run: bool = True, interactive: bool = False) -> list[tuple[Path, Path]]:
-        """Organize files in repo root to appropriate directories."""
-        moves = []
+        """Organize files in repo root to appropriate directories.
 
+        The whole batch is planned first, so name collisions at the
+        destination are skipped up front rather than overwritten, and then
+        run through the move journal so an interrupted run can be resumed
+        or rolled back.
+        """
+        if not dry_run and self.journal.pending():
+            print("  An interrupted organize was found. Run with --resume or --rollback first.")
+            return []
+
+        candidates = []
         for filepath in self.get_root_files():
             dest_dir = self.get_destination(filepath)
             if dest_dir:
-                dest_path = self.repo_root / dest_dir / filepath.name
-
                 if interactive:
                     response = input(f"Move {filepath.name} → {dest_dir}/? [y/N] ").strip().lower()
                     if response != 'y':
                         print(f"  Skipped: {filepath.name}")
                         continue
 
-                if dry_run:
-                    print(f"  Would move: {filepath.name} → {dest_dir}/")
-                else:
-                    # Create directory if needed
-                    dest_path.parent.mkdir(exist_ok=True)
-                    shutil.move(str(filepath), str(dest_path))
-                    print(f"  Moved: {filepath.name} → {dest_dir}/")
+                candidates.append((filepath, self.repo_root / dest_dir / filepath.name))
+        self.features.save()
 
-                moves.append((filepath, dest_path))
+        moves, collisions = plan_moves(candidates)
+        for src, dest in collisions:
+            print(f"  Collision: {dest.relative_to(self.repo_root)} already exists, skipping {src.name}")
+
+        if dry_run:
+            for src, dest in moves:
+                print(f"  Would move: {src.name} → {dest.parent.relative_to(self.repo_root)}/")
+        else:
+            self.journal.execute(moves, on_move=self._print_move)
 
         return moves
 
@@ -221,6 +215,10 @@ def main():
     parser.add_argument("--check", action="store_true", help="Check for misplaced files in subdirectories")
     parser.add_argument("--strict", action="store_true", help="Strict mode: re-run all rules on existing files")
     parser.add_argument("--interactive", "-i", action="store_true", help="Ask before each move")
+    parser.add_argument("--resume", action="store_true", help="Finish an interrupted --apply from its journal")
+    parser.add_argument("--rollback", action="store_true", help="Undo an interrupted --apply from its journal")
+    parser.add_argument("--jobs", "-j", type=int, help="Worker processes for --check (default: one per core)")
+    parser.add_argument("--explain", nargs="+", metavar="PATH", help="Show which rule matches each file and why")
     args = parser.parse_args()
 
     # Find repo root (where asset_rules.json is)
@@ -234,18 +232,37 @@ def main():
     print("  haKCAssets Organizer")
     print(f"{'─' * 50}\n")
 
+    if args.explain:
+        for path in args.explain:
+            print(organizer.explain(Path(path).resolve()))
+        return
+
     if args.check:
         mode = "strict" if args.strict else "normal"
         print(f"Checking for misplaced files ({mode} mode)...\n")
-        misplaced = organizer.check_misplaced(strict=args.strict)
-        if misplaced:
-            print("Potentially misplaced files:")
-            for filepath, current, suggested in misplaced:
-                print(f"  {filepath.name}: {current}/ → {suggested}/?")
-        else:
+        found = 0
+        for filepath, current, suggested in organizer.iter_misplaced(strict=args.strict, workers=args.jobs):
+            if not found:
+                print("Potentially misplaced files:")
+            found += 1
+            print(f"  {filepath.relative_to(organizer.repo_root)}: {current}/ → {suggested}/?", flush=True)
+        if not found:
             print("All files appear to be in correct directories.")
         return
 
+    if args.resume or args.rollback:
+        if not organizer.journal.pending():
+            print("No interrupted organize to recover.")
+        elif args.resume:
+            print("Resuming interrupted organize...\n")
+            done = organizer.journal.resume(on_move=organizer._print_move)
+            print(f"\nCompleted {done} remaining move(s).")
+        else:
+            print("Rolling back interrupted organize...\n")
+            undone = organizer.journal.rollback(on_move=organizer._print_move)
+            print(f"\nUndid {undone} move(s).")
+        return
+
     root_files = organizer.get_root_files()
 
     if not root_files:
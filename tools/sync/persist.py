@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Persist - Crash-safe JSON files with one previous generation
+
+write_json() writes to a temp file in the same directory, fsyncs it, keeps
+the current file as `.{name}.prev` (a hardlink, so the live name never goes
+missing) and renames the new file into place, then fsyncs the directory.
+A kill at any point leaves either the old or the new file, never a
+truncated one.
+
+read_json() falls back to the .prev generation when the file is missing or
+doesn't parse, so a damaged sync state costs one generation of changes
+rather than a full resync.
+
+Caches that can simply be rebuilt pass keep_previous=False, and
+durable=False to skip the fsyncs: the rename still keeps them whole.
+"""
+
+import json
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+def previous_path(path: Path) -> Path:
+    """Where the previous generation of path is kept (hidden from scans)."""
+    return path.with_name(f".{path.name.lstrip('.')}.prev")
+
+
+def fsync_dir(path: Path):
+    """Make renames and unlinks in a directory durable (best effort)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_text(path: Path, text: str, keep_previous: bool = True, durable: bool = True):
+    """Atomically replace path with text, keeping the old file as .prev.
+
+    durable=False skips the fsyncs (the replace is still atomic).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+
+        if keep_previous and path.exists():
+            prev = previous_path(path)
+            prev_tmp = prev.with_name(prev.name + ".tmp")
+            prev_tmp.unlink(missing_ok=True)
+            try:
+                os.link(path, prev_tmp)
+            except OSError:
+                shutil.copy2(path, prev_tmp)
+            os.replace(prev_tmp, prev)
+
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    if durable:
+        fsync_dir(path.parent)
+
+
+def write_json(path: Path, data: Any, indent: Optional[int] = 2, keep_previous: bool = True,
+               durable: bool = True):
+    """Atomically write data as JSON (see write_text)."""
+    write_text(path, json.dumps(data, indent=indent), keep_previous, durable)
+
+
+def read_json(path: Path, default: Any = None, validate: Callable[[Any], bool] = None) -> Any:
+    """Parse path, falling back to its previous generation.
+
+    validate can reject parseable but unusable content. Returns default when
+    neither generation is usable.
+    """
+    for candidate in (path, previous_path(path)):
+        try:
+            data = json.loads(candidate.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if validate and not validate(data):
+            continue
+        if candidate != path and path.exists():
+            print(f"Warning: {path.name} is unreadable; using its previous copy", file=sys.stderr)
+        return data
+    return default
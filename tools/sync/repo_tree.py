@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Repo Tree - Whole-repo listings via the git trees API
+
+One `repos/{org}/{repo}/git/trees/HEAD?recursive=1` call returns every path
+in a repo, so asset discovery is filtered locally instead of walking the
+contents API one directory at a time. Shared by hakc_assets.py and
+sync_org.py.
+"""
+
+import base64
+import json
+from typing import Optional
+from urllib.parse import quote
+
+RAW_BASE = "https://raw.githubusercontent.com"
+README_NAMES = ["readme.md", "readme.txt", "readme"]
+
+
+def tree_endpoint(org: str, repo: str, ref: str = "HEAD") -> str:
+    """API endpoint for a recursive tree listing."""
+    return f"repos/{org}/{repo}/git/trees/{ref}?recursive=1"
+
+
+def blob_endpoint(org: str, repo: str, sha: str) -> str:
+    """API endpoint for a single blob by sha."""
+    return f"repos/{org}/{repo}/git/blobs/{sha}"
+
+
+def raw_url(org: str, repo: str, path: str, ref: str = "HEAD") -> str:
+    """Raw download URL for a path (trees don't carry download_url)."""
+    return f"{RAW_BASE}/{org}/{repo}/{ref}/{quote(path)}"
+
+
+def parse_tree(output: Optional[str]) -> Optional[list]:
+    """Parse a trees API response.
+
+    Returns None when the listing is missing or truncated, so callers can
+    fall back to walking the contents API.
+    """
+    if not output:
+        return None
+    try:
+        data = json.loads(output)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or data.get("truncated") or "tree" not in data:
+        return None
+    return data["tree"]
+
+
+def select_files(tree: list, org: str, repo: str, source_dirs: list) -> list:
+    """Pick blobs at the repo root or anywhere below a top-level source dir.
+
+    Only the first path component is matched, so a vendored
+    node_modules/pkg/images/ or src/x/assets/ is not mistaken for one.
+
+    Entries are returned in contents-API shape (name, path, type, sha, size,
+    download_url) so scanners can treat both listings the same way.
+    """
+    source_dirs = {d.lower() for d in source_dirs}
+    files = []
+    for entry in tree:
+        if entry.get("type") != "blob":
+            continue
+        path = entry.get("path", "")
+        parts = path.split("/")
+        if len(parts) > 1 and parts[0].lower() not in source_dirs:
+            continue
+        files.append({
+            "name": parts[-1],
+            "path": path,
+            "type": "file",
+            "sha": entry.get("sha", ""),
+            "size": entry.get("size", 0),
+            "download_url": raw_url(org, repo, path),
+        })
+    return files
+
+
+def decode_blob(output: Optional[str]) -> Optional[str]:
+    """Decode a base64 blob/contents API response to text."""
+    if not output:
+        return None
+    try:
+        data = json.loads(output)
+        if data.get("encoding") == "base64":
+            return base64.b64decode(data.get("content", "")).decode("utf-8", errors="ignore")
+    except (ValueError, TypeError, AttributeError):
+        pass
+    return None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Request Scheduler - Rate-limit aware GitHub API calls
+
+Every API request from a sync source goes through one scheduler, which:
+- reads X-RateLimit-Limit / -Remaining / -Reset (per X-RateLimit-Resource)
+  from each response
+- lets the full worker count run while more than half the quota is left,
+  then narrows concurrency linearly down to one request at a time
+- waits for the reset once a quota hits zero, or fails fast if that is
+  further away than max_wait
+- retries transport errors, 429, 5xx and rate-limit 403s with exponential
+  backoff (honouring Retry-After)
+
+Requests that still fail raise RequestFailed, so callers can tell a repo
+that failed to scan apart from one that is genuinely empty.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+THROTTLE_BELOW = 0.5  # fraction of quota left where concurrency starts to narrow
+
+
+class RequestFailed(Exception):
+    """A request that could not be completed (after any retries)."""
+
+
+class RequestScheduler:
+    """Concurrency gate, quota tracking and retries for API requests."""
+
+    def __init__(self, max_concurrency: int = 4, max_retries: int = 4, backoff: float = 1.0,
+                 max_backoff: float = 60.0, max_wait: float = 300.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.quota: dict[str, dict] = {}  # resource -> {limit, remaining, reset}
+        self.retried = 0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    # ─────────────────────────────────────────────────────────
+    #  Quota
+    # ─────────────────────────────────────────────────────────
+
+    def update(self, headers: dict, resource: str = "core"):
+        """Record quota from a response's (lowercase) headers."""
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset = int(headers.get("x-ratelimit-reset", 0))
+        except (KeyError, ValueError):
+            return
+        with self._cond:
+            self.quota[headers.get("x-ratelimit-resource", resource)] = {
+                "limit": limit, "remaining": remaining, "reset": reset,
+            }
+            self._cond.notify_all()
+
+    def allowed(self, resource: str = "core") -> int:
+        """Concurrent requests allowed at the resource's current quota."""
+        q = self.quota.get(resource)
+        if not q or q["limit"] <= 0:
+            return self.max_concurrency
+        left = q["remaining"] / q["limit"]
+        if left >= THROTTLE_BELOW:
+            return self.max_concurrency
+        return max(1, int(self.max_concurrency * left / THROTTLE_BELOW))
+
+    def _reset_wait(self, resource: str) -> float:
+        """Seconds until an exhausted quota resets (0 if not exhausted)."""
+        q = self.quota.get(resource)
+        if not q or q["remaining"] > 0:
+            return 0
+        wait = q["reset"] - time.time()
+        if wait <= 0:
+            del self.quota[resource]  # reset has passed; the next response refills it
+            return 0
+        return wait + 1
+
+    def _acquire(self, resource: str):
+        with self._cond:
+            while True:
+                wait = self._reset_wait(resource)
+                if wait > self.max_wait:
+                    raise RequestFailed(f"rate limit exhausted, resets in {int(wait)}s")
+                if wait:
+                    self._cond.wait(wait)
+                elif self._in_flight < self.allowed(resource):
+                    self._in_flight += 1
+                    return
+                else:
+                    self._cond.wait()
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    # ─────────────────────────────────────────────────────────
+    #  Requests
+    # ─────────────────────────────────────────────────────────
+
+    def _delay(self, attempt: int, response: Optional[tuple], resource: str) -> Optional[float]:
+        """Backoff before the next attempt, or None if the response is final."""
+        backoff = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+        if response is None:
+            return backoff
+        status, headers, _body = response
+        rate_limited = status == 429 or (status == 403 and (
+            "retry-after" in headers or headers.get("x-ratelimit-remaining") == "0"))
+        if not rate_limited and status < 500:
+            return None
+        if headers.get("retry-after", "").isdigit():
+            return float(headers["retry-after"])
+        return max(backoff, self._reset_wait(resource))
+
+    def request(self, send: Callable[[], Optional[tuple]], resource: str = "core") -> tuple:
+        """Run send() -> (status, headers, body) or None, retrying as needed.
+
+        Returns the final response, which may still be an error status for
+        the caller to interpret; raises RequestFailed if no response came
+        back at all or a rate limit outlasts max_wait.
+        """
+        for attempt in range(self.max_retries + 1):
+            self._acquire(resource)
+            try:
+                response = send()
+            finally:
+                self._release()
+            if response is not None:
+                self.update(response[1], resource)
+
+            delay = self._delay(attempt, response, resource)
+            if delay is None:
+                return response
+            if attempt == self.max_retries or delay > self.max_wait:
+                break
+            with self._cond:
+                self.retried += 1
+            time.sleep(delay)
+
+        if response is None:
+            raise RequestFailed("no response")
+        return response
+
+    def run(self, call: Callable[[], Optional[str]], resource: str = "core") -> str:
+        """Run a call that only reports success (output) or failure (None)."""
+        def send():
+            output = call()
+            return None if output is None else (200, {}, output)
+        return self.request(send, resource)[2]
+
+    def summary(self) -> str:
+        """Quota left per resource and retries made, for scan summaries."""
+        parts = [f"{name} {q['remaining']}/{q['limit']}" for name, q in sorted(self.quota.items())]
+        text = f"quota {', '.join(parts)}" if parts else ""
+        if self.retried:
+            text += f"{', ' if text else ''}{self.retried} retr{'y' if self.retried == 1 else 'ies'}"
+        return text
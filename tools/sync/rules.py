@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Rules - asset_rules.json compiled into a decision structure
+
+- Rules are sorted by priority once and bucketed by extension, so a file is
+  only tested against rules that could apply to it
+- Each rule's conditions are ordered cheapest first (name, then image
+  header, then file content) and short-circuit
+- FileFeatures computes each probe (dimensions, content matches) lazily and
+  at most once per file, however many rules ask for it
+- content_contains streams the file in chunks and stops at the first hit,
+  so a multi-megabyte .nfo/.ans drop costs one chunk read, not a full load
+"""
+
+import codecs
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from imagesize import get_image_dimensions
+
+# ASCII art detection characters
+ASCII_ART_CHARS = set("█▓▒░╔╗╚╝║═│─┌┐└┘├┤┬┴┼╭╮╯╰▀▄▌▐■□▪▫●○◆◇★☆")
+
+# ANSI escape detection
+ANSI_PATTERN = "\x1b["
+
+SQUARE_TOLERANCE = (0.9, 1.1)
+
+# content_contains reads this much at a time, and gives up after the cap
+CONTENT_CHUNK = 64 * 1024
+CONTENT_SCAN_LIMIT = 4 * 1024 * 1024
+
+
+class ContentMatcher:
+    """Finds any of a set of characters (or an ANSI escape) in a file, streamed."""
+
+    def __init__(self, chars, ansi: bool = True):
+        self.chars = "".join(sorted(set(chars)))
+        alternatives = [re.escape(ANSI_PATTERN)] if ansi else []
+        if self.chars:
+            alternatives.append("[" + "".join(re.escape(c) for c in self.chars) + "]")
+        self.pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    def search(self, filepath: Path, limit: int = CONTENT_SCAN_LIMIT) -> Optional[str]:
+        """First matching text in the file's first `limit` bytes, or None."""
+        if self.pattern is None:
+            return None
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        carry = ""  # last char of the previous chunk, for a split "\x1b["
+        scanned = 0
+        try:
+            with open(filepath, "rb") as f:
+                while scanned < limit:
+                    chunk = f.read(min(CONTENT_CHUNK, limit - scanned))
+                    if not chunk:
+                        break
+                    scanned += len(chunk)
+                    text = carry + decoder.decode(chunk)
+                    hit = self.pattern.search(text)
+                    if hit:
+                        return hit.group(0)
+                    carry = text[-1:]
+        except OSError:
+            pass
+        return None
+
+
+_matchers: dict[str, ContentMatcher] = {}
+
+
+def content_matcher(chars) -> ContentMatcher:
+    """Shared matcher per character list, so its results cache across rules."""
+    key = "".join(sorted(set(chars)))
+    if key not in _matchers:
+        _matchers[key] = ContentMatcher(key)
+    return _matchers[key]
+
+
+class FileFeatures:
+    """Per-file facts the rules test, each computed on first use."""
+
+    def __init__(self, path: Path, cached: dict = None, st=None):
+        self.path = Path(path)
+        self.st = st  # stat the cached features were checked against
+        self.ext = self.path.suffix.lower()
+        self.stem = self.path.stem.lower()
+        cached = cached or {}
+        dims = cached.get("dimensions")
+        self._dimensions = tuple(dims) if dims is not None else None
+        self._content: dict[str, Optional[str]] = dict(cached.get("content", {}))
+
+    @property
+    def dimensions(self) -> tuple:
+        if self._dimensions is None:
+            self._dimensions = get_image_dimensions(self.path)
+        return self._dimensions
+
+    def content_hit(self, matcher: ContentMatcher) -> Optional[str]:
+        """What matcher found in the file (None for no hit), searched once."""
+        if matcher.chars not in self._content:
+            self._content[matcher.chars] = matcher.search(self.path)
+        return self._content[matcher.chars]
+
+    def export(self) -> dict:
+        """Probed features, JSON-ready, for the feature cache."""
+        data = {}
+        if self._dimensions is not None:
+            data["dimensions"] = list(self._dimensions)
+        if self._content:
+            data["content"] = dict(self._content)
+        return data
+
+
+def _check_name(patterns: list):
+    lowered = [p.lower() for p in patterns]
+
+    def check(f: FileFeatures) -> tuple:
+        hit = next((p for p in lowered if p in f.stem), None)
+        if hit:
+            return True, f"name contains '{hit}'"
+        return False, f"name has none of {', '.join(lowered)}"
+    return check
+
+
+def _check_square(f: FileFeatures) -> tuple:
+    w, h = f.dimensions
+    ok = bool(w and h) and SQUARE_TOLERANCE[0] <= w / h <= SQUARE_TOLERANCE[1]
+    return ok, f"{w}x{h} is {'' if ok else 'not '}square"
+
+
+def _check_max_dimension(limit: int):
+    def check(f: FileFeatures) -> tuple:
+        w, h = f.dimensions
+        ok = max(w, h) <= limit
+        return ok, f"{w}x{h} {'within' if ok else 'exceeds'} {limit}px"
+    return check
+
+
+def _check_content(chars: list):
+    matcher = content_matcher("".join(chars))
+
+    def check(f: FileFeatures) -> tuple:
+        hit = f.content_hit(matcher)
+        if hit is None:
+            return False, "content has none of the listed characters"
+        if hit == ANSI_PATTERN:
+            return True, "content has an ANSI escape"
+        return True, f"content has '{hit}'"
+    return check
+
+
+@dataclass
+class CompiledRule:
+    id: str
+    priority: int
+    destination: Optional[str]
+    extensions: Optional[frozenset]
+    checks: list = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, rule: dict) -> "CompiledRule":
+        match = rule.get("match", {})
+        checks = []
+        # Cheapest first: stem, then image header, then file content
+        if "name_contains" in match:
+            checks.append(_check_name(match["name_contains"]))
+        if match.get("aspect_ratio") == "square":
+            checks.append(_check_square)
+        if "max_dimension" in match:
+            checks.append(_check_max_dimension(match["max_dimension"]))
+        if "content_contains" in match:
+            checks.append(_check_content(match["content_contains"]))
+        exts = match.get("extensions")
+        return cls(
+            id=rule.get("id", "?"),
+            priority=rule.get("priority", 99),
+            destination=rule.get("destination"),
+            extensions=frozenset(exts) if exts is not None else None,
+            checks=checks,
+        )
+
+    def test(self, f: FileFeatures) -> tuple:
+        """(matched, reasons) for one file, stopping at the first failed check."""
+        reasons = [f"extension '{f.ext}'"] if self.extensions is not None else []
+        for check in self.checks:
+            ok, reason = check(f)
+            reasons.append(reason)
+            if not ok:
+                return False, reasons
+        return True, reasons
+
+
+class RuleSet:
+    """Priority-ordered rules bucketed by extension."""
+
+    def __init__(self, rules: list):
+        ordered = sorted(rules, key=lambda r: r.get("priority", 99))
+        self.rules = [CompiledRule.from_dict(r) for r in ordered]
+        self._any_ext = [r for r in self.rules if r.extensions is None]
+        exts = set().union(*(r.extensions for r in self.rules if r.extensions is not None))
+        self._by_ext = {
+            ext: [r for r in self.rules if r.extensions is None or ext in r.extensions]
+            for ext in exts
+        }
+
+    def candidates(self, ext: str) -> list:
+        """Rules that could match a file with this extension, in priority order."""
+        return self._by_ext.get(ext, self._any_ext)
+
+    def match(self, path) -> Optional[CompiledRule]:
+        """First rule matching the file, or None."""
+        f = path if isinstance(path, FileFeatures) else FileFeatures(path)
+        for rule in self.candidates(f.ext):
+            if rule.test(f)[0]:
+                return rule
+        return None
+
+    def destination(self, path) -> Optional[str]:
+        """Destination directory for a file, or None if no rule matches."""
+        rule = self.match(path)
+        return rule.destination if rule else None
+
+    def explain(self, path) -> list:
+        """[(rule, matched, reasons)] for each candidate rule up to the one that fires."""
+        f = path if isinstance(path, FileFeatures) else FileFeatures(path)
+        trace = []
+        for rule in self.candidates(f.ext):
+            matched, reasons = rule.test(f)
+            trace.append((rule, matched, reasons))
+            if matched:
+                break
+        return trace
+
+
+# Process-pool workers compile the rules once, in the initializer
+_worker_rules: Optional[RuleSet] = None
+
+
+def init_worker(rules: list):
+    """ProcessPoolExecutor initializer: compile rules in the worker."""
+    global _worker_rules
+    _worker_rules = RuleSet(rules)
+
+
+def classify(path: str, cached: dict = None) -> tuple:
+    """Worker task: (path, destination, probed features) for one file."""
+    f = FileFeatures(path, cached)
+    return path, _worker_rules.destination(f), f.export()
+
+
+def format_explain(path: Path, trace: list) -> str:
+    """Human-readable explain() output."""
+    lines = [f"  {path}"]
+    if not trace:
+        lines.append("    no rule applies to this extension")
+    for rule, matched, reasons in trace:
+        mark = "✓" if matched else "✗"
+        lines.append(f"    {mark} {rule.id} (priority {rule.priority}): {'; '.join(reasons)}")
+    if trace and trace[-1][1]:
+        lines.append(f"    → {trace[-1][0].destination}/")
+    else:
+        lines.append("    → no match, stays in place")
+    return "\n".join(lines)
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Sources - Where the sync core reads org repos from
+
+Every source hands the core the same shapes: repo dicts from list_repos()
+(name, description, updatedAt, pushedAt), contents-API-shaped file dicts
+from list_files(), and {(repo, path): text} from fetch_texts().
+
+- GhCliSource: `gh api` through the ETag cache, with READMEs and banner
+  candidates fetched in batched GraphQL queries
+- RestSource: the same REST endpoints over plain HTTPS, for hosts without
+  gh; authenticates with $GITHUB_TOKEN (or $GH_TOKEN) when set, and talks
+  to $GITHUB_API_URL instead of api.github.com when that is set
+- GitMirrorSource: blob-filtered git mirrors under .hakc_cache/mirrors
+  (git_mirror.py); scans read local objects and keep working offline.
+  Clones from $HAKC_GIT_REMOTE (default https://github.com), which may
+  also be a local directory holding {org}/{repo}
+
+Sources that hold blob contents locally also implement fetch_blob(), which
+the core prefers over downloading. download_token() is the credential the
+core's downloader sends to GitHub hosts, so private repos' files download
+with the same access that listed them.
+
+API calls go through a RequestScheduler (request_scheduler.py). A repo that
+is empty lists as []; one that couldn't be listed raises RequestFailed, and
+fetch_texts() leaves out texts it couldn't fetch, so the core can tell the
+two apart and rescan failed repos next time.
+"""
+
+import json
+import os
+import subprocess
+import urllib.error
+import urllib.request
+from typing import Optional
+
+from pathlib import Path
+
+from api_cache import ResponseCache, is_immutable, parse_include_output
+from git_mirror import GitMirror
+from graphql_batch import batches, build_query, parse_response
+from request_scheduler import RequestFailed, RequestScheduler
+from repo_tree import blob_endpoint, decode_blob, parse_tree, select_files, tree_endpoint
+
+API_BASE = "https://api.github.com"
+
+# Statuses that mean "nothing there" rather than "couldn't look"
+EMPTY_STATUSES = (404, 409)  # missing path; tree of an empty repository
+GIT_REMOTE = "https://github.com"
+
+
+class ApiSource:
+    """GitHub REST walk shared by the gh and HTTP sources.
+
+    Subclasses only provide _request(); conditional revalidation against
+    the response cache, the recursive tree listing (with its contents
+    fallback) and blob text lookups live here.
+    """
+
+    name = "api"
+
+    def __init__(self, org: str, api_cache: ResponseCache, scheduler: RequestScheduler = None):
+        self.org = org
+        self.api_cache = api_cache
+        self.scheduler = scheduler or RequestScheduler()
+
+    def _request(self, endpoint: str, headers: list) -> Optional[tuple]:
+        """(status, lowercase headers, body) for a GET, None if it couldn't be made."""
+        raise NotImplementedError
+
+    def api(self, endpoint: str) -> Optional[str]:
+        """GET an API endpoint through the on-disk ETag cache.
+
+        Cached endpoints are revalidated with If-None-Match; a 304 is served
+        from disk. Blob endpoints are immutable and never hit the network
+        once cached.
+
+        Returns None when the endpoint doesn't exist (404/409); raises
+        RequestFailed for anything else that isn't a success.
+        """
+        cached = self.api_cache.get(endpoint)
+        if cached and is_immutable(endpoint):
+            self.api_cache.record(hit=True)
+            return cached["body"]
+
+        conditional = self.api_cache.conditional_headers(cached or {})
+        status, headers, body = self.scheduler.request(lambda: self._request(endpoint, conditional))
+        if status == 304 and cached:
+            self.api_cache.record(hit=True)
+            return cached["body"]
+        if status == 200:
+            self.api_cache.record(hit=False)
+            self.api_cache.put(endpoint, headers, body)
+            return body
+        if status in EMPTY_STATUSES:
+            return None
+        raise RequestFailed(f"HTTP {status} for {endpoint}")
+
+    def begin_scan(self):
+        """Start counting a scan's API traffic."""
+        self.api_cache.reset_counters()
+        self.scheduler.retried = 0
+
+    def end_scan(self) -> str:
+        """Persist the scan's counters; returns a one-line summary."""
+        self.api_cache.save_stats()
+        summary = f"API cache: {self.api_cache.hits} hit(s), {self.api_cache.misses} miss(es)"
+        limits = self.scheduler.summary()
+        return f"{summary}; {limits}" if limits else summary
+
+    def close(self):
+        """Release held resources; API sources hold none."""
+
+    def list_repos(self) -> list:
+        """Repos in the org."""
+        raise NotImplementedError
+
+    def contents(self, repo: str, path: str = "") -> list:
+        """One level of the contents API."""
+        output = self.api(f"repos/{self.org}/{repo}/contents/{path}".rstrip("/"))
+        if not output:
+            return []
+        try:
+            items = json.loads(output)
+            return [items] if isinstance(items, dict) else items
+        except ValueError:
+            return []
+
+    def list_files(self, repo: str, source_dirs: list) -> list:
+        """List candidate asset files with a single recursive tree call.
+
+        Keeps root files plus anything nested below a top-level source dir.
+        Falls back to the one-level contents walk when the tree is
+        unavailable or truncated.
+        """
+        source_dirs = [d.lower() for d in source_dirs]
+        tree = parse_tree(self.api(tree_endpoint(self.org, repo)))
+        if tree is not None:
+            return select_files(tree, self.org, repo, source_dirs)
+
+        files = []
+        for item in self.contents(repo):
+            if item.get("type") == "file":
+                files.append(item)
+            elif item.get("type") == "dir" and item.get("name", "").lower() in source_dirs:
+                files.extend(i for i in self.contents(repo, item["name"]) if i.get("type") == "file")
+        return files
+
+    def fetch_text(self, repo: str, item: dict) -> Optional[str]:
+        """A small file's text, by blob sha when known."""
+        if item.get("sha"):
+            endpoint = blob_endpoint(self.org, repo, item["sha"])
+        else:
+            endpoint = f"repos/{self.org}/{repo}/contents/{item.get('path', '')}"
+        return decode_blob(self.api(endpoint))
+
+    def fetch_texts(self, wanted: list) -> dict:
+        """Text for [(repo, item), ...] as {(repo, path): text}; failed fetches are left out."""
+        texts = {}
+        for repo, item in wanted:
+            try:
+                texts[(repo, item.get("path", ""))] = self.fetch_text(repo, item)
+            except RequestFailed:
+                pass
+        return texts
+
+    def fetch_blob(self, repo: str, sha: str, dest: Path) -> bool:
+        """Write a blob to dest from local objects; API sources have none."""
+        return False
+
+    def download_token(self) -> Optional[str]:
+        """Token for raw.githubusercontent.com downloads (private repos), if any."""
+        return None
+
+
+class GhCliSource(ApiSource):
+    """The GitHub API through the gh CLI (uses gh's own auth)."""
+
+    name = "gh"
+
+    def _run_gh(self, *args) -> Optional[str]:
+        """Run gh CLI command."""
+        try:
+            result = subprocess.run(["gh", *args], capture_output=True, text=True, timeout=30)
+            return result.stdout.strip() if result.returncode == 0 else None
+        except Exception:
+            return None
+
+    def download_token(self) -> Optional[str]:
+        """gh's own token, so private repo files download like they list."""
+        return self._run_gh("auth", "token")
+
+    def _run_gh_include(self, *args) -> Optional[tuple]:
+        """Run `gh api -i ...`; (status, headers, body) or None if gh didn't get a response."""
+        try:
+            # gh exits non-zero on 304 and errors, but still prints status + headers
+            result = subprocess.run(["gh", "api", "-i", *args], capture_output=True, text=True, timeout=30)
+        except Exception:
+            return None
+        status, headers, body = parse_include_output(result.stdout)
+        return (status, headers, body) if status else None
+
+    def _request(self, endpoint: str, headers: list) -> Optional[tuple]:
+        args = [endpoint]
+        for header in headers:
+            args += ["-H", header]
+        return self._run_gh_include(*args)
+
+    def _graphql(self, query: str) -> Optional[str]:
+        """Run a GraphQL query (metered as the graphql resource); None on failure."""
+        try:
+            status, _headers, body = self.scheduler.request(
+                lambda: self._run_gh_include("graphql", "-f", f"query={query}"), "graphql")
+        except RequestFailed:
+            return None
+        return body if status == 200 else None
+
+    def list_repos(self) -> list:
+        output = self.scheduler.run(lambda: self._run_gh(
+            "repo", "list", self.org, "--json", "name,description,updatedAt,pushedAt", "--limit", "100"))
+        return json.loads(output)
+
+    def fetch_texts(self, wanted: list) -> dict:
+        """Fetch text for [(repo, item), ...] in batched GraphQL queries.
+
+        Blob text is cached by sha, so only unseen blobs are queried. If a
+        batch query fails outright its files fall back to per-blob REST
+        calls, as do files the response reported errors for.
+        """
+        texts = {}
+        pending = []
+        for repo, item in wanted:
+            key = (repo, item.get("path", ""))
+            cached = self.api_cache.get(f"blob-text/{item['sha']}") if item.get("sha") else None
+            if cached:
+                self.api_cache.record(hit=True)
+                texts[key] = cached["body"]
+            else:
+                pending.append((repo, item))
+
+        items = {(repo, item.get("path", "")): item for repo, item in pending}
+        for batch in batches(list(items)):
+            query, aliases = build_query(self.org, batch)
+            result = parse_response(self._graphql(query), aliases)
+
+            for key in batch:
+                item = items[key]
+                if result is None or key not in result:
+                    try:
+                        text = self.fetch_text(key[0], item)
+                    except RequestFailed:
+                        continue
+                else:
+                    self.api_cache.record(hit=False)
+                    text = result.get(key)
+                    if text is not None and item.get("sha"):
+                        self.api_cache.put(f"blob-text/{item['sha']}", {}, text)
+                texts[key] = text
+
+        return texts
+
+
+class RestSource(ApiSource):
+    """The GitHub REST API over HTTPS, without gh."""
+
+    name = "rest"
+
+    def __init__(self, org: str, api_cache: ResponseCache, scheduler: RequestScheduler = None,
+                 base_url: str = None, token: str = None, timeout: int = 30):
+        super().__init__(org, api_cache, scheduler)
+        self.base_url = (base_url or os.environ.get("GITHUB_API_URL") or API_BASE).rstrip("/")
+        self.token = token or os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
+        self.timeout = timeout
+
+    def _request(self, endpoint: str, headers: list) -> Optional[tuple]:
+        req = urllib.request.Request(f"{self.base_url}/{endpoint.lstrip('/')}")
+        req.add_header("Accept", "application/vnd.github+json")
+        if self.token:
+            req.add_header("Authorization", f"Bearer {self.token}")
+        for header in headers:
+            name, _, value = header.partition(":")
+            req.add_header(name.strip(), value.strip())
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                body = resp.read().decode("utf-8", errors="replace")
+                return resp.status, {k.lower(): v for k, v in resp.headers.items()}, body
+        except urllib.error.HTTPError as e:
+            # 304 and error statuses arrive as exceptions
+            return e.code, {k.lower(): v for k, v in e.headers.items()}, ""
+        except (urllib.error.URLError, OSError):
+            return None
+
+    def download_token(self) -> Optional[str]:
+        return self.token
+
+    def list_repos(self) -> list:
+        output = self.api(f"orgs/{self.org}/repos?per_page=100")
+        if not output:
+            return []
+        try:
+            repos = json.loads(output)
+        except ValueError:
+            raise RequestFailed("unreadable repo list")
+        return [{"name": r["name"], "description": r.get("description") or "",
+                 "updatedAt": r.get("updated_at", ""), "pushedAt": r.get("pushed_at", "")}
+                for r in repos]
+
+
+class GitMirrorSource:
+    """Org repos as local blob-filtered git mirrors."""
+
+    name = "git"
+
+    def __init__(self, org: str, api_cache: ResponseCache, scheduler: RequestScheduler = None,
+                 remote: str = None):
+        self.org = org
+        self.api_cache = api_cache
+        self.scheduler = scheduler
+        self.remote = (remote or os.environ.get("HAKC_GIT_REMOTE") or GIT_REMOTE).rstrip("/")
+        self.mirror_dir = api_cache.cache_dir.parent / "mirrors" / org
+        self._mirrors: dict[str, GitMirror] = {}
+        self._fetched: dict[str, bool] = {}
+
+    def _local_remote(self) -> Optional[Path]:
+        """The org directory when the remote is a local path."""
+        if "://" in self.remote or self.remote.startswith("git@"):
+            return None
+        return Path(self.remote).expanduser() / self.org
+
+    def _url(self, repo: str) -> str:
+        local = self._local_remote()
+        if local is None:
+            return f"{self.remote}/{self.org}/{repo}.git"
+        path = local / repo
+        if not path.exists() and (local / f"{repo}.git").exists():
+            path = local / f"{repo}.git"
+        return path.resolve().as_uri()
+
+    def mirror(self, repo: str) -> GitMirror:
+        if repo not in self._mirrors:
+            self._mirrors[repo] = GitMirror(self.mirror_dir / f"{repo}.git", self._url(repo))
+        return self._mirrors[repo]
+
+    def begin_scan(self):
+        """Each scan fetches every repo it lists at most once."""
+        self._fetched = {}
+
+    def end_scan(self) -> str:
+        if not self._fetched:
+            return ""
+        stale = sum(1 for ok in self._fetched.values() if not ok)
+        summary = f"Git mirrors: {len(self._fetched) - stale} fetched"
+        return summary + (f", {stale} offline (using last fetch)" if stale else "")
+
+    def list_repos(self) -> list:
+        """Repos on the remote, or the mirrors on disk when it's unreachable.
+
+        pushedAt is the remote's HEAD commit for local remotes and the
+        mirrored HEAD offline, so skip-by-head still works without GitHub.
+        """
+        local = self._local_remote()
+        if local is None:
+            try:
+                return GhCliSource(self.org, self.api_cache, self.scheduler).list_repos()
+            except RequestFailed:
+                pass
+        elif local.is_dir():
+            repos = []
+            for path in sorted(local.iterdir()):
+                head = (self._ls_remote_head(path) if path.is_dir() else None)
+                if head is not None:
+                    name = path.name[:-4] if path.name.endswith(".git") else path.name
+                    repos.append({"name": name, "description": "", "updatedAt": head, "pushedAt": head})
+            return repos
+
+        if not self.mirror_dir.is_dir():
+            return []
+        return [{"name": p.name[:-4], "description": "", "updatedAt": "", "pushedAt": GitMirror(p, "").head()}
+                for p in sorted(self.mirror_dir.glob("*.git"))]
+
+    def _ls_remote_head(self, path: Path) -> Optional[str]:
+        """HEAD commit of a local repo, None if it isn't one."""
+        try:
+            result = subprocess.run(["git", "ls-remote", str(path), "HEAD"],
+                                    capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.split("\t", 1)[0]
+
+    def list_files(self, repo: str, source_dirs: list) -> list:
+        """ls-tree of the mirror (fetched once per scan), sized from local blobs.
+
+        Candidate blobs not mirrored yet are fetched in one request, so the
+        mirror holds asset blobs but never the rest of the repo.
+        """
+        mirror = self.mirror(repo)
+        if repo not in self._fetched:
+            self._fetched[repo] = mirror.update()
+        if not mirror.exists():
+            raise RequestFailed(f"could not clone {mirror.url}")
+
+        files = select_files(mirror.tree(), self.org, repo, source_dirs)
+        missing = mirror.missing()
+        mirror.prefetch(sorted({f["sha"] for f in files if f["sha"] in missing}))
+        for item in files:
+            item["size"] = mirror.size(item["sha"]) or 0
+        return files
+
+    def fetch_texts(self, wanted: list) -> dict:
+        texts = {}
+        for repo, item in wanted:
+            data = self.mirror(repo).read(item["sha"]) if item.get("sha") else None
+            if data is not None:
+                texts[(repo, item.get("path", ""))] = data.decode("utf-8", errors="replace")
+        return texts
+
+    def fetch_blob(self, repo: str, sha: str, dest: Path) -> bool:
+        """Copy a mirrored blob into dest; False if it isn't available."""
+        return self.mirror(repo).copy_to(sha, dest)
+
+    def download_token(self) -> Optional[str]:
+        """Token for blobs the mirror lacks, which download over raw.githubusercontent.com."""
+        return os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
+
+    def close(self):
+        """End every mirror's cat-file process (restarted on next use)."""
+        for mirror in self._mirrors.values():
+            mirror.close()
+
+
+SOURCES = {"gh": GhCliSource, "rest": RestSource, "git": GitMirrorSource}
+
+
+def make_source(kind: str, org: str, api_cache: ResponseCache, jobs: int = 4):
+    """Source by name ("gh", "rest" or "git"), allowed up to jobs concurrent API calls."""
+    return SOURCES[kind](org, api_cache, RequestScheduler(max_concurrency=jobs))
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Sync Core - One scan / needs_sync / download pipeline
+
+hakc_assets.py and sync_org.py differ only in how they classify files and
+where synced files land, so both drive this core with:
+- a source (sources.py: gh CLI, plain REST or local git mirrors) that
+  lists repos, files and small-file text, and may serve blobs locally
+- a layout: type-first `repos/{type}/{repo}/{file}` or repo-first
+  `repos/{repo}/{type}/{file}`
+- a classify callback turning a repo's listing into Assets
+
+State lives in one format in .sync_state.json: assets keyed by their path
+under repos/ (so both layouts can share the file), and repo heads per
+layout. Older files from either tool are migrated on load.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from blob_store import BlobStore
+from downloader import Downloader, format_result
+from manifest_store import type_first_relpath
+from persist import read_json, write_json
+from request_scheduler import RequestFailed
+
+STATE_VERSION = 2
+
+# The assets repo itself is never synced into itself
+SELF_REPO = "haKCAssets"
+
+# sync_org.py's classification; also places its legacy state entries
+ORG_ASSET_EXTENSIONS = {
+    "images": [".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico"],
+    "banners": [".txt", ".ans", ".asc", ".nfo"],
+    "media": [".mp4", ".gif", ".webm", ".mov"],
+    "docs": [".pdf"],
+}
+ORG_BANNER_PATTERNS = ["banner", "ascii", "logo.txt", "header.txt"]
+
+
+def org_asset_type(filename: str, content: str = None) -> str:
+    """Determine asset type from filename/content (sync_org.py rules)."""
+    ext = Path(filename).suffix.lower()
+    name_lower = filename.lower()
+
+    for asset_type, extensions in ORG_ASSET_EXTENSIONS.items():
+        if ext in extensions:
+            # Special case: .txt files might be banners
+            if ext == ".txt":
+                if any(p in name_lower for p in ORG_BANNER_PATTERNS):
+                    return "banners"
+                if content and any(c in content for c in "█▓▒░╔╗╚╝│─"):
+                    return "banners"
+            return asset_type
+
+    # Check if it's a banner file without extension
+    if any(p in name_lower for p in ORG_BANNER_PATTERNS):
+        return "banners"
+
+    return "other"
+
+
+@dataclass
+class Asset:
+    """Represents a discovered asset."""
+    source: str
+    path: str
+    name: str
+    size: int = 0
+    sha: str = ""
+    download_url: str = ""
+    asset_type: str = "other"
+    local_path: Optional[Path] = None
+    extracted_content: Optional[str] = None  # For banners extracted from READMEs
+
+
+@dataclass
+class SyncState:
+    """Tracks sync state."""
+    version: int = STATE_VERSION
+    last_sync: str = ""
+    last_organize: str = ""
+    assets: dict = field(default_factory=dict)  # path under repos/ -> sha
+    repo_heads: dict = field(default_factory=dict)  # layout -> {repo: pushedAt at last good sync}
+
+
+def migrate_state(data: dict) -> SyncState:
+    """Bring a state dict from any earlier format up to the current one.
+
+    - hakc_assets.py v1: assets keyed "type/repo/file" (already a path under
+      repos/ in the type-first layout), repo_heads flat {repo: head}
+    - sync_org.py: repos {repo: {path: sha}}, placed repo-first
+    """
+    if data.get("version") == STATE_VERSION:
+        known = {f.name for f in fields(SyncState)}
+        return SyncState(**{k: v for k, v in data.items() if k in known})
+
+    state = SyncState(
+        last_sync=data.get("last_sync", ""),
+        last_organize=data.get("last_organize", ""),
+        assets=dict(data.get("assets", {})),
+    )
+    if data.get("repo_heads"):
+        state.repo_heads[TypeFirstLayout.name] = dict(data["repo_heads"])
+    for repo, paths in data.get("repos", {}).items():
+        for path, sha in paths.items():
+            name = Path(path).name
+            state.assets[f"{repo}/{org_asset_type(name)}/{name}"] = sha
+    return state
+
+
+def load_state(state_file: Path) -> SyncState:
+    """Load (and migrate) sync state, falling back to the previous generation.
+
+    Empty state (a full resync) only if neither copy is usable.
+    """
+    def usable(data) -> bool:
+        try:
+            migrate_state(data)
+            return True
+        except (TypeError, AttributeError, ValueError):
+            return False
+
+    data = read_json(state_file, validate=usable)
+    return migrate_state(data) if data is not None else SyncState()
+
+
+class TypeFirstLayout:
+    """repos/{type}/{repo}/{file} (hakc_assets.py)."""
+
+    name = "type-first"
+
+    def relpath(self, asset: Asset) -> str:
+        return type_first_relpath(asset.asset_type, asset.source, asset.name)
+
+
+class RepoFirstLayout:
+    """repos/{repo}/{type}/{file} (sync_org.py)."""
+
+    name = "repo-first"
+
+    def relpath(self, asset: Asset) -> str:
+        return f"{asset.source}/{asset.asset_type}/{asset.name}"
+
+
+class SyncCore:
+    """Scan, change detection and blob-store downloads for one layout."""
+
+    def __init__(self, repo_root: Path, source, layout, classify: Callable,
+                 text_candidates: Callable = None, source_dirs: list = None,
+                 exclude_repos: list = None, jobs: int = 4, timeout: int = 120,
+                 on_synced: Callable = None, on_batch: Callable = None):
+        self.repo_root = repo_root
+        self.repos_dir = repo_root / "repos"
+        self.cache_dir = repo_root / ".hakc_cache"
+        self.state_file = repo_root / ".sync_state.json"
+        self.source = source
+        self.layout = layout
+        self.classify = classify
+        self.text_candidates = text_candidates or (lambda files: [])
+        self.source_dirs = list(source_dirs or [])
+        self.exclude_repos = set(exclude_repos or [])
+        self.jobs = max(1, jobs)
+
+        # on_synced(asset, blob) per placed asset; on_batch(synced) after a sync
+        self.on_synced = on_synced
+        self.on_batch = on_batch
+
+        # watch runs remote syncs on a worker thread while organizing locally
+        self.lock = threading.RLock()
+        self.state = load_state(self.state_file)
+
+        # Content-addressed objects; repos/ files are hardlinks into it
+        self.store = BlobStore(self.cache_dir / "objects")
+
+        # Pooled keep-alive downloads, capped at the same concurrency as scans;
+        # authenticated to GitHub hosts with the source's token. Partials go to
+        # .hakc_cache/tmp (beside objects/, so the final rename stays atomic)
+        self.downloader = Downloader(max_workers=self.jobs, timeout=timeout, token=self.source.download_token,
+                                     partial_dir=self.cache_dir / "tmp")
+
+        # Heads of repos scanned this run, committed to state once synced
+        self._scanned_heads: dict[str, str] = {}
+
+        # Repos (or "*" for the repo list) the last scan couldn't read, with why
+        self.scan_errors: dict[str, str] = {}
+
+    def close(self):
+        """Release the source's processes and idle download connections; both reopen on use."""
+        self.source.close()
+        self.downloader.close()
+
+    def save_state(self):
+        """Save sync state (atomically, keeping the previous generation)."""
+        with self.lock:
+            write_json(self.state_file, {
+                "version": STATE_VERSION,
+                "last_sync": self.state.last_sync,
+                "last_organize": self.state.last_organize,
+                "assets": self.state.assets,
+                "repo_heads": self.state.repo_heads,
+            })
+
+    # ─────────────────────────────────────────────────────────
+    #  Scan
+    # ─────────────────────────────────────────────────────────
+
+    def list_files(self, repo: str) -> list:
+        """File listing for a repo, honouring exclude_repos."""
+        if repo in self.exclude_repos:
+            return []
+        return self.source.list_files(repo, self.source_dirs)
+
+    def _try_list_files(self, repo: str) -> Optional[list]:
+        """list_files, or None (noted in scan_errors) if the repo couldn't be read."""
+        try:
+            return self.list_files(repo)
+        except RequestFailed as e:
+            self.scan_errors[repo] = str(e)
+            return None
+
+    def scan_repo(self, repo: str) -> list:
+        """Scan one repo for assets."""
+        files = self.list_files(repo)
+        texts = self.source.fetch_texts([(repo, item) for item in self.text_candidates(files)])
+        return self._local_names(self.classify(repo, files, texts))
+
+    def _local_names(self, assets: list) -> list:
+        """Name assets found below a source dir after their whole path.
+
+        Listings recurse below source dirs, so a repo can ship logo.png at
+        its root and again under assets/ or assets/deep/. Nested files are
+        named after their path (assets__deep__logo.png), so a local name
+        follows from the asset's own path alone: no two source paths write
+        the same file under repos/, and no name changes because a sibling
+        appeared or went away.
+        """
+        for asset in assets:
+            parts = asset.path.split("/")
+            if len(parts) > 1 and asset.name == parts[-1]:
+                asset.name = "__".join(parts)
+        return assets
+
+    def _repo_head(self, repo_info: dict) -> str:
+        """Cheap change marker for a repo from the list call."""
+        return repo_info.get("pushedAt") or repo_info.get("updatedAt") or ""
+
+    def _heads(self) -> dict:
+        return self.state.repo_heads.setdefault(self.layout.name, {})
+
+    def scan(self, specific_repo: str = None, full: bool = False) -> list:
+        """Scan all repos.
+
+        Repos whose pushedAt matches the head recorded at the last successful
+        sync are skipped before any deep scan (unless full=True), so an idle
+        org costs one list call.
+
+        The scan runs in three passes: one listing per repo (on a bounded
+        thread pool when jobs > 1), one text fetch for every candidate file
+        across all repos, then local classification. Results are kept in
+        listing order, so output matches the serial path exactly.
+
+        A repo whose listing or text fetch failed contributes no assets and
+        keeps its old head, so a rate-limited or partial scan is retried
+        rather than mistaken for an empty repo.
+        """
+        assets = []
+        self.scan_errors = {}
+        try:
+            repos = [{"name": specific_repo}] if specific_repo else self.source.list_repos()
+        except RequestFailed as e:
+            self.scan_errors["*"] = str(e)
+            print(f"Could not list repos: {e}")
+            return []
+        repos = [r for r in repos if r["name"] != SELF_REPO]
+
+        changed = repos
+        if not full:
+            heads = self._heads()
+            changed = [r for r in repos
+                       if not self._repo_head(r) or heads.get(r["name"]) != self._repo_head(r)]
+        self._scanned_heads = {r["name"]: self._repo_head(r) for r in changed if self._repo_head(r)}
+        names = [r["name"] for r in changed]
+
+        skipped = len(repos) - len(changed)
+        if skipped:
+            print(f"Scanning {len(changed)} repo(s) ({skipped} unchanged since last sync)...\n")
+        else:
+            print(f"Scanning {len(changed)} repo(s)...\n")
+        self.source.begin_scan()
+
+        if self.jobs == 1 or len(names) <= 1:
+            listings = [self._try_list_files(repo) for repo in names]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.jobs, len(names))) as pool:
+                listings = list(pool.map(self._try_list_files, names))
+
+        wanted = [(repo, item) for repo, files in zip(names, listings) for item in self.text_candidates(files or [])]
+        texts = self.source.fetch_texts(wanted)
+        for repo, item in wanted:
+            if (repo, item.get("path", "")) not in texts:
+                self.scan_errors.setdefault(repo, f"could not fetch {item.get('path', '')}")
+
+        for repo, files in zip(names, listings):
+            if repo in self.scan_errors:
+                self._scanned_heads.pop(repo, None)
+                print(f"  {repo}... FAILED ({self.scan_errors[repo]})")
+                continue
+            repo_assets = self._local_names(self.classify(repo, files, texts))
+            assets.extend(repo_assets)
+            print(f"  {repo}... {len(repo_assets)} asset(s)")
+
+        summary = self.source.end_scan()
+        if names and summary:
+            print(f"\n  {summary}")
+        return assets
+
+    # ─────────────────────────────────────────────────────────
+    #  Sync
+    # ─────────────────────────────────────────────────────────
+
+    def key_for(self, asset: Asset) -> str:
+        """State key: the asset's path under repos/."""
+        return self.layout.relpath(asset)
+
+    def path_for(self, asset: Asset) -> Path:
+        """Local path of a synced asset."""
+        return self.repos_dir / self.layout.relpath(asset)
+
+    def needs_sync(self, asset: Asset) -> bool:
+        """Check if asset needs syncing."""
+        if not self.path_for(asset).exists():
+            return True
+        return self.state.assets.get(self.key_for(asset)) != asset.sha
+
+    def _record_synced(self, asset: Asset, blob: str = ""):
+        """Update state (and the caller's hook) for a placed asset."""
+        with self.lock:
+            self.state.assets[self.key_for(asset)] = asset.sha
+        if self.on_synced:
+            self.on_synced(asset, blob)
+
+    def _write_extracted(self, asset: Asset) -> str:
+        """Store extracted content (e.g., banners from READMEs) and link it in place."""
+        blob = self.store.add_bytes(asset.extracted_content.encode("utf-8"))
+        self.store.materialize(blob, self.path_for(asset))
+        return blob
+
+    def _download_key(self, asset: Asset) -> str:
+        """Identity of the bytes to fetch; shared blobs download once."""
+        return asset.sha or asset.download_url
+
+    def _needs_download(self, asset: Asset) -> bool:
+        """Whether the asset's bytes are missing from the blob store."""
+        return not asset.extracted_content and not self.store.has(asset.sha)
+
+    def _download_job(self, asset: Asset) -> tuple:
+        """(url, dest, size, sha) for the downloader.
+
+        Downloads go straight into the store when the blob sha is known and
+        are verified against it before being promoted.
+        """
+        if asset.sha:
+            return asset.download_url, self.store.path_for(asset.sha), asset.size, asset.sha
+        return asset.download_url, self.path_for(asset), asset.size, None
+
+    def _from_source(self, asset: Asset) -> bool:
+        """Copy the asset's blob into the store from the source's local objects."""
+        return bool(asset.sha) and self.source.fetch_blob(asset.source, asset.sha, self.store.path_for(asset.sha))
+
+    def _place(self, asset: Asset) -> str:
+        """Materialise a fetched asset under repos/ and return its blob key."""
+        local = self.path_for(asset)
+        if asset.sha:
+            self.store.materialize(asset.sha, local)
+            return asset.sha
+        return self.store.adopt(local)
+
+    def download_asset(self, asset: Asset) -> bool:
+        """Fetch (or extract) one asset and record it."""
+        try:
+            if asset.extracted_content:
+                blob = self._write_extracted(asset)
+            else:
+                if self._needs_download(asset) and not self._from_source(asset):
+                    result = self.downloader.fetch(*self._download_job(asset))
+                    if not result.ok:
+                        print(f"    Error: {result.error}")
+                        return False
+                blob = self._place(asset)
+        except Exception as e:
+            print(f"    Error: {e}")
+            return False
+
+        self._record_synced(asset, blob)
+        return True
+
+    def _commit_repo_heads(self, failed_repos: set):
+        """Record heads of scanned repos that synced cleanly."""
+        with self.lock:
+            heads = self._heads()
+            for repo, head in self._scanned_heads.items():
+                if repo not in failed_repos:
+                    heads[repo] = head
+        self._scanned_heads = {}
+
+    def forget_head(self, repo: str):
+        """Force a repo to be rescanned next sync."""
+        with self.lock:
+            self._heads().pop(repo, None)
+
+    def sync(self, assets: list, dry_run: bool = True) -> list:
+        """Sync assets that are new or changed; returns those synced."""
+        to_sync = [a for a in assets if self.needs_sync(a)]
+
+        if not to_sync:
+            if self.scan_errors:
+                print(f"\nNothing to sync ({len(self.scan_errors)} repo(s) failed to scan; retried next run).")
+            else:
+                print("\nAll assets up to date.")
+            if not dry_run and self._scanned_heads:
+                self._commit_repo_heads(set())
+                self.save_state()
+            return []
+
+        print(f"\n{len(to_sync)} asset(s) to sync:\n")
+
+        if dry_run:
+            for asset in to_sync:
+                action = "new" if not self.path_for(asset).exists() else "update"
+                print(f"  [{action}] {asset.source}/{asset.path} → repos/{self.key_for(asset)}")
+            return []
+
+        # Each missing blob is fetched once, concurrently; results come back
+        # in first-use order so they can be consumed while walking to_sync.
+        # Blobs the source holds locally (git mirrors) are copied instead.
+        pending = {}
+        mirrored = set()
+        for a in to_sync:
+            key = self._download_key(a)
+            if key in pending or key in mirrored or not self._needs_download(a):
+                continue
+            if self._from_source(a):
+                mirrored.add(key)
+            else:
+                pending[key] = a
+        self.downloader.reset_stats()
+        fetched = self.downloader.fetch_all(self._download_job(a) for a in pending.values())
+        results = {}
+
+        synced = []
+        for asset in to_sync:
+            print(f"  Syncing {asset.source}/{asset.name}...", end=" ", flush=True)
+            try:
+                if asset.extracted_content:
+                    blob, detail = self._write_extracted(asset), "extracted"
+                else:
+                    key = self._download_key(asset)
+                    detail = "from store"
+                    if key in mirrored:
+                        mirrored.discard(key)
+                        detail = "from mirror"
+                    elif key in pending:
+                        if key not in results:
+                            results[key] = next(fetched)
+                            detail = format_result(results[key])
+                        else:
+                            detail = "deduplicated"
+                        if not results[key].ok:
+                            print(f"FAILED ({results[key].error})")
+                            continue
+                    blob = self._place(asset)
+            except Exception as e:
+                print(f"FAILED ({e})")
+                continue
+
+            self._record_synced(asset, blob)
+            print(f"done ({detail})")
+            synced.append(asset)
+
+        if self.downloader.files:
+            print(f"\n  {self.downloader.summary()}")
+
+        if synced:
+            if self.on_batch:
+                self.on_batch(synced)
+            self.state.last_sync = datetime.now().isoformat()
+
+        # Repos with a failed download are rescanned next time
+        self._commit_repo_heads({a.source for a in to_sync if a not in synced})
+        self.save_state()
+
+        return synced
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+haKCAssets test helpers - a local stand-in for api.github.com and raw.githubusercontent.com
+
+A threaded http.server with canned routes, injectable faults, rate-limit
+headers and dropped connections, shared by the sync test modules.
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ORG = "haKC-ai"
+
+
+class FakeGitHub:
+    """Local HTTP server with canned routes, fault injection and quota headers."""
+
+    def __init__(self):
+        self.routes: dict[str, tuple] = {}  # path -> (status, body, headers)
+        self.faults: dict[str, list] = {}  # path -> [(status, headers)] served first
+        self.drops: dict[str, int] = {}  # path -> bytes sent before dropping the connection (once)
+        self.quota = None  # (limit, remaining) reported on every response
+        self.delay = 0.0
+        self.requests: list[tuple] = []  # (path, headers)
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def route(self, path: str, body, status: int = 200, headers: dict = None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.routes[path] = (status, body, headers or {})
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, headers: dict, sent: int = None):
+                self.send_response(status)
+                merged = {}
+                if fake.quota:
+                    merged = {"X-RateLimit-Limit": str(fake.quota[0]),
+                              "X-RateLimit-Remaining": str(fake.quota[1]),
+                              "X-RateLimit-Reset": str(int(time.time()) + 3600),
+                              "X-RateLimit-Resource": "core"}
+                merged.update(headers)
+                merged["Content-Length"] = str(len(body))
+                for name, value in merged.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body if sent is None else body[:sent])
+                if sent is not None:
+                    self.close_connection = True
+
+            def do_GET(self):
+                path = self.path.lstrip("/")
+                with fake.lock:
+                    fake.requests.append((path, dict(self.headers)))
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    fault = fake.faults[path].pop(0) if fake.faults.get(path) else None
+                    drop = fake.drops.pop(path, None)
+                try:
+                    time.sleep(fake.delay)
+                    if fault:
+                        return self._send(fault[0], b'{"message": "fault"}', fault[1])
+                    if path not in fake.routes:
+                        return self._send(404, b'{"message": "Not Found"}', {})
+                    status, body, headers = fake.routes[path]
+                    start = 0
+                    byte_range = self.headers.get("Range", "")
+                    if status == 200 and byte_range.startswith("bytes="):
+                        start = int(byte_range[6:].split("-")[0])
+                        if start >= len(body):
+                            return self._send(416, b"", {"Content-Range": f"bytes */{len(body)}"})
+                        status = 206
+                        headers = {**headers, "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"}
+                    self._send(status, body[start:], headers, drop)
+                finally:
+                    with fake.lock:
+                        fake.in_flight -= 1
+
+        return Handler
+
+
+class ServerTestCase(unittest.TestCase):
+    """A FakeGitHub and a scratch directory per test."""
+
+    def setUp(self):
+        self.server = FakeGitHub()
+        self.addCleanup(self.server.close)
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
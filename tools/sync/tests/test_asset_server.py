@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+haKCAssets asset server tests - ETags, conditional GETs, ranges and gzip over a scratch repos/
+"""
+
+import gzip
+import http.client
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from asset_server import AssetServer, etag_matches, parse_range
+from blob_store import git_blob_sha
+from manifest_store import AssetEntry, ManifestStore
+
+LOGO = bytes(range(256)) * 8  # 2 KB
+BANNER = "░▒▓█ haKC █▓▒░\n" * 40
+
+
+class AssetServerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.repos = self.tmp / "repos"
+        (self.repos / "images" / "alpha").mkdir(parents=True)
+        (self.repos / "banners" / "alpha").mkdir(parents=True)
+        self.logo = self.repos / "images" / "alpha" / "logo.png"
+        self.logo.write_bytes(LOGO)
+        (self.repos / "banners" / "alpha" / "banner.txt").write_text(BANNER)
+        (self.repos / "images" / ".manifest.json.prev").write_text("{}")
+        (self.tmp / "secret.txt").write_text("not served")
+
+        self.store = ManifestStore(self.tmp / "manifest.db")
+        self.store.put("images", AssetEntry(
+            filename="logo.png", source_repo="alpha", source_path="media/logo.png",
+            sha=git_blob_sha(LOGO), size=len(LOGO), synced_at="t0", download_url="", blob=git_blob_sha(LOGO)))
+        self.store.commit()
+
+        self.server = AssetServer(("127.0.0.1", 0), self.repos, self.store)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path: str, headers: dict = None, method: str = "GET") -> tuple:
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=5)
+        self.addCleanup(conn.close)
+        conn.request(method, path, headers=headers or {})
+        resp = conn.getresponse()
+        return resp.status, {k.lower(): v for k, v in resp.getheaders()}, resp.read()
+
+    def test_etag_is_blob_sha_and_mtime(self):
+        status, headers, body = self.get("/repos/images/alpha/logo.png")
+        self.assertEqual((status, body), (200, LOGO))
+        self.assertTrue(headers["etag"].startswith(f'"{git_blob_sha(LOGO)}-'))
+
+        # Same size, new bytes: the tag changes even though the manifest wasn't updated
+        self.logo.write_bytes(LOGO[::-1])
+        _, edited, body = self.get("/repos/images/alpha/logo.png")
+        self.assertEqual(body, LOGO[::-1])
+        self.assertNotEqual(edited["etag"], headers["etag"])
+
+    def test_if_none_match_answers_304(self):
+        _, headers, _ = self.get("/repos/images/alpha/logo.png")
+        etag = headers["etag"]
+        for inm in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            status, _, body = self.get("/repos/images/alpha/logo.png", {"If-None-Match": inm})
+            self.assertEqual((status, body), (304, b""), inm)
+        status, _, _ = self.get("/repos/images/alpha/logo.png", {"If-None-Match": '"other"'})
+        self.assertEqual(status, 200)
+
+    def test_ranges(self):
+        status, headers, body = self.get("/repos/images/alpha/logo.png", {"Range": "bytes=100-199"})
+        self.assertEqual((status, body), (206, LOGO[100:200]))
+        self.assertEqual(headers["content-range"], f"bytes 100-199/{len(LOGO)}")
+
+        status, _, body = self.get("/repos/images/alpha/logo.png", {"Range": "bytes=-10"})
+        self.assertEqual((status, body), (206, LOGO[-10:]))
+
+        status, headers, _ = self.get("/repos/images/alpha/logo.png", {"Range": f"bytes={len(LOGO)}-"})
+        self.assertEqual(status, 416)
+        self.assertEqual(headers["content-range"], f"bytes */{len(LOGO)}")
+
+        # A stale If-Range gets the whole file
+        status, _, body = self.get("/repos/images/alpha/logo.png",
+                                   {"Range": "bytes=0-9", "If-Range": '"stale"'})
+        self.assertEqual((status, body), (200, LOGO))
+
+    def test_gzip_for_banners_with_its_own_tag(self):
+        status, plain, _ = self.get("/repos/banners/alpha/banner.txt")
+        self.assertEqual(status, 200)
+        status, headers, body = self.get("/repos/banners/alpha/banner.txt", {"Accept-Encoding": "gzip"})
+        self.assertEqual(headers["content-encoding"], "gzip")
+        self.assertEqual(gzip.decompress(body).decode(), BANNER)
+        self.assertNotEqual(headers["etag"], plain["etag"])
+        self.assertEqual(headers["vary"], "Accept-Encoding")
+
+        # Ranges are of the identity encoding
+        _, headers, body = self.get("/repos/banners/alpha/banner.txt",
+                                    {"Accept-Encoding": "gzip", "Range": "bytes=0-2"})
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual(body, BANNER.encode()[:3])
+
+    def test_nothing_outside_repos_or_dot_prefixed(self):
+        for path in ("/repos/../secret.txt", "/repos/%2e%2e/secret.txt", "/secret.txt",
+                     "/repos/images/.manifest.json.prev", "/repos/images/alpha/..%2f..%2f..%2fsecret.txt"):
+            status, _, _ = self.get(path)
+            self.assertEqual(status, 404, path)
+        status, headers, _ = self.get("/")
+        self.assertEqual((status, headers["location"]), (302, "/repos/manifest.json"))
+
+    def test_head_sends_no_body(self):
+        status, headers, body = self.get("/repos/images/alpha/logo.png", method="HEAD")
+        self.assertEqual((status, body), (200, b""))
+        self.assertEqual(headers["content-length"], str(len(LOGO)))
+
+
+class HeaderParsingTests(unittest.TestCase):
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-500", 100), (0, 99))
+        self.assertEqual(parse_range("bytes=100-", 100), (100, 100))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("items=0-1", 100))
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('W/"a", "b"', '"a"'))
+        self.assertTrue(etag_matches('"a"', 'W/"a"'))
+        self.assertFalse(etag_matches('"ab"', '"a"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+haKCAssets directory index tests - cached totals, re-listing only directories that changed
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dir_index import DirIndex
+
+
+class DirIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.index_file = self.root / ".hakc_cache" / "dirindex.json"
+        self.repos = self.root / "repos"
+        for rel, size in (("images/alpha/a.png", 10), ("images/alpha/b.png", 20),
+                          ("images/beta/c.png", 5), ("images/manifest.json", 100),
+                          ("images/beta/.c.png.123.tmp", 7), ("images/beta/d.png.partial", 9)):
+            path = self.repos / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * size)
+
+    def index(self) -> DirIndex:
+        return DirIndex(self.index_file, self.root)
+
+    def test_totals_skip_temp_partial_and_excluded_files(self):
+        index = self.index()
+        self.assertEqual(index.totals(self.repos / "images", frozenset({"manifest.json"})), (3, 35))
+        self.assertEqual(index.totals(self.repos / "fonts"), (0, 0))
+        self.assertEqual(index.subdirs(self.repos / "images"), ["alpha", "beta"])
+
+    def test_unchanged_tree_is_not_relisted(self):
+        first = self.index()
+        first.totals(self.repos)
+        first.save()
+        self.assertEqual(first.rescanned, 4)
+
+        second = self.index()
+        self.assertEqual(second.totals(self.repos), (4, 135))
+        self.assertEqual(second.rescanned, 0)
+
+    def test_only_changed_directories_are_relisted(self):
+        first = self.index()
+        first.totals(self.repos)
+        first.save()
+
+        (self.repos / "images" / "beta" / "e.png").write_bytes(b"x" * 50)
+        second = self.index()
+        self.assertEqual(second.totals(self.repos), (5, 185))
+        self.assertEqual(second.rescanned, 1)
+
+    def test_save_drops_vanished_directories(self):
+        first = self.index()
+        first.totals(self.repos)
+        first.save()
+
+        shutil.rmtree(self.repos / "images" / "alpha")
+        second = self.index()
+        self.assertEqual(second.totals(self.repos), (2, 105))
+        second.save()
+        self.assertNotIn("repos/images/alpha", json.loads(self.index_file.read_text()))
+
+    def test_unreadable_index_starts_over(self):
+        self.index_file.parent.mkdir(parents=True)
+        self.index_file.write_text("{not json")
+        index = self.index()
+        self.assertEqual(index.totals(self.repos), (4, 135))
+        self.assertEqual(index.rescanned, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+haKCAssets downloader tests - resumable, verified downloads from a local server
+"""
+
+import unittest
+from unittest import mock
+
+from fake_github import ServerTestCase
+
+import downloader
+from blob_store import git_blob_sha
+from downloader import Downloader
+
+
+class DownloaderTests(ServerTestCase):
+
+    DATA = bytes(range(256)) * 1024  # 256 KB, several chunks
+
+    def setUp(self):
+        super().setUp()
+        patch = mock.patch.object(downloader, "RETRY_DELAY", 0)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.server.route("f.bin", self.DATA)
+        self.downloader = Downloader(max_workers=2, timeout=5)
+        self.addCleanup(self.downloader.close)
+        self.dest = self.tmp / "out" / "f.bin"
+
+    def _ranges(self) -> list:
+        return [headers.get("Range") for path, headers in self.server.requests if path == "f.bin"]
+
+    def test_resumes_after_dropped_connection(self):
+        self.server.drops["f.bin"] = 100_000
+        result = self.downloader.fetch(f"{self.server.url}/f.bin", self.dest,
+                                       len(self.DATA), git_blob_sha(self.DATA))
+        self.assertTrue(result.ok, result.error)
+        self.assertEqual(self.dest.read_bytes(), self.DATA)
+        self.assertEqual(self._ranges(), [None, "bytes=100000-"])
+
+    def test_resumes_existing_partial(self):
+        self.dest.parent.mkdir(parents=True)
+        (self.tmp / "out" / "f.bin.partial").write_bytes(self.DATA[:5000])
+        result = self.downloader.fetch(f"{self.server.url}/f.bin", self.dest, len(self.DATA))
+        self.assertTrue(result.ok, result.error)
+        self.assertEqual(self.dest.read_bytes(), self.DATA)
+        self.assertEqual(self._ranges(), ["bytes=5000-"])
+        self.assertEqual(result.bytes, len(self.DATA) - 5000)
+
+    def test_partials_stay_out_of_the_dest_dir(self):
+        staged = Downloader(partial_dir=self.tmp / "tmp", retries=0)
+        self.addCleanup(staged.close)
+        self.server.drops["f.bin"] = 100_000
+        url = f"{self.server.url}/f.bin"
+        self.assertFalse(staged.fetch(url, self.dest, len(self.DATA)).ok)
+        self.assertEqual(list(self.dest.parent.iterdir()), [])
+        self.assertEqual(list((self.tmp / "tmp").iterdir()), [staged.partial_path(self.dest)])
+
+        self.assertTrue(staged.fetch(url, self.dest, len(self.DATA)).ok)
+        self.assertEqual(self.dest.read_bytes(), self.DATA)
+        self.assertEqual(self._ranges(), [None, "bytes=100000-"])
+        self.assertEqual(list((self.tmp / "tmp").iterdir()), [])
+        self.assertNotEqual(staged.partial_path(self.tmp / "a" / "f.bin"), staged.partial_path(self.dest))
+
+    def test_sha_mismatch_is_never_promoted(self):
+        result = self.downloader.fetch(f"{self.server.url}/f.bin", self.dest,
+                                       len(self.DATA), git_blob_sha(b"something else"))
+        self.assertFalse(result.ok)
+        self.assertIn("sha mismatch", result.error)
+        self.assertFalse(self.dest.exists())
+        self.assertFalse((self.tmp / "out" / "f.bin.partial").exists())
+
+    def test_http_error_is_permanent(self):
+        result = self.downloader.fetch(f"{self.server.url}/missing.bin", self.dest)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error, "HTTP 404")
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_token_goes_to_auth_hosts_only(self):
+        other = self.server.url.replace("127.0.0.1", "localhost")
+        self.server.route("private.bin", b"", status=302, headers={"Location": f"{other}/f.bin"})
+        calls = []
+        authed = Downloader(token=lambda: calls.append(1) or "s3cret", auth_hosts=("127.0.0.1",))
+        self.addCleanup(authed.close)
+
+        self.assertTrue(authed.fetch(f"{self.server.url}/private.bin", self.dest, len(self.DATA)).ok)
+        self.assertTrue(authed.fetch(f"{self.server.url}/f.bin", self.tmp / "again").ok)
+        auth = [(path, headers.get("Authorization")) for path, headers in self.server.requests]
+        self.assertEqual(auth, [("private.bin", "token s3cret"), ("f.bin", None), ("f.bin", "token s3cret")])
+        self.assertEqual(len(calls), 1)
+
+    def test_no_token_for_other_hosts(self):
+        authed = Downloader(token=lambda: "s3cret")
+        self.addCleanup(authed.close)
+        self.assertTrue(authed.fetch(f"{self.server.url}/f.bin", self.dest).ok)
+        self.assertNotIn("Authorization", self.server.requests[0][1])
+
+    def test_fetch_all_keeps_input_order(self):
+        self.server.route("g.bin", b"g")
+        jobs = [(f"{self.server.url}/f.bin", self.tmp / "a"), (f"{self.server.url}/g.bin", self.tmp / "b")]
+        results = list(self.downloader.fetch_all(jobs))
+        self.assertEqual([r.dest.name for r in results], ["a", "b"])
+        self.assertTrue(all(r.ok for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+haKCAssets git mirror tests - GitMirrorSource against a local directory of repos
+"""
+
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from fake_github import ORG
+
+from api_cache import ResponseCache
+from blob_store import git_blob_sha
+from git_mirror import GitMirror
+from sources import GitMirrorSource
+
+
+def _git(*args, cwd: Path):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=cwd, check=True, capture_output=True)
+
+
+@unittest.skipUnless(shutil.which("git"), "git not installed")
+class GitMirrorSourceTests(unittest.TestCase):
+    """A local directory of repos as the remote ({remote}/{org}/{repo})."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.remote = self.tmp / "remote"
+        self.repo = self.remote / ORG / "alpha"
+        (self.repo / "media").mkdir(parents=True)
+        (self.repo / "src").mkdir()
+        (self.repo / "logo.png").write_bytes(b"PNG-ish")
+        (self.repo / "media" / "banner.txt").write_text("░▒▓ alpha ▓▒░")
+        (self.repo / "src" / "main.py").write_text("print('hi')")
+        _git("init", "-q", "-b", "main", cwd=self.repo)
+        _git("config", "uploadpack.allowFilter", "true", cwd=self.repo)
+        _git("config", "uploadpack.allowAnySHA1InWant", "true", cwd=self.repo)
+        _git("add", "-A", cwd=self.repo)
+        _git("commit", "-qm", "init", cwd=self.repo)
+
+        self.cache = ResponseCache(self.tmp / "root" / ".hakc_cache" / "api")
+        self.source = GitMirrorSource(ORG, self.cache, remote=str(self.remote))
+        self.addCleanup(self.source.close)
+
+    def _files(self, source=None) -> dict:
+        source = source or self.source
+        source.begin_scan()
+        return {f["path"]: f for f in source.list_files("alpha", ["media"])}
+
+    def test_lists_repos_and_files_from_local_remote(self):
+        repos = self.source.list_repos()
+        self.assertEqual([r["name"] for r in repos], ["alpha"])
+        head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=self.repo,
+                              capture_output=True, text=True).stdout.strip()
+        self.assertEqual(repos[0]["pushedAt"], head)
+
+        files = self._files()
+        self.assertEqual(sorted(files), ["logo.png", "media/banner.txt"])
+        self.assertEqual(files["logo.png"]["size"], len(b"PNG-ish"))
+        self.assertEqual(files["logo.png"]["sha"], git_blob_sha(b"PNG-ish"))
+
+    def test_reads_texts_and_blobs_locally(self):
+        files = self._files()
+        texts = self.source.fetch_texts([("alpha", files["media/banner.txt"])])
+        self.assertEqual(texts[("alpha", "media/banner.txt")], "░▒▓ alpha ▓▒░")
+
+        dest = self.tmp / "logo.png"
+        self.assertTrue(self.source.fetch_blob("alpha", files["logo.png"]["sha"], dest))
+        self.assertEqual(dest.read_bytes(), b"PNG-ish")
+
+        mirror = self.source.mirror("alpha")
+        self.source.close()
+        self.assertIsNone(mirror._batch)
+
+    def test_never_fetches_missing_blobs_lazily(self):
+        self._files()
+        scanned = self.source.mirror("alpha")
+        mirror = GitMirror(scanned.path, scanned.url)  # a fresh cat-file process
+        self.addCleanup(mirror.close)
+        unlisted = git_blob_sha(b"print('hi')")  # src/ isn't a source dir, so never prefetched
+        self.assertIn(unlisted, mirror.missing())
+        self.assertIsNone(mirror.size(unlisted))
+        self.assertIsNone(mirror.read(unlisted))
+        self.assertFalse(mirror.copy_to(unlisted, self.tmp / "main.py"))
+        self.assertIn(unlisted, mirror.missing())
+
+    def test_works_offline_from_existing_mirror(self):
+        self._files()
+        self.remote.rename(self.tmp / "gone")
+        repos = self.source.list_repos()
+        self.assertEqual([r["name"] for r in repos], ["alpha"])
+        self.assertEqual(sorted(self._files()), ["logo.png", "media/banner.txt"])
+        self.assertIn("1 offline", self.source.end_scan())
+
+    def test_follows_changed_default_branch(self):
+        self._files()
+        _git("checkout", "-q", "-b", "next", cwd=self.repo)
+        (self.repo / "media" / "new.png").write_bytes(b"new")
+        _git("add", "-A", cwd=self.repo)
+        _git("commit", "-qm", "next", cwd=self.repo)
+        self.assertIn("media/new.png", self._files())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+haKCAssets GraphQL batch tests - response parsing for batched blob text queries
+"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from graphql_batch import parse_response
+
+
+class GraphQLResponseTests(unittest.TestCase):
+
+    ALIASES = {("r0", "f0"): ("alpha", "README.md"), ("r1", "f0"): ("beta", "README.md")}
+
+    def test_errors_without_data_fail_the_batch(self):
+        output = json.dumps({"data": None, "errors": [{"type": "RATE_LIMITED", "message": "slow down"}]})
+        self.assertIsNone(parse_response(output, self.ALIASES))
+
+    def test_field_errors_leave_those_files_out(self):
+        output = json.dumps({"data": {"r0": {"f0": {"text": "hi", "isBinary": False}}, "r1": None},
+                             "errors": [{"path": ["r1"], "message": "timeout"}]})
+        self.assertEqual(parse_response(output, self.ALIASES), {("alpha", "README.md"): "hi"})
+
+    def test_missing_blobs_map_to_none(self):
+        output = json.dumps({"data": {"r0": {"f0": None}, "r1": {"f0": {"text": "x", "isBinary": True}}}})
+        self.assertEqual(parse_response(output, self.ALIASES),
+                         {("alpha", "README.md"): None, ("beta", "README.md"): None})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+haKCAssets image size tests - dimensions from hand-built headers of each format
+"""
+
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from imagesize import get_image_dimensions
+
+
+def png(w: int, h: int) -> bytes:
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", w, h) + b"\x08\x06\x00\x00\x00"
+
+
+def gif(w: int, h: int) -> bytes:
+    return b"GIF89a" + struct.pack("<HH", w, h) + b"\x00" * 8
+
+
+def jpeg(w: int, h: int) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    dqt = b"\xff\xdb" + struct.pack(">H", 67) + b"\x00" * 65
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, h, w) + b"\x03" + b"\x00" * 9
+    return b"\xff\xd8" + app0 + dqt + b"\xff" + sof0  # with a fill byte before SOF0
+
+
+def webp_vp8x(w: int, h: int) -> bytes:
+    payload = b"\x00" * 4 + (w - 1).to_bytes(3, "little") + (h - 1).to_bytes(3, "little")
+    return b"RIFF" + struct.pack("<I", 4 + 8 + len(payload)) + b"WEBP" + b"VP8X" + struct.pack("<I", 10) + payload
+
+
+def ico(*sizes: tuple) -> bytes:
+    data = struct.pack("<HHH", 0, 1, len(sizes))
+    for w, h in sizes:
+        data += bytes([w % 256, h % 256]) + b"\x00" * 14
+    return data
+
+
+class ImageSizeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    def dims(self, name: str, data) -> tuple:
+        path = self.tmp / name
+        path.write_bytes(data if isinstance(data, bytes) else data.encode())
+        return get_image_dimensions(path)
+
+    def test_binary_formats(self):
+        self.assertEqual(self.dims("a.png", png(640, 480)), (640, 480))
+        self.assertEqual(self.dims("a.gif", gif(88, 31)), (88, 31))
+        self.assertEqual(self.dims("a.jpg", jpeg(1920, 1080)), (1920, 1080))
+        self.assertEqual(self.dims("a.webp", webp_vp8x(300, 200)), (300, 200))
+
+    def test_ico_reports_largest_entry(self):
+        self.assertEqual(self.dims("a.ico", ico((16, 16), (256, 256), (32, 32))), (256, 256))
+
+    def test_svg_size_attributes_and_viewbox(self):
+        self.assertEqual(self.dims("a.svg", '<svg xmlns="http://www.w3.org/2000/svg" width="24px" height="12">'),
+                         (24, 12))
+        self.assertEqual(self.dims("b.svg", '<?xml version="1.0"?>\n<svg viewBox="0 0 100 50.4">'), (100, 50))
+        self.assertEqual(self.dims("c.svg", '<svg width="100%" height="100%" viewBox="0,0,64,64">'), (64, 64))
+
+    def test_type_comes_from_the_header_not_the_name(self):
+        self.assertEqual(self.dims("really_a_png.jpg", png(10, 20)), (10, 20))
+
+    def test_unknown_truncated_or_missing_is_zero(self):
+        self.assertEqual(self.dims("a.txt", "just text"), (0, 0))
+        self.assertEqual(self.dims("cut.jpg", jpeg(10, 10)[:30]), (0, 0))
+        self.assertEqual(self.dims("cut.gif", b"GIF89a\x01"), (0, 0))
+        self.assertEqual(get_image_dimensions(self.tmp / "gone.png"), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
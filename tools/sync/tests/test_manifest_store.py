@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+haKCAssets manifest store tests - the SQLite record of synced assets, its JSON
+exports, and the master manifest patched from it
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from dataclasses import asdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hakc_assets import HaKCAssets, MasterManifest
+from manifest_store import AssetEntry, ManifestStore, export_key, local_relpath
+from persist import previous_path
+from sync_core import Asset
+
+
+def entry(repo: str, path: str, sha: str = "a" * 40, filename: str = None, size: int = 10,
+          synced_at: str = "2026-10-01T00:00:00") -> AssetEntry:
+    return AssetEntry(filename=filename or path.replace("/", "__"), source_repo=repo, source_path=path,
+                      sha=sha, size=size, synced_at=synced_at, download_url=f"https://example/{repo}/{path}",
+                      blob=sha)
+
+
+class ManifestStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.repos = self.tmp / "repos"
+        self.store = ManifestStore(self.tmp / "manifest.db", legacy_dir=self.repos)
+
+    def test_same_filename_from_two_repos_coexists(self):
+        self.store.put("images", entry("alpha", "logo.png"))
+        self.store.put("images", entry("beta", "logo.png"))
+        self.assertEqual([e.source_repo for _, e in self.store.entries("images")], ["alpha", "beta"])
+        self.assertEqual(self.store.at_path("images/beta/logo.png").source_repo, "beta")
+
+    def test_put_returns_the_replaced_entry(self):
+        self.assertIsNone(self.store.put("images", entry("alpha", "logo.png", sha="a" * 40)))
+        previous = self.store.put("images", entry("alpha", "logo.png", sha="b" * 40))
+        self.assertEqual(previous.sha, "a" * 40)
+        self.assertEqual(self.store.get("images", "alpha", "logo.png").sha, "b" * 40)
+
+    def test_a_local_path_has_one_owner(self):
+        self.store.put("images", entry("alpha", "media/logo.png", filename="logo.png"))
+        previous = self.store.put("images", entry("alpha", "logo.png"))
+        self.assertEqual(previous.source_path, "media/logo.png")
+        self.assertEqual([e.source_path for _, e in self.store.entries()], ["logo.png"])
+
+    def test_lookups_by_repo_and_sha(self):
+        self.store.put("images", entry("alpha", "logo.png", sha="c" * 40))
+        self.store.put("icons", entry("beta", "icon.png", sha="c" * 40))
+        self.store.put("icons", entry("alpha", "other.png", sha="d" * 40))
+        self.assertEqual(sorted(e.source_path for _, e in self.store.by_repo("alpha")), ["logo.png", "other.png"])
+        self.assertEqual([(t, e.source_repo) for t, e in self.store.by_sha("c" * 40)],
+                         [("icons", "beta"), ("images", "alpha")])
+        self.assertEqual(self.store.counts(), {"icons": {"alpha": 1, "beta": 1}, "images": {"alpha": 1}})
+
+    def test_remove(self):
+        self.store.put("images", entry("alpha", "logo.png"))
+        self.store.remove("images", "alpha", "logo.png")
+        self.assertIsNone(self.store.get("images", "alpha", "logo.png"))
+
+    def test_commit_persists_across_connections(self):
+        self.store.put("images", entry("alpha", "logo.png"))
+        self.store.commit()
+        reopened = ManifestStore(self.tmp / "manifest.db")
+        self.assertEqual(reopened.get("images", "alpha", "logo.png").sha, "a" * 40)
+
+    def test_export_keys_by_path_under_the_type_dir(self):
+        e = entry("alpha", "media/logo.png")
+        self.store.put("images", e)
+        path = self.repos / "images" / "manifest.json"
+        self.store.export("images", path)
+        data = json.loads(path.read_text())
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(list(data["assets"]), ["alpha/media__logo.png"])
+        self.assertEqual(export_key("images", e), "alpha/media__logo.png")
+        self.assertEqual(local_relpath("images", e), "images/alpha/media__logo.png")
+
+    def test_imports_legacy_json_manifests_once(self):
+        legacy = self.repos / "banners" / "manifest.json"
+        legacy.parent.mkdir(parents=True)
+        legacy.write_text(json.dumps({"assets": {
+            "alpha/banner.txt": {**asdict(entry("alpha", "banner.txt")), "retired_field": 1},
+            "broken": {"filename": "x"},
+        }}))
+        store = ManifestStore(self.tmp / "legacy.db", legacy_dir=self.repos)
+        self.assertEqual([(t, e.filename) for t, e in store.entries()], [("banners", "banner.txt")])
+
+        store.remove("banners", "alpha", "banner.txt")
+        store.commit()
+        reopened = ManifestStore(self.tmp / "legacy.db", legacy_dir=self.repos)
+        self.assertEqual(reopened.entries(), [])
+
+
+
+class MasterManifestTests(unittest.TestCase):
+    """repos/manifest.json patched per sync must match a rebuild from the store."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.manager = HaKCAssets(self.tmp, source="rest")
+        self.addCleanup(self.manager.close)
+        self.path = self.tmp / "repos" / "manifest.json"
+        self.sync([("alpha", "logo.png", "images", "a"), ("beta", "banner.txt", "banners", "b")])
+        self.manager._build_master_manifest()
+
+    def sync(self, assets: list):
+        """Record (repo, path, type, sha char) assets as one sync batch."""
+        batch = [Asset(source=repo, path=path, name=path.replace("/", "__"), sha=c * 40, size=1,
+                       asset_type=asset_type) for repo, path, asset_type, c in assets]
+        for asset in batch:
+            self.manager._add_to_manifest(asset, asset.sha)
+        self.manager._save_manifests(batch)
+
+    def master(self) -> dict:
+        data = json.loads(self.path.read_text())
+        data.pop("generated")
+        for type_data in data["types"].values():
+            type_data["repos"] = {repo: sorted(files) for repo, files in type_data["repos"].items()}
+        for types in data["by_repo"].values():
+            for asset_type in types:
+                types[asset_type] = sorted(types[asset_type])
+        return data
+
+    def rebuilt(self) -> dict:
+        self.manager._build_master_manifest()
+        return self.master()
+
+    def test_new_and_changed_entries_patch_the_index(self):
+        self.sync([("alpha", "images/deep/logo.png", "images", "c"), ("gamma", "icon.png", "icons", "d"),
+                   ("alpha", "logo.png", "images", "e")])
+        patched = self.master()
+        self.assertEqual(patched["total_assets"], 4)
+        self.assertEqual(patched["types"]["images"]["repos"]["alpha"], ["images__deep__logo.png", "logo.png"])
+        self.assertEqual(patched, self.rebuilt())
+
+    def test_content_change_leaves_the_file_alone(self):
+        before = self.path.stat().st_mtime_ns
+        self.sync([("alpha", "logo.png", "images", "f")])
+        self.assertEqual(self.path.stat().st_mtime_ns, before)
+
+    def test_rename_replaces_the_old_name(self):
+        self.manager.manifest_store.put("images", AssetEntry(
+            filename="logo.png", source_repo="alpha", source_path="media/logo.png", sha="9" * 40,
+            size=1, synced_at="t0", download_url=""))
+        self.manager._build_master_manifest()
+        self.manager._master = None
+        self.sync([("alpha", "media/logo.png", "images", "9")])
+        patched = self.master()
+        self.assertEqual(patched["by_repo"]["alpha"]["images"], ["media__logo.png"])
+        self.assertEqual(patched, self.rebuilt())
+
+    def test_duplicate_names_are_rebuilt(self):
+        data = json.loads(self.path.read_text())
+        data["types"]["images"]["repos"]["alpha"] *= 2
+        self.path.write_text(json.dumps(data))
+        previous_path(self.path).unlink(missing_ok=True)
+        self.assertIsNone(MasterManifest(self.path).data)
+        self.manager._master = None
+        self.sync([("gamma", "icon.png", "icons", "d")])
+        self.assertEqual(self.master()["total_assets"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+haKCAssets move journal tests - organize batches interrupted part way, then resumed or rolled back
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import move_journal
+from move_journal import MoveJournal, plan_moves
+
+
+class Crash(Exception):
+    """Stands in for the process dying mid-batch."""
+
+
+class MoveJournalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.journal = MoveJournal(self.root / ".hakc_cache" / "organize.journal", self.root)
+        self.moves = []
+        for name in ("a.png", "b.png", "c.png"):
+            (self.root / name).write_text(name)
+            self.moves.append((self.root / name, self.root / "images" / name))
+
+    def _crash_after(self, n: int):
+        """Run the batch, dying just before move number n."""
+        real = move_journal.move_file
+        calls = []
+
+        def move_file(src, dest):
+            if len(calls) == n:
+                raise Crash()
+            calls.append(src)
+            return real(src, dest)
+
+        with mock.patch.object(move_journal, "move_file", move_file), self.assertRaises(Crash):
+            self.journal.execute(self.moves)
+        self.assertTrue(self.journal.pending())
+
+    def _where(self) -> list:
+        return sorted(str(p.relative_to(self.root)) for p in self.root.rglob("*.png"))
+
+    def test_completed_batch_leaves_no_journal(self):
+        self.journal.execute(self.moves)
+        self.assertFalse(self.journal.pending())
+        self.assertEqual(self._where(), ["images/a.png", "images/b.png", "images/c.png"])
+
+    def test_resume_finishes_the_batch(self):
+        self._crash_after(1)
+        moved = []
+        self.assertEqual(self.journal.resume(on_move=lambda s, d, how: moved.append(d.name)), 2)
+        self.assertEqual(moved, ["b.png", "c.png"])
+        self.assertEqual(self._where(), ["images/a.png", "images/b.png", "images/c.png"])
+        self.assertFalse(self.journal.pending())
+
+    def test_rollback_undoes_done_moves(self):
+        self._crash_after(2)
+        self.assertEqual(self.journal.rollback(), 2)
+        self.assertEqual(self._where(), ["a.png", "b.png", "c.png"])
+        self.assertFalse(self.journal.pending())
+
+    def test_move_landed_without_its_done_record(self):
+        self._crash_after(1)
+        (self.root / "b.png").rename(self.root / "images" / "b.png")
+        self.assertEqual(self.journal.resume(), 1)
+        self.assertEqual(self._where(), ["images/a.png", "images/b.png", "images/c.png"])
+
+    def test_cross_device_copy_left_at_both_ends(self):
+        self._crash_after(1)
+        shutil.copy2(self.root / "b.png", self.root / "images" / "b.png")
+        self.assertEqual(self.journal.rollback(), 2)
+        self.assertEqual(self._where(), ["a.png", "b.png", "c.png"])
+
+    def test_torn_final_line_is_ignored(self):
+        self._crash_after(1)
+        with open(self.journal.path, "a") as f:
+            f.write('{"done": ')
+        _, done = self.journal._read()
+        self.assertEqual(done, {0})
+        self.assertEqual(self.journal.resume(), 2)
+
+    def test_journal_paths_are_relative_to_root(self):
+        self._crash_after(0)
+        plan = json.loads(self.journal.path.read_text().splitlines()[0])["plan"]
+        self.assertEqual(plan[0], ["a.png", "images/a.png"])
+
+    def test_plan_rejects_collisions(self):
+        (self.root / "images").mkdir()
+        (self.root / "images" / "a.png").write_text("already there")
+        twice = (self.root / "d.png", self.root / "images" / "b.png")
+        moves, collisions = plan_moves(self.moves + [twice])
+        self.assertEqual([d.name for _, d in moves], ["b.png", "c.png"])
+        self.assertEqual(collisions, [self.moves[0], twice])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+haKCAssets persist tests - atomic JSON writes and the .prev fallback
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import persist
+from persist import previous_path, read_json, write_json
+
+
+class PersistTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.path = self.tmp / ".sync_state.json"
+
+    def read(self, **kwargs):
+        with contextlib.redirect_stderr(io.StringIO()):
+            return read_json(self.path, **kwargs)
+
+    def test_keeps_one_previous_generation(self):
+        write_json(self.path, {"n": 1})
+        self.assertFalse(previous_path(self.path).exists())
+        write_json(self.path, {"n": 2})
+        write_json(self.path, {"n": 3})
+        self.assertEqual(previous_path(self.path).name, ".sync_state.json.prev")
+        self.assertEqual(read_json(previous_path(self.path)), {"n": 2})
+        self.assertEqual(read_json(self.path), {"n": 3})
+
+    def test_falls_back_to_prev_when_damaged_or_missing(self):
+        write_json(self.path, {"n": 1})
+        write_json(self.path, {"n": 2})
+        self.path.write_text('{"n": 3, "assets": {"trunc')
+        self.assertEqual(self.read(), {"n": 1})
+        self.path.unlink()
+        self.assertEqual(self.read(), {"n": 1})
+
+    def test_validate_rejects_parseable_but_unusable(self):
+        write_json(self.path, {"version": 3})
+        write_json(self.path, ["not", "a", "dict"])
+        self.assertEqual(self.read(validate=lambda d: isinstance(d, dict)), {"version": 3})
+        self.assertEqual(self.read(default={}, validate=lambda d: False), {})
+
+    def test_failed_write_leaves_old_file_and_no_temp(self):
+        write_json(self.path, {"n": 1})
+        with mock.patch.object(persist.os, "replace", side_effect=OSError("disk full")), \
+                self.assertRaises(OSError):
+            write_json(self.path, {"n": 2}, keep_previous=False)
+        self.assertEqual(read_json(self.path), {"n": 1})
+        self.assertEqual(os.listdir(self.tmp), [".sync_state.json"])
+
+    def test_unserializable_data_never_touches_the_file(self):
+        write_json(self.path, {"n": 1})
+        with self.assertRaises(TypeError):
+            write_json(self.path, {"n": object()})
+        self.assertEqual(read_json(self.path), {"n": 1})
+        self.assertFalse(previous_path(self.path).exists())
+
+    def test_previous_is_a_hardlink_when_possible(self):
+        write_json(self.path, {"n": 1})
+        before = self.path.stat().st_ino
+        write_json(self.path, {"n": 2})
+        self.assertEqual(previous_path(self.path).stat().st_ino, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+haKCAssets query tests - manifest filters and their JSON Lines / TSV output
+"""
+
+import argparse
+import io
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from hakc_assets import QUERY_FIELDS, HaKCAssets, parse_size
+from manifest_store import AssetEntry
+
+ENTRIES = [
+    # (type, repo, source path, size, synced_at)
+    ("images", "alpha", "logo.png", 2048, "2026-09-01T10:00:00"),
+    ("images", "alpha", "media/hero.jpg", 3 * 1024 * 1024, "2026-10-02T10:00:00"),
+    ("images", "beta", "logo.png", 512, "2026-10-05T10:00:00"),
+    ("banners", "beta", "banner\tart.txt", 900, "2026-10-06T10:00:00"),
+]
+
+
+class QueryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.manager = HaKCAssets(self.tmp, source="rest")
+        self.addCleanup(self.manager.close)
+        for asset_type, repo, path, size, synced_at in ENTRIES:
+            self.manager.manifest_store.put(asset_type, AssetEntry(
+                filename=path.replace("/", "__"), source_repo=repo, source_path=path, sha="a" * 40,
+                size=size, synced_at=synced_at, download_url="", blob="a" * 40))
+
+    def paths(self, **filters) -> list:
+        out = io.StringIO()
+        count = self.manager.query(out=out, **filters)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(count, len(rows))
+        return [f"{r['repo']}/{r['path']}" for r in rows]
+
+    def test_no_filters_lists_everything_in_order(self):
+        self.assertEqual(self.paths(), ["beta/banner\tart.txt", "alpha/logo.png", "alpha/media/hero.jpg",
+                                        "beta/logo.png"])
+
+    def test_type_and_repo(self):
+        self.assertEqual(self.paths(asset_type="images", repo="beta"), ["beta/logo.png"])
+        self.assertEqual(self.paths(repo="gamma"), [])
+
+    def test_glob_on_filename_or_local_path(self):
+        self.assertEqual(self.paths(glob="logo.*"), ["alpha/logo.png", "beta/logo.png"])
+        self.assertEqual(self.paths(glob="images/alpha/*"), ["alpha/logo.png", "alpha/media/hero.jpg"])
+        self.assertEqual(self.paths(glob="media__*"), ["alpha/media/hero.jpg"])
+
+    def test_size_and_since(self):
+        self.assertEqual(self.paths(min_size=parse_size("1K"), max_size=parse_size("1M")), ["alpha/logo.png"])
+        self.assertEqual(self.paths(since="2026-10-05"), ["beta/banner\tart.txt", "beta/logo.png"])
+
+    def test_jsonl_rows_carry_local_path(self):
+        out = io.StringIO()
+        self.manager.query(out=out, repo="alpha", glob="logo.png")
+        row = json.loads(out.getvalue())
+        self.assertEqual(list(row), QUERY_FIELDS)
+        self.assertEqual(row["local_path"], "repos/images/alpha/logo.png")
+
+    def test_tsv_has_a_header_and_one_line_per_row(self):
+        out = io.StringIO()
+        self.assertEqual(self.manager.query(fmt="tsv", out=out, asset_type="banners"), 1)
+        header, line = out.getvalue().splitlines()
+        self.assertEqual(header.split("\t"), QUERY_FIELDS)
+        self.assertEqual(line.split("\t")[QUERY_FIELDS.index("path")], "banner art.txt")
+
+    def test_parse_size(self):
+        self.assertEqual([parse_size(s) for s in ("2048", "512K", "1.5M", "1g", "10KB")],
+                         [2048, 512 * 1024, int(1.5 * 1024 ** 2), 1024 ** 3, 10 * 1024])
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_size("big")
+
+
+if __name__ == "__main__":
+    unittest.main()
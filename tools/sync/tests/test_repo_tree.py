@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+haKCAssets repo tree tests - picking asset candidates from a recursive tree
+listing, and the local names they sync under
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fake_github import ORG, ServerTestCase
+
+import repo_tree
+from blob_store import git_blob_sha
+from hakc_assets import HaKCAssets
+from manifest_store import AssetEntry
+from repo_tree import parse_tree, select_files
+from sync_org import OrgScanner
+
+RULES = Path(__file__).resolve().parent.parent.parent.parent / "asset_rules.json"
+SOURCE_DIRS = ["images", "assets", "icons"]  # asset_rules.json sync.source_dirs, abridged
+
+
+def _blob(path: str) -> dict:
+    return {"type": "blob", "path": path, "sha": "0" * 40, "size": 1}
+
+
+class SelectFilesTests(unittest.TestCase):
+
+    def _paths(self, *paths: str) -> list:
+        tree = [_blob(p) for p in paths] + [{"type": "tree", "path": "images"}]
+        return [f["path"] for f in select_files(tree, ORG, "alpha", SOURCE_DIRS)]
+
+    def test_keeps_root_files_and_anything_below_a_source_dir(self):
+        self.assertEqual(self._paths("logo.png", "images/logo.png", "Assets/deep/er/icon.svg"),
+                         ["logo.png", "images/logo.png", "Assets/deep/er/icon.svg"])
+
+    def test_ignores_source_dir_names_nested_elsewhere(self):
+        self.assertEqual(self._paths("node_modules/pkg/images/logo.png",
+                                     "src/x/assets/icon.png",
+                                     "docs/vendor/icons/a.svg",
+                                     "src/main.py"),
+                         [])
+
+    def test_entries_are_contents_shaped(self):
+        entry = select_files([_blob("images/a b.png")], ORG, "alpha", SOURCE_DIRS)[0]
+        self.assertEqual(entry["name"], "a b.png")
+        self.assertEqual(entry["type"], "file")
+        self.assertTrue(entry["download_url"].endswith(f"/{ORG}/alpha/HEAD/images/a%20b.png"))
+
+    def test_truncated_tree_is_unusable(self):
+        self.assertIsNone(parse_tree('{"truncated": true, "tree": []}'))
+        self.assertIsNone(parse_tree("not json"))
+        self.assertEqual(parse_tree('{"truncated": false, "tree": []}'), [])
+
+
+
+class LocalNameTests(ServerTestCase):
+    """Same-named files in one repo, synced through the REST source."""
+
+    FILES = {"logo.png": b"root", "images/logo.png": b"images", "images/deep/logo.png": b"deep"}
+
+    def setUp(self):
+        super().setUp()
+        for patch in (mock.patch.dict(os.environ, {"GITHUB_API_URL": self.server.url}),
+                      mock.patch.object(repo_tree, "RAW_BASE", self.server.url)):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.server.route(f"orgs/{ORG}/repos?per_page=100", [{"name": "alpha", "pushed_at": "t1"}])
+        self._publish(self.FILES)
+
+    def _publish(self, files: dict):
+        self.server.route(repo_tree.tree_endpoint(ORG, "alpha"), {"truncated": False, "tree": [
+            {"type": "blob", "path": path, "sha": git_blob_sha(data), "size": len(data)}
+            for path, data in files.items()]})
+        for path, data in files.items():
+            self.server.route(f"{ORG}/alpha/HEAD/{path}", data)
+
+    def _names(self, scanner: OrgScanner) -> dict:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return {a.path: a.name for a in scanner.scan_all()}
+
+    def test_nested_files_are_named_after_their_path(self):
+        scanner = OrgScanner(ORG, repo_root=self.tmp, source="rest")
+        self.addCleanup(scanner.close)
+        self.assertEqual(self._names(scanner), {
+            "logo.png": "logo.png",
+            "images/logo.png": "images__logo.png",
+            "images/deep/logo.png": "images__deep__logo.png",
+        })
+
+    def test_names_do_not_depend_on_siblings(self):
+        scanner = OrgScanner(ORG, repo_root=self.tmp, source="rest")
+        self.addCleanup(scanner.close)
+        before = self._names(scanner)
+        self._publish({"images/deep/logo.png": b"deep"})
+        after = self._names(scanner)
+        self.assertEqual(after, {"images/deep/logo.png": before["images/deep/logo.png"]})
+
+    @unittest.skipUnless(RULES.exists(), "asset_rules.json not found")
+    def test_renamed_entry_leaves_nothing_behind(self):
+        shutil.copy(RULES, self.tmp / "asset_rules.json")
+        self._publish({"images/deep/logo.png": b"deep"})
+
+        # Synced before nested files were path-named: repos/images/alpha/logo.png
+        old = self.tmp / "repos/images/alpha/logo.png"
+        old.parent.mkdir(parents=True)
+        old.write_bytes(b"deep")
+        manager = HaKCAssets(self.tmp, source="rest")
+        self.addCleanup(manager.close)
+        manager.manifest_store.put("images", AssetEntry(
+            filename="logo.png", source_repo="alpha", source_path="images/deep/logo.png",
+            sha=git_blob_sha(b"deep"), size=4, synced_at="t0", download_url=""))
+        manager.state.assets["images/alpha/logo.png"] = git_blob_sha(b"deep")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.sync(manager.scan_all_repos(), dry_run=False)
+
+        self.assertFalse(old.exists())
+        self.assertEqual((self.tmp / "repos/images/alpha/images__deep__logo.png").read_bytes(), b"deep")
+        self.assertEqual(list(manager.state.assets), ["images/alpha/images__deep__logo.png"])
+        self.assertEqual([e.filename for _, e in manager.manifest_store.by_repo("alpha")],
+                         ["images__deep__logo.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+haKCAssets rules tests - content_contains matching, streamed across chunk boundaries
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import rules
+from rules import ANSI_PATTERN, CONTENT_CHUNK, ContentMatcher, FileFeatures, RuleSet
+
+BANNER_RULE = {
+    "id": "ascii_banners", "priority": 5, "destination": "banners",
+    "match": {"extensions": [".txt", ""], "content_contains": ["█", "░"]},
+}
+
+
+class ContentMatcherTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    def write(self, name: str, data) -> Path:
+        path = self.tmp / name
+        path.write_bytes(data if isinstance(data, bytes) else data.encode("utf-8"))
+        return path
+
+    def test_finds_listed_characters_only(self):
+        matcher = ContentMatcher("█░", ansi=False)
+        self.assertEqual(matcher.search(self.write("a.txt", "plain then ░ art")), "░")
+        self.assertIsNone(matcher.search(self.write("b.txt", "▓ is not listed")))
+
+    def test_ansi_escape_counts_by_default(self):
+        path = self.write("c.ans", "\x1b[1;31mred")
+        self.assertEqual(ContentMatcher("█").search(path), ANSI_PATTERN)
+        self.assertIsNone(ContentMatcher("█", ansi=False).search(path))
+
+    def test_multibyte_char_split_across_chunks(self):
+        data = b"x" * (CONTENT_CHUNK - 1) + "█".encode()  # 3 bytes, 1 in the first chunk
+        self.assertEqual(ContentMatcher("█", ansi=False).search(self.write("d.txt", data)), "█")
+
+    def test_ansi_escape_split_across_chunks(self):
+        data = b"x" * (CONTENT_CHUNK - 1) + b"\x1b[0m"
+        self.assertEqual(ContentMatcher("").search(self.write("e.txt", data)), ANSI_PATTERN)
+
+    def test_stops_at_the_scan_limit(self):
+        path = self.write("f.txt", b"x" * (CONTENT_CHUNK * 2) + "█".encode())
+        matcher = ContentMatcher("█", ansi=False)
+        self.assertIsNone(matcher.search(path, limit=CONTENT_CHUNK))
+        self.assertEqual(matcher.search(path), "█")
+
+    def test_missing_file_is_no_hit(self):
+        self.assertIsNone(ContentMatcher("█").search(self.tmp / "gone.txt"))
+
+
+class ContentRuleTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.ruleset = RuleSet([BANNER_RULE])
+
+    def test_rule_fires_only_on_listed_characters(self):
+        art = self.tmp / "art.txt"
+        art.write_text("░▒▓ haKC ▓▒░")
+        notes = self.tmp / "notes.txt"
+        notes.write_text("just notes")
+        self.assertEqual(self.ruleset.destination(art), "banners")
+        self.assertIsNone(self.ruleset.destination(notes))
+
+    def test_content_is_searched_once_per_file(self):
+        art = self.tmp / "art.txt"
+        art.write_text("█")
+        features = FileFeatures(art)
+        with mock.patch.object(ContentMatcher, "search", autospec=True, return_value="█") as search:
+            self.ruleset.explain(features)
+            self.ruleset.match(features)
+        self.assertEqual(search.call_count, 1)
+        self.assertEqual(features.export(), {"content": {"█░": "█"}})
+
+    def test_matchers_are_shared_per_character_set(self):
+        self.assertIs(rules.content_matcher("░█"), rules.content_matcher("█░█"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+haKCAssets sync tests - sources, scheduler and sync core against local stand-ins
+
+FakeGitHub (fake_github.py) plays api.github.com (RestSource via
+$GITHUB_API_URL) and raw.githubusercontent.com. Nothing touches the
+network.
+
+Run with `python -m unittest discover tools/sync/tests` (or pytest).
+"""
+
+import contextlib
+import io
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from fake_github import ORG, ServerTestCase
+
+import downloader
+import repo_tree
+from api_cache import ResponseCache
+from blob_store import git_blob_sha
+from request_scheduler import RequestFailed, RequestScheduler
+from sources import RestSource
+from sync_org import OrgScanner
+
+
+# ─────────────────────────────────────────────────────────────
+#  RestSource + RequestScheduler
+# ─────────────────────────────────────────────────────────────
+
+class RestSourceTests(ServerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        env = mock.patch.dict(os.environ, {"GITHUB_API_URL": self.server.url})
+        env.start()
+        self.addCleanup(env.stop)
+        self.scheduler = RequestScheduler(max_concurrency=8, backoff=0.001)
+        self.source = RestSource(ORG, ResponseCache(self.tmp / "api"), self.scheduler)
+
+    def test_uses_github_api_url(self):
+        self.server.route(f"orgs/{ORG}/repos?per_page=100", [{"name": "alpha", "pushed_at": "t1"}])
+        self.assertEqual([r["name"] for r in self.source.list_repos()], ["alpha"])
+        self.assertEqual(self.source.base_url, self.server.url)
+
+    def test_retries_5xx_429_and_rate_limited_403(self):
+        endpoint = f"repos/{ORG}/alpha/contents"
+        self.server.route(endpoint, [])
+        self.server.faults[endpoint] = [
+            (502, {}),
+            (429, {"Retry-After": "0"}),
+            (403, {"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "0",
+                   "X-RateLimit-Reset": str(int(time.time()) - 1)}),
+        ]
+        self.assertEqual(self.source.api(endpoint), "[]")
+        self.assertEqual(self.scheduler.retried, 3)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_plain_403_is_not_retried(self):
+        endpoint = f"repos/{ORG}/private/contents"
+        self.server.route(endpoint, {"message": "Forbidden"}, status=403)
+        with self.assertRaises(RequestFailed):
+            self.source.api(endpoint)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_gives_up_after_max_retries(self):
+        endpoint = f"repos/{ORG}/alpha/contents"
+        self.server.route(endpoint, {}, status=500)
+        with self.assertRaises(RequestFailed):
+            self.source.api(endpoint)
+        self.assertEqual(len(self.server.requests), self.scheduler.max_retries + 1)
+
+    def _burst(self, remaining: int) -> int:
+        """Most concurrent requests seen for a burst of 16 at the given quota left."""
+        self.server.quota = (100, remaining)
+        self.server.delay = 0.05
+        for i in range(17):
+            self.server.route(f"repos/{ORG}/r{i}/contents", [])
+        self.source.api(f"repos/{ORG}/r16/contents")  # learn the quota
+        self.server.max_in_flight = 0
+        threads = [threading.Thread(target=self.source.api, args=(f"repos/{ORG}/r{i}/contents",))
+                   for i in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return self.server.max_in_flight
+
+    def test_full_concurrency_while_quota_is_plentiful(self):
+        self.assertGreater(self._burst(remaining=90), 1)
+        self.assertEqual(self.scheduler.allowed(), 8)
+
+    def test_throttles_as_quota_drains(self):
+        self.assertEqual(self._burst(remaining=5), 1)
+        self.assertEqual(self.scheduler.allowed(), 1)
+
+    def test_allowed_narrows_linearly(self):
+        steps = []
+        for remaining in (100, 50, 25, 10, 0):
+            self.scheduler.update({"x-ratelimit-limit": "100", "x-ratelimit-remaining": str(remaining)})
+            steps.append(self.scheduler.allowed())
+        self.assertEqual(steps, [8, 8, 4, 1, 1])
+
+    def test_exhausted_quota_past_max_wait_fails_fast(self):
+        self.scheduler.max_wait = 5
+        self.scheduler.update({"x-ratelimit-limit": "60", "x-ratelimit-remaining": "0",
+                               "x-ratelimit-reset": str(int(time.time()) + 600)})
+        with self.assertRaises(RequestFailed):
+            self.source.api(f"repos/{ORG}/alpha/contents")
+        self.assertEqual(self.server.requests, [])
+
+    def test_empty_repo_lists_no_files(self):
+        # GitHub answers 409 for the tree of an empty repo, 404 for its contents
+        self.server.route(repo_tree.tree_endpoint(ORG, "empty"), {"message": "Git Repository is empty."},
+                          status=409)
+        self.assertEqual(self.source.list_files("empty", ["media"]), [])
+
+
+class SyncCoreTests(ServerTestCase):
+    """A whole scan + sync through sync_org.py's scanner on the REST source."""
+
+    def setUp(self):
+        super().setUp()
+        for patch in (mock.patch.dict(os.environ, {"GITHUB_API_URL": self.server.url}),
+                      mock.patch.object(repo_tree, "RAW_BASE", self.server.url),
+                      mock.patch.object(downloader, "RETRY_DELAY", 0)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.server.route(f"orgs/{ORG}/repos?per_page=100", [
+            {"name": "good", "pushed_at": "t-good"},
+            {"name": "bad", "pushed_at": "t-bad"},
+            {"name": "empty", "pushed_at": "t-empty"},
+        ])
+        for repo in ("good", "bad"):
+            data = f"{repo} logo".encode()
+            self.server.route(repo_tree.tree_endpoint(ORG, repo), {"truncated": False, "tree": [
+                {"type": "blob", "path": "logo.png", "sha": git_blob_sha(data), "size": len(data)},
+            ]})
+        self.server.route(f"{ORG}/good/HEAD/logo.png", b"good logo")
+        self.server.route(repo_tree.tree_endpoint(ORG, "empty"), {"message": "empty"}, status=409)
+
+    def _run(self, scanner: OrgScanner) -> list:
+        with contextlib.redirect_stdout(io.StringIO()):
+            scanner.scan_all(full=False)
+            scanner.sync(dry_run=False)
+        return scanner.assets
+
+    def test_failed_download_keeps_repo_head_unrecorded(self):
+        scanner = OrgScanner(ORG, repo_root=self.tmp, source="rest")
+        assets = self._run(scanner)
+
+        self.assertEqual(sorted(a.source for a in assets), ["bad", "good"])
+        heads = scanner.core.state.repo_heads["repo-first"]
+        self.assertEqual(heads, {"good": "t-good", "empty": "t-empty"})
+        self.assertEqual((self.tmp / "repos/good/images/logo.png").read_bytes(), b"good logo")
+        self.assertFalse((self.tmp / "repos/bad/images/logo.png").exists())
+
+        # Next run rescans only the repo that failed, and this time it lands
+        self.server.route(f"{ORG}/bad/HEAD/logo.png", b"bad logo")
+        scanner = OrgScanner(ORG, repo_root=self.tmp, source="rest")
+        assets = self._run(scanner)
+        self.assertEqual([a.source for a in assets], ["bad"])
+        self.assertEqual(scanner.core.state.repo_heads["repo-first"]["bad"], "t-bad")
+
+    def test_unreadable_repo_is_failed_not_empty(self):
+        self.server.route(repo_tree.tree_endpoint(ORG, "good"), {"message": "boom"}, status=403)
+        scanner = OrgScanner(ORG, repo_root=self.tmp, source="rest")
+        self._run(scanner)
+        self.assertIn("good", scanner.core.scan_errors)
+        self.assertNotIn("good", scanner.core.state.repo_heads["repo-first"])
+        self.assertIn("empty", scanner.core.state.repo_heads["repo-first"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+haKCAssets Watcher - Async notifications for files dropped in a directory
+
+Two backends with the same interface (`async for paths in w.changes()`):
+- InotifyWatcher: Linux inotify via ctypes, reacts as soon as a file is
+  closed after writing or moved in
+- PollingWatcher: pure-Python fallback. Stats the directory each tick and
+  only rescans entries when its mtime moved, reporting a file once its
+  size/mtime are stable across two polls (so half-written drops wait)
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from pathlib import Path
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_ISDIR = 0x40000000
+EVENT_HEADER = struct.Struct("iIII")
+
+# Let a burst of events (e.g. a multi-file copy) settle into one batch
+DEBOUNCE_SECONDS = 0.5
+
+
+class InotifyWatcher:
+    """Non-recursive inotify watch on one directory."""
+
+    kind = "inotify"
+
+    def __init__(self, root: Path):
+        self.root = root
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(root), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {root}")
+
+    def _read_events(self, queue: asyncio.Queue):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name and not mask & IN_ISDIR:
+                queue.put_nowait(os.fsdecode(name))
+
+    async def changes(self):
+        """Yield batches of paths written or moved into the directory."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        loop.add_reader(self.fd, self._read_events, queue)
+        try:
+            while True:
+                names = {await queue.get()}
+                await asyncio.sleep(DEBOUNCE_SECONDS)
+                while not queue.empty():
+                    names.add(queue.get_nowait())
+                yield [self.root / name for name in sorted(names)]
+        finally:
+            loop.remove_reader(self.fd)
+            os.close(self.fd)
+
+
+class PollingWatcher:
+    """Stat-cached polling of one directory."""
+
+    kind = "polling"
+
+    def __init__(self, root: Path, interval: float = 2.0):
+        self.root = root
+        self.interval = interval
+
+    def _snapshot(self) -> dict:
+        snap = {}
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    snap[entry.name] = (st.st_size, st.st_mtime_ns)
+        return snap
+
+    async def changes(self):
+        """Yield batches of new (or renamed-over) files once they stop changing."""
+        dir_mtime = os.stat(self.root).st_mtime_ns
+        seen = self._snapshot()
+        pending: dict[str, tuple] = {}
+
+        while True:
+            await asyncio.sleep(self.interval)
+
+            # Nothing added, removed or renamed and nothing settling: skip the rescan
+            mtime = os.stat(self.root).st_mtime_ns
+            if mtime == dir_mtime and not pending:
+                continue
+            dir_mtime = mtime
+
+            snap = self._snapshot()
+            ready = [name for name, sig in pending.items() if snap.get(name) == sig]
+            pending = {name: sig for name, sig in snap.items()
+                       if seen.get(name) != sig and name not in ready}
+            seen = {name: sig for name, sig in snap.items() if name not in pending}
+
+            if ready:
+                yield [self.root / name for name in sorted(ready)]
+
+
+def make_watcher(root: Path, poll_interval: float = 2.0):
+    """inotify where available, polling everywhere else."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, poll_interval)